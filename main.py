@@ -29,6 +29,13 @@ async def startup_event():
 # from fastapi_utils.tasks import repeat_every . Not used currently
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from utils.orion_db_manager import cleanup_expired_sessions
+from utils.db_connection import close_all as close_db_connections
+from utils.ingest_jobs import ingest_runner
+from utils.log_watcher import log_watcher
+from utils.event_retention import run_event_retention
+from utils import log_archive
+from utils import peer_health
+from utils import analysis_sqlite
 scheduler = AsyncIOScheduler()
 
 @app.on_event("startup")
@@ -41,11 +48,52 @@ async def start_scheduler():
         minute=0,
         args=[24] # Passes 24 to the max_age_hours argument
     )
+    # 202601 Roll old BGP/OSPF state changes into hourly/daily rollups, prune, incremental vacuum
+    if mainconfig.EVENT_RETENTION_ENABLED:
+        scheduler.add_job(
+            run_event_retention,
+            'cron',
+            hour=mainconfig.EVENT_RETENTION_HOUR,
+            minute=30,
+            max_instances=1,
+            coalesce=True
+        )
+    # 202601 Compress session logs older than LOG_ARCHIVE_AFTER_DAYS (utils/log_archive.py)
+    if mainconfig.LOG_ARCHIVE_ENABLED:
+        scheduler.add_job(
+            log_archive.archive_old_logs,
+            'cron',
+            hour=mainconfig.LOG_ARCHIVE_HOUR,
+            minute=0,
+            max_instances=1,
+            coalesce=True
+        )
+    # 202601 Let the 1h/12h/24h flap counts in peer_health fall back as peers go quiet (utils/peer_health.py)
+    scheduler.add_job(
+        peer_health.refresh_flap_windows,
+        'interval',
+        minutes=mainconfig.PEER_HEALTH_REFRESH_MINUTES,
+        max_instances=1,
+        coalesce=True
+    )
+    # 202601 bgp_peer_status duplicate cleanup for logs ingested by device checks (utils/network.py)
+    scheduler.add_job(
+        analysis_sqlite.run_pending_bgp_cleanup,
+        'interval',
+        minutes=mainconfig.BGP_CLEANUP_MINUTES,
+        max_instances=1,
+        coalesce=True
+    )
     scheduler.start()
+    if mainconfig.LOG_WATCH_ENABLED:
+        log_watcher.start()
 
 @app.on_event("shutdown")
 async def shutdown_scheduler():
     scheduler.shutdown()
+    await log_watcher.stop()
+    ingest_runner.shutdown()
+    close_db_connections()
 #startup
 
 # Set up folder paths and mount 
@@ -140,14 +188,15 @@ async def serve_log_or_list(subpath: str, request: Request):
     # Clean up trailing slash for directory listing
     if os.path.isdir(full_path):
         try:
-            files = os.listdir(full_path)
-            files.sort()
+            # archived session logs are listed under their plain name, size and date
+            files = log_archive.list_logs(full_path)
             items = []
 
             for name in files:
                 item_path = os.path.join(full_path, name)
-                modified = datetime.fromtimestamp(os.path.getmtime(item_path)).strftime("%m/%d/%Y %I:%M %p")
-                size = "<dir>" if os.path.isdir(item_path) else os.path.getsize(item_path)
+                stat_result = os.stat(item_path) if os.path.isdir(item_path) else log_archive.stat_log(item_path)
+                modified = datetime.fromtimestamp(stat_result.st_mtime).strftime("%m/%d/%Y %I:%M %p")
+                size = "<dir>" if os.path.isdir(item_path) else stat_result.st_size
                 items.append({
                     "name": name,
                     "modified": modified,
@@ -167,6 +216,13 @@ async def serve_log_or_list(subpath: str, request: Request):
     elif os.path.isfile(full_path):
         return FileResponse(full_path)
 
+    elif log_archive.log_exists(full_path):
+        # archived session log: stream it decompressed
+        def archived_chunks(chunk_size=256 * 1024):
+            with log_archive.open_log(full_path, 'rb') as f:
+                yield from iter(lambda: f.read(chunk_size), b"")
+        return StreamingResponse(archived_chunks(), media_type="text/plain; charset=utf-8")
+
     else:
         raise HTTPException(status_code=404, detail="File or directory not found")
 
@@ -21,6 +21,59 @@ ALERT_LOG_PATH = LOGS_DIR / "alert_center.log"
 # Database settings
 DB_PATH = DATA_DIR / "network_core.db"
 DB_ORION_PATH = DATA_DIR / "orion_data.db"
+# Connection pragmas applied by utils/db_connection.py to every database (WAL journal)
+SQLITE_SYNCHRONOUS = "NORMAL"       # safe with WAL; FULL also fsyncs every commit
+SQLITE_CACHE_KB = 65536             # page cache per connection (64 MB)
+SQLITE_MMAP_BYTES = 268435456       # memory-mapped reads (256 MB), 0 disables
+SQLITE_BUSY_TIMEOUT_MS = 10000      # wait this long for another process's write lock before "database is locked"
+# Monitor response cache (utils/response_cache.py), keyed on the database generation
+MONITOR_CACHE_ENTRIES = 256         # cached pages / table queries, least recently used dropped first
+MONITOR_CACHE_TTL_SECONDS = 60      # also expire unchanged data, for the clock-based "recent change" highlight
+
+# Log ingestion settings (utils/analysis_sqlite.py)
+INGEST_WORKERS = 1      # parser processes for directory mode; 1 = serial, e.g. os.cpu_count() for bulk backfills
+INGEST_COMMIT_FILES = 50    # files written per transaction in directory mode
+INGEST_WRITE_HOLD_SECONDS = 0.25    # ... or fewer: a write step ends after this long, other writers queue on it
+BGP_CLEANUP_MINUTES = 5     # device check logs (utils/network.py) leave the bgp_peer_status cleanup to a job this often
+
+# Core log watcher (utils/log_watcher.py): ingest files landing in CORE_LOGS_DIR without a Flush
+LOG_WATCH_ENABLED = True
+LOG_WATCH_QUIET_SECONDS = 2.0   # a file is ingested once it has seen no writes for this long
+LOG_WATCH_MAX_BATCH = 200       # more settled files than this at once -> one full directory scan instead
+
+# State change retention (utils/event_retention.py), run daily by the main.py scheduler
+EVENT_RETENTION_ENABLED = True
+EVENT_RETENTION_HOUR = 3            # local hour of the daily run
+EVENT_RAW_RETENTION_DAYS = 30       # raw bgp/ospf_state_changes rows kept this long, then rolled up per peer and hour (min 1)
+EVENT_HOURLY_RETENTION_DAYS = 180   # hourly rollups kept this long, then merged per peer and day
+EVENT_DAILY_RETENTION_DAYS = 0      # daily rollups kept this long; 0 keeps them forever
+EVENT_VACUUM_PAGES = 0              # free pages returned to the OS per run (PRAGMA incremental_vacuum), 0 = all
+EVENT_VACUUM_CONVERT = True         # one-time full VACUUM to switch an existing database to auto_vacuum=INCREMENTAL
+
+# Session log archival (utils/log_archive.py), run daily by the main.py scheduler
+LOG_ARCHIVE_ENABLED = True
+LOG_ARCHIVE_HOUR = 2                # local hour of the daily run
+LOG_ARCHIVE_AFTER_DAYS = 7          # session logs not modified for this long are gzip-compressed in place
+LOG_ARCHIVE_DIRS = [CORE_LOGS_DIR, CORE_LOGS_DIR / "arch"]
+LOG_ARCHIVE_MEMBER_BYTES = 1048576  # uncompressed bytes per gzip member; an offset read decompresses at most one extra member
+LOG_ARCHIVE_LEVEL = 6               # gzip compression level
+
+# Peer health table (utils/peer_health.py), maintained at ingest time
+PEER_HEALTH_REFRESH_MINUTES = 15    # how often the 1h/12h/24h flap counts of recently flapping peers are recounted
+
+# Streaming flap detector (utils/flap_detector.py), /api/monitor/flaps
+FLAP_DETECTOR_WINDOWS = {"5m": 300, "1h": 3600, "24h": 86400}  # sliding windows, name -> seconds
+FLAP_BUCKET_SECONDS = 10           # window counts move in steps of this many seconds (utils/flap_detector.py)
+FLAP_PENALTY = 1000                 # penalty added per flap (BGP route flap dampening defaults)
+FLAP_HALF_LIFE_SECONDS = 900        # the penalty halves every 15 minutes without flaps
+FLAP_SUPPRESS_PENALTY = 2000        # at or above: the peer is flapping
+FLAP_REUSE_PENALTY = 750            # ... until its penalty decays below this
+FLAP_MAX_PENALTY = 12000            # cap: flapping ends at most 60 minutes after the last flap
+
+# Live dashboard updates (/api/monitor/stream, Server-Sent Events)
+MONITOR_STREAM_POLL_SECONDS = 1     # how often each stream checks the database generation for new commits
+MONITOR_STREAM_HEARTBEAT_SECONDS = 15   # keep-alive comment while nothing changes (proxies drop idle streams)
+MONITOR_STREAM_BATCH_ROWS = 500     # state change rows per message; a resuming client catches up batch by batch
 
 # files settings
 SESSION_LOG_JSON = SESSION_DIR / "orion_session_log.json"
@@ -17,6 +17,7 @@ from mainpydantic import OrionCheckRequest, OrionResponse
 from utils.session_manager import OrionSession, update_session_audit
 from utils.orion_db_manager import sync_orion_data
 from utils.orion_db_manager import OrionDatabaseManager
+from utils.db_connection import get_database
 
 # --- Setup ---
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -696,12 +697,13 @@ def get_orion_dashboard_html(request, npm_server, username, password, session_id
 
         db_manager = OrionDatabaseManager(mainconfig.DB_ORION_PATH)
         db_manager.setup_tables()
+        db_manager.close()
 
-        conn = sqlite3.connect(mainconfig.DB_ORION_PATH)
+        # 202601 Pooled WAL reader (utils/db_connection.py)
+        conn = get_database(mainconfig.DB_ORION_PATH).reader()
         curr = conn.cursor()
 
         # Check if we have data
-        db_manager.setup_tables()
 
         data_for_db = {
             "node_table": node_table[1],  # pass the data part
@@ -866,15 +868,11 @@ async def get_map_data(site: str = None):
     if not site:
         return {"nodes": [], "edges": []}
     
-    db = OrionDatabaseManager(mainconfig.DB_ORION_PATH)
-    db.connect()
-    
     # 1. Fetch Topology Links
     query = "SELECT SourceNodeID, SourceNodeName, TargetNodeID, TargetNodeName, SourceInterface FROM [Orion.Topology]"
     query += f" WHERE SourceSite LIKE '%{site}%' OR TargetSite LIKE '%{site}%'"
 
-    df = pd.read_sql_query(query, db.conn)
-    db.conn.close()
+    df = pd.read_sql_query(query, get_database(mainconfig.DB_ORION_PATH).reader())
 
     # 2. Build vis.js format
     nodes = []
@@ -929,11 +927,10 @@ async def get_analysis_page(request: Request):
 async def get_custom_properties_data():
     db_manager = OrionDatabaseManager(mainconfig.DB_ORION_PATH)
     try:
-        conn = sqlite3.connect(mainconfig.DB_ORION_PATH)
         db_manager.setup_tables()
+        db_manager.close()
         query = "SELECT  * FROM [Orion.Nodes]"
-        df = pd.read_sql_query(query, conn)
-        conn.close()
+        df = pd.read_sql_query(query, get_database(mainconfig.DB_ORION_PATH).reader())
         
         # Replace NaN/None with empty strings for clean display
         df = df.fillna("")
@@ -945,13 +942,10 @@ async def get_custom_properties_data():
 
 @router.get("/topology")
 async def get_topology_data(site: str = None):
-    db = OrionDatabaseManager(mainconfig.DB_ORION_PATH)
-    db.connect()
     # Filter by site if provided, otherwise return all
     query = "SELECT * FROM [Orion.Topology]"
     if site:
         query += f" WHERE Site = '{site}'"
-    df = pd.read_sql_query(query, db.conn)
-    db.conn.close()
+    df = pd.read_sql_query(query, get_database(mainconfig.DB_ORION_PATH).reader())
     return {"data": df.to_dict(orient="records")}
 
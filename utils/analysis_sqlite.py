@@ -1,9 +1,15 @@
-import os, sys, json, re, logging, sqlite3
+import os, sys, json, re, time, logging, sqlite3, argparse, hashlib, threading, multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from logging.handlers import RotatingFileHandler
 # 202512 Import mainconfig module
 sys.path.append("..")
 import mainconfig as mainconfig
+import utils.db_connection as db_connection
+import utils.vendor_parsers as vendor_parsers
+import utils.log_archive as log_archive
+import utils.peer_health as peer_health
+import utils.uptime_codec as uptime_codec
 
 # Configure logging
 # log_directory = mainconfig.LOGS_DIR
@@ -17,18 +23,131 @@ import mainconfig as mainconfig
 
 logger = mainconfig.setup_module_logger(__name__)
 
-def setup_database(db_path):
-    """Set up the SQLite database with corrected table schemas."""
-    conn = sqlite3.connect(db_path)
+# Extra processed_files columns used for incremental (byte-offset) ingestion.
+# Rows written before these existed have offset NULL and are treated as fully processed.
+PROCESSED_FILES_TRACKING_COLUMNS = [
+    ("size", "INTEGER"),
+    ("mtime", "REAL"),
+    ("offset", "INTEGER"),
+    ("vendor", "TEXT"),
+    ("hostname", "TEXT"),
+    ("host_ip", "TEXT"),
+]
+
+EVENT_TABLES = ("bgp_state_changes", "ospf_state_changes")
+# Peer status table -> its uptime text column, parsed into uptime_seconds (utils/uptime_codec.py)
+UPTIME_COLUMNS = {"bgp_peer_status": "up_down_time", "ospf_peer_status": "verbose_uptime"}
+
+# 202601 Managed secondary indexes (name, table, columns) behind the routers/monitor.py queries.
+# ensure_indexes() creates missing ones and drops idx_* indexes on these tables that are no longer listed;
+# utils/bench_monitor_queries.py checks the query plans against this set.
+INDEXES = [
+    # get_peer_history (/history): WHERE hostname = ? AND neighbor = ? AND ts range ORDER BY ts DESC, id DESC (keyset
+    # pages), and the repeated-event probe on (hostname, neighbor, ts)
+    ("idx_bgp_changes_host_nbr_ts", "bgp_state_changes", "hostname, neighbor_ip, ts"),
+    ("idx_ospf_changes_host_nbr_ts", "ospf_state_changes", "hostname, neighbor_address, ts"),
+    # dashboard_table: event tables newest first (covering ts, neighbor)
+    ("idx_bgp_changes_ts", "bgp_state_changes", "ts, neighbor_ip"),
+    ("idx_ospf_changes_ts", "ospf_state_changes", "ts, neighbor_address"),
+    # Rollup tier (utils/event_retention.py): history per peer, newest first
+    ("idx_bgp_rollup_host_nbr_ts", "bgp_state_rollup", "hostname, neighbor_ip, last_ts"),
+    ("idx_ospf_rollup_host_nbr_ts", "ospf_state_rollup", "hostname, neighbor_address, last_ts"),
+    # retention runs: rollup rows of one period, one bucket range at a time
+    ("idx_bgp_rollup_period_bucket", "bgp_state_rollup", "period, bucket_ts"),
+    ("idx_ospf_rollup_period_bucket", "ospf_state_rollup", "period, bucket_ts"),
+    # current status per peer (GROUP BY hostname, neighbor) joined to the event row sets
+    ("idx_bgp_status_host_nbr", "bgp_peer_status", "hostname, neighbor_ip"),
+    ("idx_ospf_status_host_nbr", "ospf_peer_status", "hostname, neighbor_address"),
+    # dashboard_table: status tables ordered by uptime, recently reset peers (uptime_seconds < ?)
+    ("idx_bgp_status_uptime", "bgp_peer_status", "uptime_seconds"),
+    ("idx_ospf_status_uptime", "ospf_peer_status", "uptime_seconds"),
+    # dashboard_table: problem peers and peers changed in the last 12 hours (utils/peer_health.py)
+    ("idx_peer_health_problem", "peer_health", "problem, protocol"),
+    ("idx_peer_health_recent", "peer_health", "protocol, last_change_ts, neighbor"),
+    # monitor_stream: peer_health rows recomputed since the client's cursor (flaps_ts is when a row was written)
+    ("idx_peer_health_refreshed", "peer_health", "flaps_ts"),
+]
+
+# 202601 Rollup tier of the state change tables (utils/event_retention.py): raw events older than
+# EVENT_RAW_RETENTION_DAYS become one row per peer and hour ('hourly'), hourly rows older than
+# EVENT_HOURLY_RETENTION_DAYS one row per peer and day ('daily'). up_seconds / down_seconds is the time
+# the peer spent Established (BGP) / Full (OSPF) or in any other known state inside the bucket.
+ROLLUP_COLUMNS = """period TEXT, bucket_ts INTEGER, transitions INTEGER, flaps INTEGER, first_ts INTEGER, last_ts INTEGER,
+        first_from_state TEXT, last_to_state TEXT, up_seconds INTEGER, down_seconds INTEGER"""
+
+# Raw and rollup tiers as one event list, in the raw table's columns plus tier / transitions / flaps / first_ts.
+# A rollup row reads as one event from its first from_state to its last to_state at its last transition (ts).
+HISTORY_VIEWS = {
+    "bgp_state_history": """
+        SELECT id, hostname, vpn_instance, neighbor_ip, from_state, to_state, timestamp, log_file, ts,
+               'raw' AS tier, 1 AS transitions, {bgp_flap} AS flaps, ts AS first_ts
+        FROM bgp_state_changes
+        UNION ALL
+        SELECT NULL, hostname, vpn_instance, neighbor_ip, first_from_state, last_to_state, {rollup_stamp}, NULL, last_ts,
+               period, transitions, flaps, first_ts
+        FROM bgp_state_rollup""",
+    "ospf_state_history": """
+        SELECT id, hostname, process, neighbor_address, interface, from_state, to_state, timestamp, log_file, ts,
+               'raw' AS tier, 1 AS transitions, {ospf_flap} AS flaps, ts AS first_ts
+        FROM ospf_state_changes
+        UNION ALL
+        SELECT NULL, hostname, process, neighbor_address, interface, first_from_state, last_to_state, {rollup_stamp}, NULL, last_ts,
+               period, transitions, flaps, first_ts
+        FROM ospf_state_rollup""",
+}
+# A flap is a transition out of the up state (matches event_retention.is_up)
+BGP_FLAP_SQL = "(UPPER(IFNULL(from_state, '')) = 'ESTABLISHED' AND UPPER(IFNULL(to_state, '')) != 'ESTABLISHED')"
+OSPF_FLAP_SQL = "(UPPER(IFNULL(from_state, '')) LIKE 'FULL%' AND UPPER(IFNULL(to_state, '')) NOT LIKE 'FULL%')"
+ROLLUP_STAMP_SQL = "strftime('%Y-%m-%d %H:%M', bucket_ts, 'unixepoch', 'localtime') || ' (' || period || ')'"
+
+def ensure_history_views(conn):
+    """(Re)create the raw + rollup history views, so a changed definition replaces the stored one."""
+    for name, select in HISTORY_VIEWS.items():
+        conn.execute(f"DROP VIEW IF EXISTS {name}")
+        conn.execute(f"CREATE VIEW {name} AS " + select.format(bgp_flap=BGP_FLAP_SQL, ospf_flap=OSPF_FLAP_SQL,
+                                                                 rollup_stamp=ROLLUP_STAMP_SQL))
+
+def ensure_indexes(conn):
+    """Create the managed INDEXES that are missing and drop stale managed (idx_*) ones. Returns names created."""
     cursor = conn.cursor()
+    wanted = {name for name, _, _ in INDEXES}
+    tables = {table for _, table, _ in INDEXES}
+    for name, table in cursor.execute("SELECT name, tbl_name FROM sqlite_master WHERE type = 'index' AND name GLOB 'idx_*'").fetchall():
+        if table in tables and name not in wanted:
+            logger.info(f"Dropping stale index {name} on {table}.")
+            cursor.execute(f"DROP INDEX IF EXISTS {name}")
+    existing = {row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    created = []
+    for name, table, columns in INDEXES:
+        if name not in existing:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+            created.append(name)
+    if created:
+        logger.info(f"Created indexes: {', '.join(created)}")
+    return created
+
+def setup_database(db_path, conn=None):
+    """
+    Set up the SQLite database with corrected table schemas.
+    Opens a tuned WAL connection (utils/db_connection.py) unless an open connection is passed,
+    e.g. the shared writer from get_database(db_path).writer().
+    """
+    if conn is None:
+        conn = db_connection.connect(db_path)
+    cursor = conn.cursor()
+    # 202601 New databases give pages freed by the retention runs back to the OS (PRAGMA incremental_vacuum);
+    # the WAL switch in connect() already wrote the header, so the setting needs a VACUUM (instant while empty)
+    if not conn.in_transaction and cursor.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0] == 0:
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        cursor.execute("VACUUM")
     # Create BGP peer status table with corrected schema 12 columns
     cursor.execute('''CREATE TABLE IF NOT EXISTS bgp_peer_status
         (hostname TEXT, host_ip TEXT, vpn_instance TEXT, local_router_id TEXT, local_as_number TEXT, neighbor_ip TEXT, remote_router_id TEXT, remote_as TEXT, up_down_time TEXT, state TEXT, last_updated_ts TEXT, 
-        last_snapshot_id TEXT, source_log_file TEXT,
+        last_snapshot_id TEXT, source_log_file TEXT, uptime_seconds INTEGER,
         PRIMARY KEY (host_ip, vpn_instance, neighbor_ip))''')
     # Create OSPF peer status table with corrected schema 20 columns
     cursor.execute('''CREATE TABLE IF NOT EXISTS ospf_peer_status
-        (hostname TEXT, host_ip TEXT, process TEXT, process_routerid TEXT, vrf TEXT, area TEXT, interface TEXT, neighbor_routerid TEXT, neighbor_address TEXT, state TEXT, mode TEXT, verbose_uptime TEXT, state_count TEXT, last_down_time TEXT, last_routerid TEXT, last_local TEXT, last_remote TEXT, last_reason TEXT, last_updated_ts TEXT, last_snapshot_id TEXT, source_log_file TEXT,
+        (hostname TEXT, host_ip TEXT, process TEXT, process_routerid TEXT, vrf TEXT, area TEXT, interface TEXT, neighbor_routerid TEXT, neighbor_address TEXT, state TEXT, mode TEXT, verbose_uptime TEXT, state_count TEXT, last_down_time TEXT, last_routerid TEXT, last_local TEXT, last_remote TEXT, last_reason TEXT, last_updated_ts TEXT, last_snapshot_id TEXT, source_log_file TEXT, uptime_seconds INTEGER,
         PRIMARY KEY (host_ip, process, neighbor_address)
                    )''')
     # Create tables for BGP/OSPF state changes
@@ -42,6 +161,36 @@ def setup_database(db_path):
 
     # Create table for processed files
     cursor.execute('CREATE TABLE IF NOT EXISTS processed_files (filename TEXT PRIMARY KEY)')
+    # 202601 Track size/mtime/byte offset per file so growing logs are tailed instead of re-parsed
+    existing_cols = {row[1] for row in cursor.execute("PRAGMA table_info(processed_files)")}
+    for col, col_type in PROCESSED_FILES_TRACKING_COLUMNS:
+        if col not in existing_cols:
+            cursor.execute(f"ALTER TABLE processed_files ADD COLUMN {col} {col_type}")
+
+    # 202601 Normalized INTEGER epoch (ts) next to the TEXT timestamp, indexed for latest / last N hours queries
+    for table in EVENT_TABLES:
+        if 'ts' not in {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN ts INTEGER")
+            backfill_event_epochs(conn, table)
+    # 202601 Uptime in seconds next to the vendor's uptime text (utils/uptime_codec.py)
+    for table, column in UPTIME_COLUMNS.items():
+        if 'uptime_seconds' not in {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN uptime_seconds INTEGER")
+            backfill_uptime_seconds(conn, table, column)
+    # 202601 Hourly / daily rollups of the pruned raw events (utils/event_retention.py)
+    cursor.execute(f'''CREATE TABLE IF NOT EXISTS bgp_state_rollup
+        (hostname TEXT, vpn_instance TEXT, neighbor_ip TEXT, {ROLLUP_COLUMNS})''')
+    cursor.execute(f'''CREATE TABLE IF NOT EXISTS ospf_state_rollup
+        (hostname TEXT, process TEXT, neighbor_address TEXT, interface TEXT, {ROLLUP_COLUMNS})''')
+    # 202601 Current health per peer, maintained at ingest time (utils/peer_health.py)
+    peer_health.ensure_table(conn)
+    ensure_history_views(conn)
+    ensure_indexes(conn)
+    if peer_health.needs_rebuild(conn):
+        peer_health.rebuild(conn)
+
+    # 202601 Content fingerprints: whole files and log sections already ingested (see apply_parsed_log)
+    cursor.execute('CREATE TABLE IF NOT EXISTS content_hashes (hash TEXT PRIMARY KEY, kind TEXT, filename TEXT, first_seen TEXT)')
 
     conn.commit()
     return conn
@@ -57,8 +206,8 @@ def cleanup_bgp_peer_status(conn):
 
     # Robust SQL to find the single rowid with the latest timestamp (MAX(last_updated_ts)) 
     # for each unique peer key, and delete all other rows.
-    cleanup_sql = '''
-        DELETE FROM bgp_peer_status
+    stale_rows_sql = '''
+        FROM bgp_peer_status
         WHERE rowid NOT IN (
             SELECT t.rowid
             FROM bgp_peer_status t
@@ -79,8 +228,12 @@ def cleanup_bgp_peer_status(conn):
     '''
     
     try:
-        cursor.execute(cleanup_sql)
+        # 202601 Peers losing status rows get their peer_health row recomputed
+        stale_peers = [("bgp",) + tuple(row) for row in
+                       cursor.execute(f"SELECT DISTINCT hostname, vpn_instance, neighbor_ip {stale_rows_sql}").fetchall()]
+        cursor.execute(f"DELETE {stale_rows_sql}")
         deleted_rows = cursor.rowcount
+        peer_health.refresh_peers(conn, stale_peers)
         conn.commit()
         logger.info(f"Cleanup complete. Deleted {deleted_rows} older duplicate BGP peer records.")
         return deleted_rows
@@ -103,14 +256,384 @@ def parse_timestamp(raw_ts_str, log_year):
     except (ValueError, IndexError):
         return f"{raw_ts_str} {log_year}"    
 
-def process_log_file(conn, log_file_path, file_id, log_dir_base):
-    """Process a single log file and insert into database."""
+# Raw forms parse_timestamp falls back to; HPE stamps are stored half-converted as "Jul 10 16.08.00:614 2025"
+EPOCH_FALLBACK_FORMATS = ["%b %d %H.%M.%S:%f %Y", "%b %d %H:%M:%S:%f %Y", "%b %d %H:%M:%S %Y"]
+
+def timestamp_epoch(ts_text):
+    """
+    Epoch seconds (device local time) for a timestamp string as stored by parse_timestamp,
+    or None if it cannot be read. Stored in the ts column of the state change tables.
+    """
+    if not ts_text:
+        return None
+    try:
+        return int(datetime.fromisoformat(ts_text).timestamp())
+    except ValueError:
+        pass
+    for fmt in EPOCH_FALLBACK_FORMATS:
+        try:
+            return int(datetime.strptime(ts_text, fmt).timestamp())
+        except ValueError:
+            continue
+    return None
+
+def backfill_event_epochs(conn, table, batch_size=10000):
+    """One-time migration: fill ts for existing state change rows from their TEXT timestamp."""
+    rows = conn.execute(f"SELECT rowid, timestamp FROM {table} WHERE ts IS NULL").fetchall()
+    updates = [(timestamp_epoch(ts_text), rowid) for rowid, ts_text in rows]
+    for i in range(0, len(updates), batch_size):
+        conn.executemany(f"UPDATE {table} SET ts = ? WHERE rowid = ?", updates[i:i + batch_size])
+    logger.info(f"Backfilled ts for {len(updates)} rows in {table}.")
+
+def backfill_uptime_seconds(conn, table, column, batch_size=10000):
+    """One-time migration: fill uptime_seconds for existing peer status rows from their uptime text."""
+    rows = conn.execute(f"SELECT rowid, {column} FROM {table} WHERE uptime_seconds IS NULL").fetchall()
+    updates = [(uptime_codec.to_seconds(text), rowid) for rowid, text in rows]
+    for i in range(0, len(updates), batch_size):
+        conn.executemany(f"UPDATE {table} SET uptime_seconds = ? WHERE rowid = ?", updates[i:i + batch_size])
+    logger.info(f"Backfilled uptime_seconds for {len(updates)} rows in {table}.")
+
+# SQL statements shared by the serial and parallel ingestion paths
+HPE_BGP_EVENT_SQL = 'INSERT OR IGNORE INTO bgp_state_changes (hostname, vpn_instance, neighbor_ip, from_state, to_state, timestamp, log_file, ts) VALUES (?, ?, ?, ?, ?, ?, ?, ?)'
+HPE_OSPF_EVENT_SQL = '''INSERT OR IGNORE INTO ospf_state_changes 
+                (hostname, process, neighbor_address, interface, from_state, to_state, timestamp, log_file, ts) 
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)'''
+OSPF_LAST_DOWN_SQL = '''UPDATE ospf_peer_status 
+                SET last_down_time = ?, last_routerid = ?, last_local = ?, last_remote = ?, last_reason = ?
+                WHERE hostname = ? AND process = ? AND neighbor_address = ?'''
+# 202601 OR IGNORE as for HPE: a repeated line hits the UNIQUE key, and with the file applied under one SAVEPOINT
+# (_apply_ingest_batch) a plain INSERT would roll back every row of the file
+CISCO_OSPF_EVENT_SQL = 'INSERT OR IGNORE INTO ospf_state_changes (hostname, process, neighbor_address, interface, from_state, to_state, timestamp, log_file, ts) VALUES (?,?,?,?,?,?,?,?,?)'
+
+BGP_PEER_COLUMNS = "hostname, host_ip, vpn_instance, local_router_id, local_as_number, neighbor_ip, remote_router_id, remote_as, up_down_time, state, last_updated_ts, last_snapshot_id, source_log_file, uptime_seconds"
+BGP_PEER_UPSERT_SQL = f'''
+            INSERT INTO bgp_peer_status ({BGP_PEER_COLUMNS}) 
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(host_ip, vpn_instance, neighbor_ip) 
+            DO UPDATE SET
+                state = excluded.state,
+                up_down_time = excluded.up_down_time,
+                uptime_seconds = excluded.uptime_seconds,
+                remote_router_id = excluded.remote_router_id,
+                remote_as = excluded.remote_as,
+                last_updated_ts = excluded.last_updated_ts,
+                last_snapshot_id = excluded.last_snapshot_id,
+                source_log_file = excluded.source_log_file
+            WHERE excluded.last_updated_ts > bgp_peer_status.last_updated_ts
+        '''
+
+OSPF_PEER_COLUMNS = "hostname, host_ip, process, process_routerid, vrf, area, interface, neighbor_routerid, neighbor_address, state, mode,  verbose_uptime, state_count, last_down_time, last_routerid, last_local, last_remote, last_reason, last_updated_ts, last_snapshot_id, source_log_file, uptime_seconds"
+# Define the SQL for INSERT OR UPDATE (Upsert)
+# This will update current status fields always, but conditionally update event fields.
+OSPF_PEER_UPSERT_SQL = f'''
+            INSERT INTO ospf_peer_status ({OSPF_PEER_COLUMNS}) 
+            VALUES ({', '.join(['?'] * len(OSPF_PEER_COLUMNS.split(', ')))})
+            ON CONFLICT(host_ip, process, neighbor_address) 
+            DO UPDATE SET
+                -- 1. Snapshot Fields (Always Update)
+                
+                process_routerid = excluded.process_routerid,
+                area = excluded.area,
+                interface = excluded.interface,
+                neighbor_routerid = excluded.neighbor_routerid,
+                state = excluded.state,
+                mode = excluded.mode,
+                verbose_uptime = excluded.verbose_uptime,
+                uptime_seconds = excluded.uptime_seconds,
+                state_count = excluded.state_count,
+                last_updated_ts = excluded.last_updated_ts,
+                last_snapshot_id = excluded.last_snapshot_id,
+                source_log_file = excluded.source_log_file,
+
+                -- 2. Event/Historical Fields (Update ONLY IF incoming data is NOT NULL)
+                hostname = CASE 
+                    WHEN excluded.hostname IS NOT NULL AND excluded.hostname != '' 
+                    THEN excluded.hostname 
+                    ELSE hostname 
+                END,                
+                vrf = CASE 
+                    WHEN excluded.vrf IS NOT NULL AND excluded.vrf != '' 
+                    THEN excluded.vrf  -- Use the NEW value
+                    ELSE vrf           -- Keep the OLD value
+                END,
+                last_down_time = CASE 
+                    WHEN excluded.last_down_time IS NOT NULL THEN excluded.last_down_time 
+                    ELSE last_down_time 
+                END,
+                last_routerid = CASE 
+                    WHEN excluded.last_routerid IS NOT NULL THEN excluded.last_routerid 
+                    ELSE last_routerid 
+                END,
+                last_local = CASE 
+                    WHEN excluded.last_local IS NOT NULL THEN excluded.last_local 
+                    ELSE last_local 
+                END,
+                last_remote = CASE 
+                    WHEN excluded.last_remote IS NOT NULL THEN excluded.last_remote 
+                    ELSE last_remote 
+                END,
+                last_reason = CASE 
+                    WHEN excluded.last_reason IS NOT NULL THEN excluded.last_reason 
+                    ELSE last_reason 
+                END
+        '''
+
+# 202601 Where the peer key sits in each batch's rows: (protocol, instance position, neighbor position),
+# hostname always first. touched_peers() reads it to refresh utils/peer_health.py
+PEER_KEY_POSITIONS = {
+    HPE_BGP_EVENT_SQL: ("bgp", 1, 2),
+    HPE_OSPF_EVENT_SQL: ("ospf", 1, 2),
+    CISCO_OSPF_EVENT_SQL: ("ospf", 1, 2),
+    BGP_PEER_UPSERT_SQL: ("bgp", 2, 5),
+    OSPF_PEER_UPSERT_SQL: ("ospf", 2, 8),
+}
+
+def process_log_file(conn, log_file_path, file_id, log_dir_base, cleanup=True, line_observers=()):
+    """
+    Process a single log file and insert into database.
+    cleanup=False leaves cleanup_bgp_peer_status to the caller (run it once per batch of files).
+    line_observers are fed every line of the parse (see LogEventScanner); they see nothing
+    when the file is skipped as a duplicate, so check their line count before using them.
+    """
+    try:
+        content_hash = file_content_hash(log_file_path)
+    except OSError:
+        content_hash = None  # parse_log_file reports the read error
+    if content_hash and is_duplicate_content(conn, content_hash):
+        logger.info(f"Skipping '{os.path.basename(log_file_path)}': identical content already ingested.")
+        return True
+    parsed = parse_log_file(log_file_path, log_dir_base, line_observers=line_observers)
+    if parsed is None:
+        return False
+    apply_parsed_log(conn, parsed)
+    if content_hash:
+        record_content_hash(conn, content_hash, parsed["filename"])
+
+    if cleanup:
+        cleanup_bgp_peer_status(conn)
+    conn.commit()
+    return True
+
+# 202601 Set when rows went in without cleanup_bgp_peer_status (ingest_log_file); run_pending_bgp_cleanup clears it
+_bgp_cleanup_pending = threading.Event()
+
+def ingest_log_file(database, log_file_path, log_dir_base, line_observers=()):
+    """
+    process_log_file for callers in the app process (device checks, utils/network.py): the file is hashed and
+    parsed outside database.writer(), which is only held for the schema check and to apply the parsed rows.
+    cleanup_bgp_peer_status is left to run_pending_bgp_cleanup (main.py scheduler) instead of a full-table
+    pass per file. Returns True when the file was ingested or its content already was.
+    """
+    with database.writer() as conn:
+        setup_database(database.db_path, conn)
+    try:
+        content_hash = file_content_hash(log_file_path)
+    except OSError:
+        content_hash = None  # parse_log_file reports the read error
+    if content_hash and is_duplicate_content(database.reader(), content_hash):
+        logger.info(f"Skipping '{os.path.basename(log_file_path)}': identical content already ingested.")
+        return True
+    parsed = parse_log_file(log_file_path, log_dir_base, line_observers=line_observers)
+    if parsed is None:
+        return False
+    with database.writer() as conn:
+        apply_parsed_log(conn, parsed)
+        if content_hash:
+            record_content_hash(conn, content_hash, parsed["filename"])
+    _bgp_cleanup_pending.set()
+    return True
+
+def run_pending_bgp_cleanup(db_path=None):
+    """Scheduled job (main.py): one cleanup_bgp_peer_status for every ingest_log_file since the last run."""
+    if not _bgp_cleanup_pending.is_set():
+        return 0
+    _bgp_cleanup_pending.clear()
+    with db_connection.get_database(db_path or mainconfig.DB_PATH).writer() as conn:
+        return cleanup_bgp_peer_status(conn)
+
+def touched_peers(parsed):
+    """(protocol, hostname, instance, neighbor) of every peer with an event or status row in parsed."""
+    peers = set()
+    for sql, rows, _ in parsed["batches"]:
+        positions = PEER_KEY_POSITIONS.get(sql)
+        if positions:
+            protocol, instance, neighbor = positions
+            peers.update((protocol, row[0], row[instance], row[neighbor]) for row in rows)
+    return peers
+
+def apply_parsed_log(conn, parsed):
+    """
+    Write the row batches produced by parse_log_file, in the order they were parsed.
+    Event batches are keyed by the log section they came from; a section whose content
+    hash is already in content_hashes (an earlier copy of the same output) is skipped.
+    The peer_health rows of the peers in parsed are refreshed afterwards (utils/peer_health.py).
+    """
     cursor = conn.cursor()
+    applied_sections = {}  # section hash -> section index written in this call
+    for sql, rows, section_key in parsed["batches"]:
+        if not rows:
+            continue
+        if section_key is not None:
+            section_index, section_hash = section_key
+            if applied_sections.get(section_hash, section_index) != section_index:
+                continue  # repeated verbatim later in the same file
+            if section_hash not in applied_sections:
+                cursor.execute("SELECT 1 FROM content_hashes WHERE hash = ?", (section_hash,))
+                if cursor.fetchone():
+                    logger.debug(f"Skipping already ingested log section {section_hash[:12]} in '{parsed['filename']}'")
+                    applied_sections[section_hash] = None
+                    continue
+                applied_sections[section_hash] = section_index
+                cursor.execute("INSERT INTO content_hashes (hash, kind, filename, first_seen) VALUES (?, 'section', ?, ?)",
+                               (section_hash, parsed["filename"], datetime.now().isoformat()))
+        cursor.executemany(sql, rows)
+    peer_health.refresh_peers(conn, touched_peers(parsed))
+
+def file_content_hash(log_file_path, chunk_size=1024 * 1024):
+    """sha256 of a file's bytes, read in chunks (uncompressed bytes for an archived log)."""
+    digest = hashlib.sha256()
+    with log_archive.open_log(log_file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def is_duplicate_content(conn, content_hash):
+    """True when a file with exactly this content was already ingested."""
+    return conn.execute("SELECT 1 FROM content_hashes WHERE hash = ?", (content_hash,)).fetchone() is not None
+
+def record_content_hash(conn, content_hash, filename):
+    conn.execute("INSERT OR IGNORE INTO content_hashes (hash, kind, filename, first_seen) VALUES (?, 'file', ?, ?)",
+                 (content_hash, filename, datetime.now().isoformat()))
+
+# A device prompt followed by a command starts a new section: "<ENG22-CC-Core>display logbuffer", "NS-LGH-Core1#show log"
+LOG_SECTION_START_REGEX = re.compile(r"^\s*(?:<[^<>\s]+>|[\w.\-()/:]+#)[ \t]*\S")
+
+# HPE comware log events, e.g.
+# %Aug  1 15:01:15:294 2025 ENG22-CC-Core BGP/5/BGP_STATE_CHANGED: BGP.BCCSS: 10.251.0.72  state has changed from ESTABLISHED to IDLE for hold timer expiration caused by peer device.
+# %Jul 10 00:39:55:758 2025 ENG22-KEL-Core OSPF/5/OSPF_NBR_CHG: OSPF 7 Neighbor 10.251.8.113(Vsi-interface877) changed from FULL to DOWN.
+# hpe_bgp_log_regex = re.compile(r"%(\w{3}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2}:\d{3}).*?BGP/5/BGP_STATE_CHANGED(?:_REASON)?:(?: BGP\.([^:]*?):)?\s+([\d\.]+) \s+state has changed from ([\w\/]+) to ([\w\/]+)")
+HPE_BGP_EVENT_REGEX = re.compile(r"%(\w{3}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2}:\d{3}).*?BGP/5/BGP_STATE_CHANGED:(?: BGP\.([^:]*?):)?\s+([\d\.]+) \s+state has changed from ([\w\/]+) to ([\w\/]+)")
+# Updated OSPF regex to handle interface names like Twenty-FiveGigE1/0/2
+HPE_OSPF_EVENT_REGEX = re.compile(
+    r"%(\w{3}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2}:\d{3}).*?OSPF/5/OSPF_NBR_CHG:.*?OSPF\s+(\d+).*?Neighbor\s+([\d\.]+)\(([\w\-\/]+)\)\s+changed from\s+([\w/]+)\s+to\s+([\w/]+)"
+)
+HPE_OSPF_LAST_DOWN_REGEX = re.compile(
+    r"%(\w{3}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2}:\d{3}).*?OSPF/6/OSPF_LAST_NBR_DOWN: OSPF (\d+) Last neighbor down event: Router ID: ([\d\.]+) Local address: ([\d\.]+) Remote address: ([\d\.]+) Reason: ([^\.]+)"
+)
+CISCO_OSPF_EVENT_REGEX = re.compile(r"(\w{3}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2}).*?Ospf.*?: Instance (\d+):.*?NGB ([\d\.]+), interface ([\d\.]+) adjacency (dropped|established).*?(?:state was: (\w+))?")
+HPE_OSPF_REASON_TAG = re.compile(r"OSPF_NBR_CHG_REASON:", re.IGNORECASE)
+
+class LogEventScanner:
+    """
+    Single pass over a session log: fed one line at a time (from parse_routing_info),
+    it splits the log into command sections and collects state-change events.
+    Each line is dispatched on its facility tag with plain substring checks; the
+    event regex only runs on lines that carry the tag.
+    observers (objects with feed(line), e.g. fastapi_mymodule.LogCheckCollector) see the same lines.
+    """
+
+    def __init__(self, observers=()):
+        self.observers = list(observers)
+        self.sections = []        # [(sha256, {event kind: [match groups, ...]}), ...] in file order
+        self.ospf_reasons = []    # HPE_OSPF_REASON_REGEX groupdicts, in file order
+        self.lines_seen = 0
+        self._digest = None
+        self._events = None
+
+    def _start_section(self):
+        self._close_section()
+        self._digest = hashlib.sha256()
+        self._events = {"hpe_bgp": [], "hpe_ospf": [], "hpe_last_down": [], "cisco_ospf": []}
+
+    def _close_section(self):
+        if self._digest is not None:
+            self.sections.append((self._digest.hexdigest(), self._events))
+
+    def feed(self, line):
+        self.lines_seen += 1
+        for observer in self.observers:
+            observer.feed(line)
+        if self._digest is None or (('<' in line or '#' in line) and LOG_SECTION_START_REGEX.match(line)):
+            self._start_section()
+        self._digest.update(line.encode('utf-8', errors='ignore') + b'\n')
+
+        if '%' in line:
+            if 'BGP/5/BGP_STATE_CHANGED:' in line:
+                self._events["hpe_bgp"].extend(m.groups() for m in HPE_BGP_EVENT_REGEX.finditer(line))
+            if 'OSPF/5/OSPF_NBR_CHG:' in line:
+                self._events["hpe_ospf"].extend(m.groups() for m in HPE_OSPF_EVENT_REGEX.finditer(line))
+            if 'OSPF/6/OSPF_LAST_NBR_DOWN:' in line:
+                self._events["hpe_last_down"].extend(m.groups() for m in HPE_OSPF_LAST_DOWN_REGEX.finditer(line))
+            if HPE_OSPF_REASON_TAG.search(line):
+                self.ospf_reasons.extend(m.groupdict() for m in mainconfig.HPE_OSPF_REASON_REGEX.finditer(line))
+        if 'NGB ' in line and 'Ospf' in line:
+            self._events["cisco_ospf"].extend(m.groups() for m in CISCO_OSPF_EVENT_REGEX.finditer(line))
+
+    def finish(self):
+        """Close the last section and return the section list."""
+        self._close_section()
+        self._digest = None
+        return self.sections
+
+class LogLineStream:
+    """
+    Iterable over the lines of a log file from start_offset, read one line at a time so
+    a multi-hundred-MB capture is never held in memory. Each iteration re-reads the file;
+    end_offset is the byte offset reached by the last complete iteration.
+    With complete_lines_only a trailing line without its newline (still being written)
+    is left for the next sync. Lines split the same way as read() + splitlines().
+    Archived logs (utils/log_archive.py) are read through their member index, offsets stay uncompressed.
+    """
+
+    def __init__(self, log_file_path, start_offset=0, complete_lines_only=False):
+        self.log_file_path = log_file_path
+        self.start_offset = start_offset
+        self.complete_lines_only = complete_lines_only
+        self.end_offset = start_offset
+
+    def __iter__(self):
+        offset = self.start_offset
+        with log_archive.open_log(self.log_file_path, 'rb', offset=offset) as f:
+            for raw in f:
+                if self.complete_lines_only and not raw.endswith(b'\n'):
+                    break
+                offset += len(raw)
+                yield from raw.decode('utf-8', errors='ignore').splitlines()
+        self.end_offset = offset
+
+def detect_vendor(lines):
+    """Vendor from the marker lines of a session log; stops early once an HPE banner is seen."""
+    arista = cisco = False
+    for line in lines:
+        if "Hewlett Packard Enterprise" in line:
+            return 'hpe'
+        if not arista and "show logging " in line:
+            arista = True
+        if not cisco and "show log " in line:
+            cisco = True
+    if arista:
+        return 'arista'
+    if cisco:
+        return 'cisco'
+    return None
+
+def parse_log_file(log_file_path, log_dir_base, start_offset=0, hints=None, complete_lines_only=False, line_observers=()):
+    """
+    Parse a single log file into plain row batches without touching the database.
+    Returns a dict with an ordered list of (sql, rows) batches, or None on failure.
+    Safe to run in a worker process (see main(workers=...)).
+    start_offset/hints resume an already processed file: only bytes after start_offset
+    are parsed, and hints (vendor, hostname, host_ip from processed_files) fill in what
+    the appended chunk alone does not reveal.
+    line_observers get each parsed line too, so other per-line consumers share this pass.
+    """
+    hints = hints or {}
     filename_only = os.path.basename(log_file_path)
     relative_log_path = os.path.relpath(log_file_path, log_dir_base).replace('\\', '/')
-    logger.info(f"Processing file: {log_file_path}")
+    logger.info(f"Processing file: {log_file_path}" + (f" from offset {start_offset}" if start_offset else ""))
     hostname, vendor = (None, None)
     vpn_instance = "Global"  # Initialize with a default value
+    batches = []
 
     # Use log file timestamp as last_updated and snapshot_id
     try:
@@ -124,116 +647,79 @@ def process_log_file(conn, log_file_path, file_id, log_dir_base):
         logger.warning(f"Could not parse timestamp from filename '{filename_only}', using current time")
 
     log_year = filename_only.split('_')[0][:4]
+    # 202601 Stream the file instead of read() + splitlines(): one cheap pass for the vendor
+    # markers, then a single pass that feeds both parse_routing_info and the event scanner
+    lines = LogLineStream(log_file_path, start_offset, complete_lines_only)
     try:
-        with open(log_file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-            lines = content.splitlines()  # Split content into lines
+        vendor = detect_vendor(lines) or hints.get("vendor")
     except Exception as e:
         logger.error(f"Failed to read file '{log_file_path}': {e}")
-        return False
+        return None
 
     logger.debug(f"Hostname: {hostname}, Vendor: {vendor}")
 
-    if "Hewlett Packard Enterprise" in content:
-        vendor = 'hpe'
-    elif "show logging " in content:   
-        vendor = 'arista'
-    elif "show log " in content:
-        vendor = 'cisco'
-
     # Call parse_routing_info directly and get the routing_info dictionary
     try:
-        routing_info = parse_routing_info(log_file_path, lines, vendor,None)  # Pass None for json_file to avoid writing
+        scanner = LogEventScanner(line_observers)
+        routing_info = parse_routing_info(log_file_path, lines, vendor,None, scanner)  # Pass None for json_file to avoid writing
+        if not scanner.lines_seen:
+            for line in lines:
+                scanner.feed(line)
+        sections = scanner.finish()
+        end_offset = lines.end_offset
     except Exception as e:
         logger.error(f"Error parse_routing from '{log_file_path}': {e}")
-        return False
+        return None
     if not hostname: hostname = routing_info.get("hostname", None)
     host_ip = routing_info.get("host_ip", None)
+    if not host_ip and hints.get("host_ip"):
+        # Appended chunk without a prompt line: reuse what the earlier parse found
+        hostname, host_ip = hints.get("hostname"), hints.get("host_ip")
     if not host_ip:
         logger.error(f"No host IP found for file '{log_file_path}'")
-        return False
+        return None
 
     # --- Historical Log Parsing ---
-    if vendor == 'hpe':
-        # HPE log regex patterns for BGP and OSPF state changes
-        # Example log line:
-        # BGP
-        # %Aug  1 15:01:15:294 2025 ENG22-CC-Core BGP/5/BGP_STATE_CHANGED: BGP.BCCSS: 10.251.0.72  state has changed from ESTABLISHED to IDLE for hold timer expiration caused by peer device.
-        # OSPF
-        # hpe_bgp_log_regex = re.compile(r"%(\w{3}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2}:\d{3}).*?BGP/5/BGP_STATE_CHANGED(?:_REASON)?:(?: BGP\.([^:]*?):)?\s+([\d\.]+) \s+state has changed from ([\w\/]+) to ([\w\/]+)")
-        hpe_bgp_log_regex = re.compile(r"%(\w{3}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2}:\d{3}).*?BGP/5/BGP_STATE_CHANGED:(?: BGP\.([^:]*?):)?\s+([\d\.]+) \s+state has changed from ([\w\/]+) to ([\w\/]+)")
-        for match in hpe_bgp_log_regex.finditer(content):
-            vpn = match.group(2).strip() if match.group(2) else 'Global'
-            timestamp = parse_timestamp(match.group(1), log_year)
-            cursor.execute('INSERT OR IGNORE INTO bgp_state_changes (hostname, vpn_instance, neighbor_ip, from_state, to_state, timestamp, log_file) VALUES (?, ?, ?, ?, ?, ?, ?)', 
-                (hostname, vpn, match.group(3), match.group(4), match.group(5), timestamp, os.path.basename(log_file_path)))
-            
-        # %Jul 10 00:39:55:758 2025 ENG22-KEL-Core OSPF/5/OSPF_NBR_CHG: OSPF 7 Neighbor 10.251.8.113(Vsi-interface877) changed from FULL to DOWN.
-        # Updated OSPF regex to handle interface names like Twenty-FiveGigE1/0/2
-        hpe_ospf_log_regex = re.compile(
-            r"%(\w{3}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2}:\d{3}).*?OSPF/5/OSPF_NBR_CHG:.*?OSPF\s+(\d+).*?Neighbor\s+([\d\.]+)\(([\w\-\/]+)\)\s+changed from\s+([\w/]+)\s+to\s+([\w/]+)"
-        )        
-        for match in hpe_ospf_log_regex.finditer(content):
-            timestamp = parse_timestamp(match.group(1), log_year)
-            cursor.execute(
-                '''INSERT OR IGNORE INTO ospf_state_changes 
-                (hostname, process, neighbor_address, interface, from_state, to_state, timestamp, log_file) 
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)''', 
-                (hostname, match.group(2), match.group(3), match.group(4), match.group(5), match.group(6), timestamp, filename_only)
-            )
-            logger.debug(f"Inserted OSPF state change: Neighbor {match.group(3)} on {match.group(4)} from {match.group(5)} to {match.group(6)}")
-
-        # Handle OSPF last neighbor down event
-        hpe_ospf_last_down_regex = re.compile(
-            r"%(\w{3}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2}:\d{3}).*?OSPF/6/OSPF_LAST_NBR_DOWN: OSPF (\d+) Last neighbor down event: Router ID: ([\d\.]+) Local address: ([\d\.]+) Remote address: ([\d\.]+) Reason: ([^\.]+)"
-        )
-        # New multi-line regex to capture from 'display ospf peer verbose' output
-        verbose_down_regex = re.compile(
-            r"Last Neighbor Down Event:.*?Router ID:\s+([\d\.]+).*?Local Address:\s+([\d\.]+).*?Remote Address:\s+([\d\.]+).*?Time:\s+(.*?)\n\s+Reason:\s+(.*)",
-            re.DOTALL
-        )
-        for match in hpe_ospf_last_down_regex.finditer(content):
-        # for match in verbose_down_regex.finditer(content):
-            timestamp = parse_timestamp(match.group(1), log_year)
-            process = match.group(2)
-            router_id = match.group(3)
-            local_address = match.group(4)
-            remote_address = match.group(5)
-            reason = match.group(6).strip()
-            # Update ospf_peer_status with last down event details
-            cursor.execute(
-                '''UPDATE ospf_peer_status 
-                SET last_down_time = ?, last_routerid = ?, last_local = ?, last_remote = ?, last_reason = ?
-                WHERE hostname = ? AND process = ? AND neighbor_address = ?''',
-                (timestamp, router_id, local_address, remote_address, reason, hostname, process, remote_address)
-            )
-            logger.debug(f"Updated OSPF peer status with last down event: Neighbor {remote_address}, Process {process}, Reason: {reason}")
-            
-    elif vendor in ('cisco', 'arista'):
-        cisco_ospf_log_regex = re.compile(r"(\w{3}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2}).*?Ospf.*?: Instance (\d+):.*?NGB ([\d\.]+), interface ([\d\.]+) adjacency (dropped|established).*?(?:state was: (\w+))?")  
-        for match in cisco_ospf_log_regex.finditer(content):
-            from_state, to_state = (match.group(6), 'DOWN') if match.group(5) == 'dropped' else ('DOWN', 'FULL')
-            cursor.execute('INSERT INTO ospf_state_changes VALUES (NULL,?,?,?,?,?,?,?,?)', (hostname, match.group(2), match.group(3), match.group(4), from_state, to_state, parse_timestamp((match.group(1)),log_year), os.path.basename(log_file_path)))    
+    # 202601 Events are collected per command section by LogEventScanner so the writer can skip
+    # sections it has already stored
+    for section_index, (section_hash, events) in enumerate(sections):
+        section_key = (section_index, section_hash)
+        if vendor == 'hpe':
+            bgp_rows = []
+            for ts, vpn, neighbor_ip, from_state, to_state in events.pop("hpe_bgp"):
+                vpn = vpn.strip() if vpn else 'Global'
+                timestamp = parse_timestamp(ts, log_year)
+                bgp_rows.append((hostname, vpn, neighbor_ip, from_state, to_state, timestamp, filename_only, timestamp_epoch(timestamp)))
+            batches.append((HPE_BGP_EVENT_SQL, bgp_rows, section_key))
+
+            ospf_rows = []
+            for ts, process, neighbor, interface, from_state, to_state in events.pop("hpe_ospf"):
+                timestamp = parse_timestamp(ts, log_year)
+                ospf_rows.append((hostname, process, neighbor, interface, from_state, to_state, timestamp, filename_only, timestamp_epoch(timestamp)))
+                logger.debug(f"Parsed OSPF state change: Neighbor {neighbor} on {interface} from {from_state} to {to_state}")
+            batches.append((HPE_OSPF_EVENT_SQL, ospf_rows, section_key))
+
+            # Handle OSPF last neighbor down event
+            last_down_rows = []
+            for ts, process, router_id, local_address, remote_address, reason in events.pop("hpe_last_down"):
+                timestamp = parse_timestamp(ts, log_year)
+                reason = reason.strip()
+                # Update ospf_peer_status with last down event details
+                last_down_rows.append((timestamp, router_id, local_address, remote_address, reason, hostname, process, remote_address))
+                logger.debug(f"Parsed OSPF last down event: Neighbor {remote_address}, Process {process}, Reason: {reason}")
+            batches.append((OSPF_LAST_DOWN_SQL, last_down_rows, section_key))
+
+        elif vendor in ('cisco', 'arista'):
+            ospf_rows = []
+            for ts, process, neighbor, interface, action, was_state in events.pop("cisco_ospf"):
+                from_state, to_state = (was_state, 'DOWN') if action == 'dropped' else ('DOWN', 'FULL')
+                timestamp = parse_timestamp(ts, log_year)
+                ospf_rows.append((hostname, process, neighbor, interface, from_state, to_state, timestamp, filename_only, timestamp_epoch(timestamp)))
+            batches.append((CISCO_OSPF_EVENT_SQL, ospf_rows, section_key))
 
     # Process BGP peers
     if isinstance(routing_info.get("BGP"), list):
-        data_rows = "hostname, host_ip, vpn_instance, local_router_id, local_as_number, neighbor_ip, remote_router_id, remote_as, up_down_time, state, last_updated_ts, last_snapshot_id, source_log_file"
-
-        sql_query = f'''
-            INSERT INTO bgp_peer_status ({data_rows}) 
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(host_ip, vpn_instance, neighbor_ip) 
-            DO UPDATE SET
-                state = excluded.state,
-                up_down_time = excluded.up_down_time,
-                remote_router_id = excluded.remote_router_id,
-                remote_as = excluded.remote_as,
-                last_updated_ts = excluded.last_updated_ts,
-                last_snapshot_id = excluded.last_snapshot_id,
-                source_log_file = excluded.source_log_file
-            WHERE excluded.last_updated_ts > bgp_peer_status.last_updated_ts
-        '''
-
+        bgp_peer_rows = []
         for bgp_instance in routing_info["BGP"]:
             vpn_instance = bgp_instance.get("VPN_instance", "Global")
             local_router_id = bgp_instance.get("local_router_id")
@@ -249,16 +735,16 @@ def process_log_file(conn, log_file_path, file_id, log_dir_base):
                     peer.get("peer_status"), 
                     last_updated_ts, 
                     last_snapshot_id, 
-                    relative_log_path
+                    relative_log_path,
+                    uptime_codec.to_seconds(peer.get("peer_uptime"))
                 )
-                cursor.execute(sql_query, values_to_insert)
+                bgp_peer_rows.append(values_to_insert)
+        batches.append((BGP_PEER_UPSERT_SQL, bgp_peer_rows, None))
 
     # Process OSPF peers with 20 rows
     if isinstance(routing_info.get("OSPF"), list):
         # 202512 Update VRF from logs
-        hpe_ospf_reason_re = mainconfig.HPE_OSPF_REASON_REGEX
-        for match in hpe_ospf_reason_re.finditer(content):
-            g = match.groupdict()
+        for g in scanner.ospf_reasons:
             # print(f"Processing HPE OSPF reason log for host IP: {host_ip} process {g['process']} vpn {g.get('vpn_name')}")
             
             # Find the matching OSPF process entry in the routing_info list
@@ -268,63 +754,7 @@ def process_log_file(conn, log_file_path, file_id, log_dir_base):
                     ospf_process['vrf'] = g.get('vpn_name')
                     # print(f"Updated {host_ip} VRF for process {g['process']} to {g.get('vpn_name')}")          
 
-        data_rows = "hostname, host_ip, process, process_routerid, vrf, area, interface, neighbor_routerid, neighbor_address, state, mode,  verbose_uptime, state_count, last_down_time, last_routerid, last_local, last_remote, last_reason, last_updated_ts, last_snapshot_id, source_log_file"
-        placeholders = ', '.join(['?'] * len(data_rows.split(', ')))
-
-        # Define the SQL for INSERT OR UPDATE (Upsert)
-        # This will update current status fields always, but conditionally update event fields.
-        sql_upsert_query = f'''
-            INSERT INTO ospf_peer_status ({data_rows}) 
-            VALUES ({placeholders})
-            ON CONFLICT(host_ip, process, neighbor_address) 
-            DO UPDATE SET
-                -- 1. Snapshot Fields (Always Update)
-                
-                process_routerid = excluded.process_routerid,
-                area = excluded.area,
-                interface = excluded.interface,
-                neighbor_routerid = excluded.neighbor_routerid,
-                state = excluded.state,
-                mode = excluded.mode,
-                verbose_uptime = excluded.verbose_uptime,
-                state_count = excluded.state_count,
-                last_updated_ts = excluded.last_updated_ts,
-                last_snapshot_id = excluded.last_snapshot_id,
-                source_log_file = excluded.source_log_file,
-
-                -- 2. Event/Historical Fields (Update ONLY IF incoming data is NOT NULL)
-                hostname = CASE 
-                    WHEN excluded.hostname IS NOT NULL AND excluded.hostname != '' 
-                    THEN excluded.hostname 
-                    ELSE hostname 
-                END,                
-                vrf = CASE 
-                    WHEN excluded.vrf IS NOT NULL AND excluded.vrf != '' 
-                    THEN excluded.vrf  -- Use the NEW value
-                    ELSE vrf           -- Keep the OLD value
-                END,
-                last_down_time = CASE 
-                    WHEN excluded.last_down_time IS NOT NULL THEN excluded.last_down_time 
-                    ELSE last_down_time 
-                END,
-                last_routerid = CASE 
-                    WHEN excluded.last_routerid IS NOT NULL THEN excluded.last_routerid 
-                    ELSE last_routerid 
-                END,
-                last_local = CASE 
-                    WHEN excluded.last_local IS NOT NULL THEN excluded.last_local 
-                    ELSE last_local 
-                END,
-                last_remote = CASE 
-                    WHEN excluded.last_remote IS NOT NULL THEN excluded.last_remote 
-                    ELSE last_remote 
-                END,
-                last_reason = CASE 
-                    WHEN excluded.last_reason IS NOT NULL THEN excluded.last_reason 
-                    ELSE last_reason 
-                END
-        '''
-
+        ospf_peer_rows = []
         for ospf_process in routing_info["OSPF"]:
             process = ospf_process.get("process")
             process_routerid = ospf_process.get("process_routerid")
@@ -344,24 +774,22 @@ def process_log_file(conn, log_file_path, file_id, log_dir_base):
                 event_data.get("last_local") if event_data else None,
                 event_data.get("last_remote") if event_data else None,
                 event_data.get("last_reason") if event_data else None,
-                last_updated_ts, last_snapshot_id, relative_log_path)
+                last_updated_ts, last_snapshot_id, relative_log_path, uptime_codec.to_seconds(neighbor.get("uptime")))
 
-                # Execution with the new SQL query
-                cursor.execute(sql_upsert_query, values_to_insert)
-                logger.debug(f"Upserted OSPF peer: {neighbor.get('neighbor_routerid')} on interface {neighbor.get('Interface')} with last_down_time: {event_data.get('last_time') if event_data else 'None'}")
-    
-    #  Call the cleanup function after processing each file
-    cleanup_bgp_peer_status(conn)   
-    conn.commit()
-    return True
+                ospf_peer_rows.append(values_to_insert)
+                logger.debug(f"Parsed OSPF peer: {neighbor.get('neighbor_routerid')} on interface {neighbor.get('Interface')} with last_down_time: {event_data.get('last_time') if event_data else 'None'}")
+        batches.append((OSPF_PEER_UPSERT_SQL, ospf_peer_rows, None))
 
-def parse_routing_info(temp_file_path, lines, vendor, json_file=None):
+    return {"filename": filename_only, "hostname": hostname, "host_ip": host_ip, "vendor": vendor,
+            "start_offset": start_offset, "end_offset": end_offset, "batches": batches}
+
+def parse_routing_info(temp_file_path, lines, vendor, json_file=None, scanner=None):
+    """Parse peer tables from a session log. Each raw line is also fed to scanner (a LogEventScanner) if given."""
     # routing_info = {"hostname": None, "vendor": {vendor}, "host_ip": None, "BGP": [], "OSPF": []}
     routing_info = {"hostname": None, "vendor": vendor, "host_ip": None, "BGP": [], "OSPF": []}
     ip_regex = r'(?:\d{1,3}\.){3}\d{1,3}'
-    hostname_regex = r"(<|)(.*?)(>|#)"
     
-    if not os.path.isfile(temp_file_path):
+    if not log_archive.log_exists(temp_file_path):
         logger.error(f"No file exists: {temp_file_path}")
         return routing_info
 
@@ -373,378 +801,9 @@ def parse_routing_info(temp_file_path, lines, vendor, json_file=None):
         logger.error(f"Host IP not found in filename: {file_name}")
         return routing_info
 
-    log_year = file_name.split('_')[0][:4]
-    # json_file = os.path.join(log_directory, host_ip+"_peer.json") 
-    current_hostname = None
-    in_bgp_section = False
-    in_ospf_section = False
-    current_vpn_instance = "Global"
-    cisco_vpn_name = "Global"
-    current_ospf_process = "0"
-    current_ospf_area = None
-    current_interface = None
-    current_neighbor = None
-    local_as = None
-    last_down_event = {}
-
+    # 202601 Line rules per vendor live in utils/vendor_parsers.py (compiled dispatch table instead of an if-chain)
     logger.debug(f"Parsing file: {temp_file_path} for vendor: {vendor}")
-    for idx, line in enumerate(lines):
-        line = line.strip()
-        if not line or "---- More ----" in line:
-            continue
-
-        # Extract hostname
-        if current_hostname is None:
-            hostname_match = re.match(hostname_regex, line)
-            if hostname_match:
-                current_hostname = hostname_match.group(2)
-                routing_info["hostname"] = current_hostname
-                routing_info["host_ip"] = host_ip
-                logger.debug(f"Extracted hostname: {current_hostname}")
-
-        # bgp or ospf section
-        if "BGP is not configured." in line:
-            routing_info["BGP"] = "BGP is not configured."
-            in_bgp_section = False
-            logger.debug("BGP not configured")
-            continue
-        if "OSPF is not configured." in line:
-            routing_info["OSPF"] = "OSPF is not configured."
-            in_ospf_section = False
-            logger.debug("OSPF not configured")
-            continue
-
-        if vendor == 'hpe':
-
-            if line.startswith("BGP local router ID:"):
-                router_id = line.split(":")[1].strip()
-                in_bgp_section = True
-                logger.debug(f"BGP router ID: {router_id}")
-                continue
-
-            if in_bgp_section:
-                if line.startswith("Local AS number:"):
-                    local_as_number = line.split(":")[1].strip()
-                    logger.debug(f"BGP local AS: {local_as_number}")
-                    continue
-                if line.startswith("VPN instance:"):
-                    current_vpn_instance = line.split(":")[1].strip()
-                    logger.debug(f"BGP VPN instance: {current_vpn_instance}")
-                elif line.startswith("Total number of peers:"):
-                    peer_total, peer_est = map(int, re.findall(r"\d+", line))
-                    bgp_peer = {
-                        "VPN_instance": current_vpn_instance,
-                        "local_router_id": router_id,
-                        "local_as_number": local_as_number,
-                        "Total number of peers": peer_total,
-                        "Peers in established state": peer_est,
-                        "Peer": []
-                    }
-                    routing_info["BGP"].append(bgp_peer)
-                    logger.debug(f"BGP peer totals: {peer_total}, established: {peer_est}")
-                elif re.match(r"\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}", line):
-                    parts = line.split()
-                    if len(parts) == 8:
-                        peer_info = {
-                            "neighbor_ip": parts[0],
-                            "remote_as": parts[1],
-                            "peer_uptime": parts[-2],
-                            "peer_status": parts[-1]
-                        }
-                        routing_info["BGP"][-1]["Peer"].append(peer_info)
-                        logger.debug(f"BGP peer added: {parts[0]}")
-
-            # Handle OSPF section
-
-            if "display ospf peer verbose" in line:
-                in_bgp_section = False
-                in_ospf_section = True
-
-            if in_ospf_section:
-                process_match = re.search(r"Process (\d+) with Router ID ([\d\.]+)", line)
-                if process_match:
-                    current_process = process_match.group(1)
-                    process_routerid = process_match.group(2)
-                    current_ospf_process = {
-                        "process": current_process,
-                        "process_routerid": process_routerid,
-                        "neighbors": [],
-                        "lastevents": {}  # Changed to a dictionary for peer-specific events
-                    }
-                    routing_info["OSPF"].append(current_ospf_process)
-                    # current_neighbor = None
-                    logger.debug(f"OSPF Process {current_process}, Router ID: {process_routerid}")
-
-                elif line.startswith("Area ") and "interface" in line:
-                    area_match = re.search(r"Area\s+([\d\.]+)\s+interface\s+([\d\.]+)\(([\w\-\/]+)\)", line)
-                    # if area_match and current_ospf_process:
-                    current_area = area_match.group(1)
-                    interface_ip = area_match.group(2)
-                    interface_name = area_match.group(3)
-                    current_neighbor = {
-                        "Area": current_area,
-                        "Interface": f"{interface_ip}({interface_name})",
-                        "neighbor_routerid": None,
-                        "neighbor_address": None,
-                        "uptime": None,
-                        "state": None,
-                        "mode": None,
-                        "state_count": None
-                    }
-                    # current_ospf_process["neighbors"].append(current_neighbor)
-                    logger.debug(f"Verbose OSPF Area {current_area}, Interface {current_neighbor['Interface']}")
-
-                elif line.startswith("Router ID:") and "Address:" in line:
-                    routerid_match = re.search(r"Router ID:\s*([\d\.]+)\s+Address:\s*([\d\.]+)", line)
-                    # if routerid_match and current_ospf_process and current_neighbor:
-                    neighbor_routerid = routerid_match.group(1)
-                    neighbor_address = routerid_match.group(2)
-                    if current_neighbor is None:
-                        # Create neighbor if doesn't exist
-                        current_neighbor = {
-                            "neighbor_routerid": neighbor_routerid,
-                            "neighbor_address": neighbor_address,
-                            # ... other fields ...
-                        }
-                    else:                    
-                        current_neighbor["neighbor_routerid"] = neighbor_routerid
-                        current_neighbor["neighbor_address"] = neighbor_address
-                    # FIX: Append neighbor immediately after getting router ID
-                    if current_ospf_process and current_neighbor:
-                        current_ospf_process["neighbors"].append(current_neighbor.copy())
-                    
-                    logger.debug(f"Verbose OSPF neighbor: {neighbor_routerid}, Address: {neighbor_address}")
-
-                # Handle verbose OSPF output
-                # if current_neighbor:
-                elif line.startswith("State:") and "Mode:" in line:
-                    pairs = re.findall(r"(\w+):\s+(.*?)(?=\s+\w+:|$)", line)
-                    data = {key.strip(): value.strip() for key, value in pairs}
-                    current_neighbor["state"] = data.get("State")
-                    current_neighbor["mode"] = data.get("Mode")
-                elif line.startswith("Neighbor is up for"):
-                    uptime_match = re.search(r"Neighbor is up for\s+([0-9:]+)", line)
-                    if uptime_match and current_neighbor:
-                        current_neighbor["uptime"] = uptime_match.group(1)
-                        logger.debug(f"Set uptime for {current_neighbor['neighbor_routerid']}: {current_neighbor['uptime']}")
-                        
-                        # FIX: Ensure neighbor is added even if state change count is missing
-                        if current_ospf_process and current_neighbor and current_neighbor not in current_ospf_process["neighbors"]:
-                            current_ospf_process["neighbors"].append(current_neighbor.copy())
-                elif line.startswith("Neighbor state change count:"):
-                    state_change_match = re.search(r"Neighbor state change count:\s+(\d+)", line)
-                    if state_change_match and current_neighbor:
-                        current_neighbor["state_count"] = state_change_match.group(1)
-                        logger.debug(f"Set state change count for {current_neighbor['neighbor_routerid']}: {current_neighbor['state_count']}")
-                        
-                        # FIX: Ensure neighbor is added
-                        if current_ospf_process and current_neighbor and current_neighbor not in current_ospf_process["neighbors"]:
-                            current_ospf_process["neighbors"].append(current_neighbor.copy())
-                    logger.debug(f"Set state change count for {current_neighbor['neighbor_routerid']}: {current_neighbor['state_count']}")
-
-                if line.startswith("Last Neighbor Down Event:"):
-                    last_down_event.clear()
-                    j = idx + 1
-                    while j < len(lines):
-                        next_line = lines[j].strip()
-                        logger.debug(f"Checking line for last down event: {next_line}")
-                        if "---- More ----" in next_line or not next_line:
-                            break
-
-                        # Use re.IGNORECASE and allow for flexible whitespace (\s+)
-                        router_id_match = re.search(r"Router\s*ID:\s*([\d\.]+)", next_line, re.I)
-                        local_match = re.search(r"Local\s*Address:\s*([\d\.]+)", next_line, re.I)
-                        remote_match = re.search(r"(?:Remote|Neighbor)\s*Address:\s*([\d\.]+)", next_line, re.I)
-                        time_match = re.search(r"Time:\s*(.*)", next_line, re.I)
-                        reason_match = re.search(r"Reason:\s*(.*)", next_line, re.I)
-
-                        # Capture the values safely
-                        last_down_event["router_id"] = router_id_match.group(1) if router_id_match else None
-                        last_down_event["last_local"] = local_match.group(1) if local_match else None
-                        last_down_event["last_remote"] = remote_match.group(1) if remote_match else None
-                        last_down_event["last_time"] = time_match.group(1).strip() if time_match else None
-                        last_down_event["last_reason"] = reason_match.group(1).strip() if reason_match else None
-
-                        # if next_line.startswith("Router ID:"):
-                        #     last_down_event["router_id"] = re.search(r"Router ID:\s*([\d\.]+)", next_line, re.I).group(1)
-                        # elif next_line.startswith("Local Address:"):
-                        #     last_down_event["last_local"] = re.search(r"Local Address:\s*([\d\.]+)", next_line, re.I).group(1)
-                        # elif next_line.startswith("Remote Address:"):
-                        #     last_down_event["last_remote"] = re.search(r"Remote Address:\s*([\d\.]+)", next_line, re.I).group(1)
-                        # elif next_line.startswith("Time:"):
-                        #     last_down_event["last_time"] = next_line.split("Time:")[1].strip()
-                        # elif next_line.startswith("Reason:"):
-                        #     last_down_event["last_reason"] = next_line.split("Reason:")[1].strip()
-                        j += 1
-
-                    if last_down_event.get("last_remote"):
-                        current_ospf_process["lastevents"][last_down_event["last_remote"]] = last_down_event.copy()
-                        logger.debug(f"Set last down event for remote {last_down_event['last_remote']} in process {current_process}: {last_down_event}")
-                    else:
-                        logger.info(f"No valid last_remote found for last down event in process {current_process} : {temp_file_path} {line}")
-
-        if vendor in ('cisco','arista'):
-        # if vendor == 'cisco':
-            # logger.error(temp_file_path,vendor)
-
-            if "show ip bgp all" in line or "show ip bgp neighbors" in line:
-                in_bgp_section = True
-                in_ospf_section = False
-                continue
-            if "show ip ospf neighbor detail" in line:
-                in_bgp_section = False
-                in_ospf_section = True
-                continue
-
-            if in_bgp_section:
-                # Detect new address family
-                address_family_match = re.match(r"For address family: (\w+ \w+)", line)
-                if address_family_match:
-                    current_address_family = address_family_match.group(1)
-                    logger.debug(temp_file_path,routing_info["BGP"])
-                    continue
-                else:
-                    current_address_family = None
-
-                # Detect new neighbor block
-                # if line.startswith("BGP neighbor is"):
-                #     if "IPv4" in current_address_family :
-                    # BGP neighbor is 10.26.101.1,  remote AS 65500, internal link
-                bgp_ipv4_match = re.match(r"BGP neighbor is (\d+\.\d+\.\d+\.\d+), \s+remote AS (\d+), (\w+) link", line)
-                if bgp_ipv4_match:
-                    neighbor_ip = bgp_ipv4_match.group(1)
-                    vpn_instance =  "Global"
-                    remote_as = bgp_ipv4_match.group(2)
-                    # elif "VPNv4" in current_address_family:
-                    # BGP neighbor is 10.73.119.241,  vrf VCHA-TC2,  remote AS 4255000501,  local AS 4255000101, external link
-                bgp_vpnv4_match = re.match(
-                    r"BGP neighbor is "
-                    r"(\d+\.\d+\.\d+\.\d+),"  # Group 1: Neighbor IP
-                    r"\s+(?:vrf ([\w-]+),\s+)?"  # Group 2: Optional VRF name
-                    r"remote AS (\d+),"  # Group 3: Remote AS
-                    r"\s+(?:local AS (\d+),\s+)?"  # Group 4: Optional Local AS
-                    r"(\w+) link",  # Group 5: Link type
-                    line
-                )
-                if bgp_vpnv4_match:
-                    neighbor_ip = bgp_vpnv4_match.group(1)
-                    vpn_instance =  bgp_vpnv4_match.group(2)
-                    remote_as = bgp_vpnv4_match.group(3)    
-                    local_as = bgp_vpnv4_match.group(4)                   
-
-                if bgp_vpnv4_match or bgp_ipv4_match:
-                    bgp_peer = {
-                        "address_family": current_address_family, 
-                        "VPN_instance": vpn_instance, 
-                        "local_as_number": local_as, 
-                        "Peer": []
-                        }
-                    routing_info["BGP"].append(bgp_peer)
-                    logger.debug(temp_file_path,routing_info,neighbor_ip)
-                    continue
-
-                if line.startswith("BGP version"):
-                # elif line.startswith("BGP version") and bgp_peer:
-                    #   BGP version 4, remote router ID 10.26.101.1
-                    remote_router_id_match = re.search(r"remote router ID (\d+\.\d+\.\d+\.\d+)", line)
-                    remote_router_id = remote_router_id_match.group(1)
-                    logger.debug(temp_file_path, routing_info, remote_router_id)
-
-                # Extract state and uptime
-                elif line.startswith("BGP state"):
-                    state_match = re.search(r"BGP state (?:is|=) (\w+), (up|down) for (.*)",  line)
-                    current_neighbor = {
-                        "neighbor_ip": neighbor_ip, 
-                        "remote_router_id": remote_router_id, 
-                        "remote_as": remote_as, 
-                        "peer_uptime": state_match.group(3), 
-                        "peer_status": state_match.group(1)
-                        }
-                    routing_info["BGP"][-1]["Peer"].append(current_neighbor)
-                    logger.debug(temp_file_path,routing_info["BGP"])                        
-
-            # Handle OSPF section (unchanged, included for context)
-
-            if in_ospf_section:             
-                # cisco:    Neighbor 10.253.31.246, interface address 10.8.6.238
-                if vendor == "cisco":                
-                    neighbor_match = re.match(r"Neighbor (\d+\.\d+\.\d+\.\d+), interface address (\d+\.\d+\.\d+\.\d+)", line)
-                    if neighbor_match:
-                        current_neighbor = {
-                            "neighbor_address": neighbor_match.group(1), 
-                            "Interface_address": neighbor_match.group(2), 
-                            "Interface": None, 
-                            "Area": None, 
-                            "neighbor_routerid": None, 
-                            "uptime": None, 
-                            "state": None, 
-                            "state_count": None
-                            }
-                    elif line.startswith("In the area") and current_neighbor:
-                        #    In the area 0 via interface Vlan4042
-                        area_match = re.search(r"In the area (\d+) via interface (\S+)", line)
-                        if area_match:
-                            current_neighbor["Area"] = area_match.group(1)
-                            current_neighbor["Interface"] = f"{area_match.group(2)}"
-                    elif "State is" in line and current_neighbor: 
-                        #    Neighbor priority is 0, State is FULL, 6 state changes
-                        state_match = re.search(r"State is (\w+), (\d+) state changes", line)
-                        current_neighbor["state"] = state_match.group(1)
-                        current_neighbor["state_count"] = state_match.group(2)                    
-                    elif line.startswith("Neighbor is up") :    
-                        #    Neighbor is up for 27w5d   
-                        uptime_match = re.search(r"Neighbor is up for (\d+\w+\d*\w*)", line)
-                        current_neighbor["uptime"] = uptime_match.group(1)
-                        if current_neighbor.get("Area"):
-                            current_ospf_process = {"process": 0, "process_routerid": None, "neighbors": [], "lastevents": {}}
-                            routing_info["OSPF"].append(current_ospf_process)                                   
-                            current_ospf_process["neighbors"].append(current_neighbor)
-                            current_neighbor = None
-                    elif line.strip() == "":
-                        current_neighbor = None
-
-                if vendor == 'arista':
-                    # arista:   Neighbor 10.26.101.73, instance 200, VRF default, interface address 10.26.254.162
-                    arista_neighbor_match = re.search(r"Neighbor (\d+\.\d+\.\d+\.\d+), instance (\d+), VRF (\S+), interface address (\d+\.\d+\.\d+\.\d+)", line)
-                    if arista_neighbor_match:
-                        arista_current_ospf_process = {
-                            "process": arista_neighbor_match.group(2), 
-                            "process_routerid": None, 
-                            "vrf":arista_neighbor_match.group(3), 
-                            "neighbors": [], 
-                            "lastevents": {}
-                            }
-                        arista_current_neighbor = {
-                            "neighbor_address": arista_neighbor_match.group(1), 
-                            "Interface_address": arista_neighbor_match.group(4), 
-                            "Interface": None, 
-                            "Area": None, 
-                            "neighbor_routerid": None, 
-                            "uptime": None, 
-                            "state": None, 
-                            "state_count": None
-                            }
-                    elif line.startswith("In area") and arista_current_neighbor:
-                        #   In area 0.0.0.1 interface Ethernet4/8
-                        area_match = re.search(r"In area (\d+\.\d+\.\d+\.\d+) interface (\S+)", line)
-                        arista_current_neighbor["Area"] = area_match.group(1)
-                        arista_current_neighbor["Interface"] = f"{area_match.group(2)}"
-                    elif "State is" in line and arista_current_neighbor: 
-                        #  Neighbor priority is 1, State is FULL, 6 state changes
-                        state_match = re.search(r"State is (\w+), (\d+) state changes", line)
-                        arista_current_neighbor["state"] = state_match.group(1)
-                        arista_current_neighbor["state_count"] = state_match.group(2)                    
-                    elif line.startswith("Current state") :    
-                        #   Current state was established 142d21h ago
-                        uptime_match = re.search(r"Current state was established (.*?) ", line)
-                        arista_current_neighbor["uptime"] = uptime_match.group(1)
-                        # if arista_current_neighbor.get("uptime"):
-                        routing_info["OSPF"].append(arista_current_ospf_process)                          
-                        arista_current_ospf_process["neighbors"].append(arista_current_neighbor)
-                        # arista_current_neighbor = None
-                        logger.debug(temp_file_path,vendor,routing_info["OSPF"])
-                    elif line.strip() == "":
-                        arista_current_neighbor = None                        
+    vendor_parsers.get_vendor_parser(vendor).parse(lines, routing_info, host_ip, temp_file_path, scanner)
 
     if json_file and isinstance(json_file, (str, os.PathLike)):
         try:
@@ -756,118 +815,280 @@ def parse_routing_info(temp_file_path, lines, vendor, json_file=None):
     logger.debug(f"Parsed routing info: {len(routing_info['OSPF'])} OSPF processes")
     return routing_info
 
-def parse_uptime_to_seconds(uptime_str):
-    """Convert uptime string (e.g., '536:53:45') to seconds for sorting."""
-    if not uptime_str or not isinstance(uptime_str, str):
-        return 0
+def _parse_log_file_worker(job, log_dir_base):
+    """Process-pool entry point: never raise, a failed file is reported as None."""
     try:
-        days, hours, minutes = map(int, uptime_str.split(':'))
-        return days * 86400 + hours * 3600 + minutes * 60
-    except (ValueError, AttributeError):
-        logger.warning(f"Invalid uptime format '{uptime_str}', defaulting to 0 seconds")
-        return 0
-
-def main(log_file_path=None):
-    """Main entry point: Process all logs in directory (default) or a single file (if provided)."""
+        return parse_log_file(job["path"], log_dir_base, job["start_offset"], job["hints"], complete_lines_only=True)
+    except Exception as e:
+        logger.error(f"ERROR parsing file {os.path.basename(job['path'])}: {e}")
+        return None
+
+def _apply_ingest_job(connection, job, parsed):
+    """Write one parsed file (or appended chunk) and its processed_files row. Does not commit."""
+    if job["replace"]:
+        # The file was truncated / re-collected: its earlier events are superseded
+        stale_peers = peer_health.host_peers(connection, parsed["hostname"])
+        connection.execute("DELETE FROM bgp_state_changes WHERE log_file = ?", (parsed["filename"],))
+        connection.execute("DELETE FROM ospf_state_changes WHERE log_file = ?", (parsed["filename"],))
+        # and so are its section / whole-file hashes: left in place, apply_parsed_log would skip every unchanged
+        # section and the events just deleted would never come back
+        connection.execute("DELETE FROM content_hashes WHERE filename = ?", (parsed["filename"],))
+    apply_parsed_log(connection, parsed)
+    if job["replace"]:
+        peer_health.refresh_peers(connection, stale_peers - touched_peers(parsed))
+    if job["content_hash"]:
+        record_content_hash(connection, job["content_hash"], parsed["filename"])
+    _record_processed_file(connection.cursor(), parsed["filename"], log_archive.stat_log(job["path"]), parsed["end_offset"], parsed)
+
+def _iter_processed_files(database, jobs, log_directory, workers):
+    """
+    Yield (job, parsed) for each job in order, once it is written to the database.
+    parsed is None when the file failed. With workers > 1 only the parsing runs in
+    child processes; the single writer applies parsed files in job order.
+    202601 Files are parsed ahead in batches of INGEST_COMMIT_FILES, then the batch is written in as few
+    transactions of the shared writer (database.writer()) as INGEST_WRITE_HOLD_SECONDS allows, so the
+    write lock is held for the inserts only, never while a file is parsed. Each file gets its own
+    SAVEPOINT so a failing file is rolled back without losing the rest of its transaction.
+    """
+    if workers <= 1:
+        results = (_parse_log_file_worker(job, log_directory) for job in jobs)
+        executor = None
+    else:
+        logger.info(f"Parsing {len(jobs)} files with {workers} worker processes.")
+        # spawn, not fork: ingestion runs on a thread of the multi-threaded app process (utils/ingest_jobs.py),
+        # and a forked child can inherit locks (logging, sqlite) held by other threads
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        chunksize = max(1, len(jobs) // (workers * 4))
+        results = executor.map(_parse_log_file_worker, jobs, [log_directory] * len(jobs), chunksize=chunksize)
+    try:
+        batch = []
+        for job, parsed in zip(jobs, results):
+            batch.append((job, parsed))
+            if len(batch) >= mainconfig.INGEST_COMMIT_FILES:
+                yield from _apply_ingest_batch(database, batch)
+                batch = []
+        yield from _apply_ingest_batch(database, batch)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+def _apply_ingest_batch(database, batch):
+    """
+    Write parsed files, several per transaction of the shared writer; returns [(job, parsed or None)].
+    A write step ends after INGEST_WRITE_HOLD_SECONDS so other writers of the process are not held up
+    by a long batch; small files still share one commit.
+    """
+    done, pending = [], list(batch)
+    while pending:
+        if pending[0][1] is None:
+            done.append(pending.pop(0))
+            continue
+        with database.writer() as connection:
+            held_since = time.monotonic()
+            if not connection.in_transaction:
+                connection.execute("BEGIN")  # else releasing the first SAVEPOINT would commit it
+            while pending and time.monotonic() - held_since < mainconfig.INGEST_WRITE_HOLD_SECONDS:
+                job, parsed = pending.pop(0)
+                if parsed is not None:
+                    connection.execute("SAVEPOINT ingest_file")
+                    try:
+                        _apply_ingest_job(connection, job, parsed)
+                        connection.execute("RELEASE SAVEPOINT ingest_file")
+                    except Exception as e:
+                        logger.error(f"ERROR processing file {os.path.basename(job['path'])}: {e}")
+                        connection.execute("ROLLBACK TO SAVEPOINT ingest_file")
+                        connection.execute("RELEASE SAVEPOINT ingest_file")
+                        parsed = None
+                done.append((job, parsed))
+    return done
+
+def _record_processed_file(cursor, filename, stat_result, offset, parsed=None, previous=None):
+    """Upsert the processed_files tracking row for filename."""
+    source = parsed or previous or {}
+    cursor.execute('''
+        INSERT INTO processed_files (filename, size, mtime, offset, vendor, hostname, host_ip)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(filename) DO UPDATE SET
+            size = excluded.size, mtime = excluded.mtime, offset = excluded.offset,
+            vendor = COALESCE(excluded.vendor, vendor),
+            hostname = COALESCE(excluded.hostname, hostname),
+            host_ip = COALESCE(excluded.host_ip, host_ip)
+    ''', (filename, stat_result.st_size, stat_result.st_mtime, offset,
+          source.get("vendor"), source.get("hostname"), source.get("host_ip")))
+
+def _ingest_job(filepath, start_offset=0, hints=None, replace=False, content_hash=None):
+    """One unit of ingestion work; plain dict so it pickles cheaply to worker processes."""
+    return {"path": filepath, "start_offset": start_offset, "hints": hints, "replace": replace, "content_hash": content_hash}
+
+def _plan_ingest_job(conn, filepath, record, seen_hashes, bookkeeping):
+    """
+    Decide how to ingest filepath given its processed_files record (dict or None).
+    Returns an ingest job, or None when there is nothing new to parse. conn is only read;
+    bookkeeping-only changes are appended to bookkeeping as _record_processed_file arguments
+    and written by the caller in one write step. seen_hashes collects content hashes planned
+    in this run so a second copy of a new file is not parsed twice.
+    """
+    filename = os.path.basename(filepath)
+    stat_result = log_archive.stat_log(filepath)  # original size/mtime once archived
+    if record is None:
+        if stat_result.st_size == 0:
+            logger.warning(f"Skipping empty log file: '{filename}'")
+            bookkeeping.append((filename, stat_result, 0))
+            return None
+        content_hash = file_content_hash(filepath)
+        if content_hash in seen_hashes or is_duplicate_content(conn, content_hash):
+            logger.info(f"Skipping '{filename}': identical content already ingested.")
+            bookkeeping.append((filename, stat_result, stat_result.st_size))
+            return None
+        seen_hashes.add(content_hash)
+        return _ingest_job(filepath, content_hash=content_hash)
+
+    offset = record["offset"]
+    if offset is None:
+        # Recorded before offsets were tracked: it was parsed in full, adopt its current size
+        logger.debug(f"Adopting legacy processed file '{filename}' at offset {stat_result.st_size}.")
+        bookkeeping.append((filename, stat_result, stat_result.st_size, None, record))
+        return None
+    if stat_result.st_size == record["size"] and stat_result.st_mtime == record["mtime"]:
+        return None
+    if stat_result.st_size < offset:
+        logger.warning(f"Log file '{filename}' shrank below its parsed offset ({stat_result.st_size} < {offset}); re-parsing from the start.")
+        return _ingest_job(filepath, replace=True, content_hash=file_content_hash(filepath))
+    if stat_result.st_size == offset:
+        bookkeeping.append((filename, stat_result, offset, None, record))
+        return None
+    hints = {"vendor": record["vendor"], "hostname": record["hostname"], "host_ip": record["host_ip"]}
+    return _ingest_job(filepath, offset, hints)
+
+def main(log_file_path=None, workers=None, progress=None, log_file_paths=None, db_path=None):
+    """
+    Main entry point: Process all logs in directory (default) or a single file (if provided).
+    log_file_paths limits directory mode to those files (utils/log_watcher.py passes the ones that changed).
+    progress(done, total, filename) is called once the files to process are known (done=0)
+    and after each file; utils/ingest_jobs.py reports it on /api/monitor/flush/status.
+    workers > 1 parses files in a process pool; rows are still written by this process
+    in sorted filename order, so the resulting database matches a serial run.
+    Files are tracked by size/mtime/byte offset in processed_files, so a file that grew
+    since the last run is parsed only from where the previous run stopped.
+    202601 Writes go through the process's shared writer (get_database(db_path).writer(), db_path defaults to
+    mainconfig.DB_PATH), held for each write step only: in the app process other writers queue on its lock
+    instead of failing on SQLITE_BUSY while a run parses files.
+    """
     # log_directory = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'logs', 'core'))
     # database_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'network_analysis.db'))
 
     log_directory = mainconfig.CORE_LOGS_DIR
     # log_directory = mainconfig.CORE_MAIN_DIR
-    database_path = mainconfig.DB_PATH
+    database_path = db_path or mainconfig.DB_PATH
+    database = db_connection.get_database(database_path)
 
     logger.info("Starting network log analysis...")
-    connection = setup_database(database_path)
+    with database.writer() as connection:
+        setup_database(database_path, connection)
 
     # 🌟 NEW: Call the cleanup function here
     # cleanup_bgp_peer_status(connection)
 
     if not os.path.isdir(log_directory):
         logger.error(f"Error: Log directory '{log_directory}' not found.")
-        sys.exit(1)  # Or raise an exception if imported
+        return False  # 202601 no sys.exit: main also runs in-process (utils/ingest_jobs.py)
 
-    cursor = connection.cursor()
-    cursor.execute("SELECT filename FROM processed_files")
-    processed_filenames_db = {row[0] for row in cursor.fetchall()}
-    logging.info(f"Found {len(processed_filenames_db)} files already processed in the database.")
+    reader = database.reader()
+    cursor = reader.execute("SELECT filename, size, mtime, offset, vendor, hostname, host_ip FROM processed_files")
+    processed_files_db = {row[0]: dict(zip(("filename", "size", "mtime", "offset", "vendor", "hostname", "host_ip"), row))
+                          for row in cursor.fetchall()}
+    logging.info(f"Found {len(processed_files_db)} files already processed in the database.")
+
+    log_file_regex = re.compile(mainconfig.LOG_FILE_REGEX)
+    bookkeeping = []
 
-    log_file_regex = re.compile(r"^\d{8}_\d{6}_[\d\.]+_[\w-]+_sa\.txt$")
-    
     if log_file_path:  # Single-file mode (when called with a path)
-        if not os.path.isfile(log_file_path):
+        log_file_path = log_archive.logical_path(log_file_path)
+        if not log_archive.log_exists(log_file_path):
             logger.error(f"Single file not found: {log_file_path}")
-            connection.close()
             return False  # Or raise ValueError
         filename_only = os.path.basename(log_file_path)
-        if filename_only in processed_filenames_db:
+        record = processed_files_db.get(filename_only)
+        job = _plan_ingest_job(reader, log_file_path, record, set(), bookkeeping)
+        _write_bookkeeping(database, bookkeeping)
+        if job is None:
+            if record is None:
+                return False  # Empty file, recorded
             logger.info(f"Single file '{filename_only}' already processed. Skipping.")
-            connection.close()
             return True  # Already done
-        if os.path.getsize(log_file_path) == 0:
-            logger.warning(f"Skipping empty single file: '{filename_only}'")
-            cursor.execute("INSERT INTO processed_files (filename) VALUES (?)", (filename_only,))
-            connection.commit()
-            connection.close()
-            return False
-        files_to_process = [log_file_path]
-    else:  # Directory mode (all new files)
-        all_files_on_disk = [(os.path.join(log_directory, filename), filename) for filename in os.listdir(log_directory) 
-                             if os.path.isfile(os.path.join(log_directory, filename)) and log_file_regex.match(filename)]
-        files_to_process = []
-        for filepath, filename in all_files_on_disk:
-            if filename not in processed_filenames_db and os.path.getsize(filepath) > 0:
-                files_to_process.append(filepath)
-            # Check for empty files
-            elif os.path.getsize(filepath) == 0:
-                logger.warning(f"Skipping empty log file: '{filename}'")
-                # FIX: Only insert the filename if it is NOT already in the set of processed files
-                if filename not in processed_filenames_db:
-                    cursor.execute("INSERT INTO processed_files (filename) VALUES (?)", (filename,))
-                    connection.commit()
-                else:
-                    logger.debug(f"Empty log file '{filename}' already recorded as processed.")
-
-    if not files_to_process:
+        jobs = [job]
+    else:  # Directory mode (new files and files that grew)
+        if log_file_paths is not None:
+            candidates = [str(path) for path in log_file_paths]
+        else:
+            candidates = [os.path.join(log_directory, filename) for filename in os.listdir(log_directory)]
+        # 202601 archived logs (<name>.gz) are tracked under their plain name, see utils/log_archive.py
+        all_files_on_disk = {log_archive.logical_path(path) for path in candidates
+                             if os.path.isfile(path) and log_archive.is_log_name(os.path.basename(path), log_file_regex)}
+        jobs = []
+        seen_hashes = set()
+        for filepath in sorted(all_files_on_disk):
+            job = _plan_ingest_job(reader, filepath, processed_files_db.get(os.path.basename(filepath)), seen_hashes, bookkeeping)
+            if job is not None:
+                jobs.append(job)
+        _write_bookkeeping(database, bookkeeping)
+
+    if progress:
+        progress(0, len(jobs), None)
+    if not jobs:
         logger.warning("No new valid log files found to process. System is up to date.")
-        connection.close()
         return False  # No updates
 
-    logger.info(f"Found {len(files_to_process)} new, valid log files to process.")
-    files_to_process.sort()
-
-    updates_made = False
-    for filepath in files_to_process:
-        try:
-            success = process_log_file(connection, filepath, None, log_directory)
-            filename_only = os.path.basename(filepath)
-            if success:
-                cursor.execute("INSERT INTO processed_files (filename) VALUES (?)", (filename_only,))
-                connection.commit()
-                updates_made = True
-                logger.info(f"Successfully processed and recorded '{filename_only}'.")
-            else:
-                logger.error(f"Failed to process '{filename_only}'")
-                connection.rollback()
-        except Exception as e:
-            logger.error(f"ERROR processing file {os.path.basename(filepath)}: {e}")
-            connection.rollback()
+    logger.info(f"Found {len(jobs)} new or grown log files to process.")
+    jobs.sort(key=lambda job: job["path"])
+
+    if workers is None:
+        workers = mainconfig.INGEST_WORKERS
+    workers = max(1, min(int(workers), len(jobs)))
+
+    # 202601 Rows go in with executemany, files are committed in batches of up to INGEST_COMMIT_FILES (parsed first)
+    # and the BGP duplicate cleanup runs once per run instead of after every file
+    updates_made = 0
+    for done, (job, parsed) in enumerate(_iter_processed_files(database, jobs, log_directory, workers), 1):
+        filename_only = os.path.basename(job["path"])
+        if progress:
+            progress(done, len(jobs), filename_only)
+        if parsed is None:
+            logger.error(f"Failed to process '{filename_only}'")
+            continue
+        updates_made += 1
+        logger.info(f"Successfully processed and recorded '{filename_only}' up to offset {parsed['end_offset']}.")
+    if updates_made:
+        with database.writer() as connection:
+            cleanup_bgp_peer_status(connection)
 
     if not updates_made:
         logger.warning("No successful updates made despite files found.")
-        connection.close()
         return False
     else:
-        connection.close()
         logger.info("Database processing complete.")
         return True
-    
+
+def _write_bookkeeping(database, bookkeeping):
+    """processed_files rows of files planned without parsing (empty, duplicate, unchanged content)."""
+    if not bookkeeping:
+        return
+    with database.writer() as connection:
+        cursor = connection.cursor()
+        for args in bookkeeping:
+            _record_processed_file(cursor, *args)
 
 if __name__ == "__main__":
-    if sys.argv[1:]:  # If args provided, treat as single files
+    parser = argparse.ArgumentParser(description="Ingest core device logs into the network database.")
+    parser.add_argument("files", nargs="*", help="log files to process one by one (default: whole log directory)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help=f"parser processes for directory mode (default: {mainconfig.INGEST_WORKERS})")
+    args = parser.parse_args()
+    if args.files:  # If args provided, treat as single files
         success = False
-        for arg in sys.argv[1:]:
+        for arg in args.files:
             if main(arg):  # Process each as single file
                 success = True
         sys.exit(0 if success else 1)
     else:
-        sys.exit(0 if main() else 1)  # Directory mode
\ No newline at end of file
+        sys.exit(0 if main(workers=args.workers) else 1)  # Directory mode
@@ -0,0 +1,243 @@
+"""
+Query planner regression benchmark for the routers/monitor.py dashboard queries.
+
+Builds a synthetic network_core.db (default 5M state change rows) with analysis_sqlite.setup_database,
+so it carries exactly the managed index set (analysis_sqlite.INDEXES), then for every dashboard query:
+  - checks EXPLAIN QUERY PLAN uses the expected index and has no forbidden step
+    (full table scan of a large table, temp b-tree where the index should give the order)
+  - times it against a wall-clock budget
+No ANALYZE is run: the production database has no sqlite_stat1, so the plans must hold without it.
+
+Usage:
+    python utils/bench_monitor_queries.py                      # 5M rows in a temp file
+    python utils/bench_monitor_queries.py --rows 500000 --budget-scale 0.5
+    python utils/bench_monitor_queries.py --db /tmp/bench.db   # keep / reuse the generated database
+    python utils/bench_monitor_queries.py --retention          # roll up / prune first (utils/event_retention.py)
+Module logs go to bench_monitor_queries.log in the temp directory.
+Exit code is 1 if any check fails.
+"""
+import os, sys, re, gc, time, random, sqlite3, argparse, tempfile
+from datetime import datetime
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import mainconfig as mainconfig
+# 202601 Module loggers (mainconfig.setup_module_logger) write to a temp file, not the app's logs/alert_center.log.
+# Set before the imports below create them; spawned parser processes run this top level too.
+mainconfig.ALERT_LOG_PATH = os.path.join(tempfile.gettempdir(), "bench_monitor_queries.log")
+import routers.monitor as monitor
+import utils.analysis_sqlite as analysis_sqlite
+import utils.event_retention as event_retention
+import utils.peer_health as peer_health
+import utils.datatables as datatables
+import utils.uptime_codec as uptime_codec
+import utils.flap_detector as flap_detector
+
+HOSTS = 200
+PEERS_PER_HOST = 25
+HISTORY_DAYS = 365
+OSPF_STATES = ["Down", "Init", "2-Way", "ExStart", "Exchange", "Loading", "Full"]
+BGP_STATES = ["Idle", "Connect", "Active", "OpenSent", "OpenConfirm", "Established"]
+UPTIMES = ["10d02h", "536:53:45", "0012h33m", "00:12:33", "27w5d", "****h", "never"]
+# share of the events that go to one flapping peer (core-sw007, peer 3): 25k per protocol at 5M rows
+HOT_PEER, HOT_PEER_SHARE = (7, 3), 0.01
+
+# Plan steps that mean a query stopped being index-driven
+FULL_SCAN = r"^SCAN (bgp|ospf)_state_(changes|rollup)$"
+EVENT_TABLE_SCANS = [FULL_SCAN]
+HEALTH_SCANS = [r"^SCAN peer_health"]
+
+# seek_sql of /table/event-bgp at an offset deep enough to take the keyset path (the start is a bound parameter)
+DEEP_EVENT_PAGE = datatables.seek_sql(monitor.DASHBOARD_TABLES["event-bgp"],
+                                      datatables.parse_request({"start": datatables.SEEK_MIN_START}))
+
+# name, sql, params(sample), expected index, forbidden plan patterns, budget ms at 5M rows, repeat
+QUERIES = [
+    # dashboard_table: peers changed in the last 12 hours, from peer_health (utils/peer_health.py)
+    ("peer_health.recent_bgp", monitor.RECENT_PEERS_SQL,
+     lambda s: ("bgp", s["since_ts"]), "idx_peer_health_recent", HEALTH_SCANS, 10, 1),
+    # /history: first and a deep page of the hot peer's history (keyset on (ts, seq), duplicates dropped by index probes)
+    ("peer_history.bgp", monitor.PEER_HISTORY_SQL.format(**monitor.PEER_HISTORY_TABLES["bgp"]),
+     lambda s: (s["bgp_ip"], s["hostname"], 0, monitor.HISTORY_MAX_TS, monitor.HISTORY_MAX_TS + 1, 0,
+                monitor.HISTORY_PAGE_ROWS + 1), "idx_bgp_changes_host_nbr_ts",
+     EVENT_TABLE_SCANS + [r"TEMP B-TREE FOR ORDER BY"], 20, 1),
+    ("peer_history.bgp deep page", monitor.PEER_HISTORY_SQL.format(**monitor.PEER_HISTORY_TABLES["bgp"]),
+     lambda s: (s["bgp_ip"], s["hostname"], 0, s["bgp_deep_cursor"][0], *s["bgp_deep_cursor"],
+                monitor.HISTORY_PAGE_ROWS + 1), "idx_bgp_changes_host_nbr_ts",
+     EVENT_TABLE_SCANS + [r"TEMP B-TREE FOR ORDER BY"], 20, 1),
+    ("peer_history.ospf", monitor.PEER_HISTORY_SQL.format(**monitor.PEER_HISTORY_TABLES["ospf"]),
+     lambda s: (s["ospf_ip"], s["hostname"], 0, monitor.HISTORY_MAX_TS, monitor.HISTORY_MAX_TS + 1, 0,
+                monitor.HISTORY_PAGE_ROWS + 1), "idx_ospf_changes_host_nbr_ts",
+     EVENT_TABLE_SCANS + [r"TEMP B-TREE FOR ORDER BY"], 20, 1),
+    # /table/{name}: first page of the event tables (newest first), problem peer counts
+    ("table.event_bgp page", datatables.page_sql(monitor.DASHBOARD_TABLES["event-bgp"], datatables.parse_request({}))[0],
+     lambda s: (50, 0), "idx_bgp_changes_ts", EVENT_TABLE_SCANS + [r"TEMP B-TREE FOR ORDER BY"], 50, 1),
+    ("table.event_ospf page", datatables.page_sql(monitor.DASHBOARD_TABLES["event-ospf"], datatables.parse_request({}))[0],
+     lambda s: (50, 0), "idx_ospf_changes_ts", EVENT_TABLE_SCANS + [r"TEMP B-TREE FOR ORDER BY"], 50, 1),
+    # /table/event-*: recordsTotal on the event table alone; a deep page (80% in) seeks on idx_*_changes_ts
+    # (datatables.seek_sql: bound, rows ahead of it, page from the bound) instead of an OFFSET over the status join
+    ("table.event_bgp count", datatables.count_sql(monitor.DASHBOARD_TABLES["event-bgp"]),
+     lambda s: (), "idx_bgp_changes_ts", EVENT_TABLE_SCANS + [r"MATERIALIZE"], 100, 1),
+    ("table.event_ospf count", datatables.count_sql(monitor.DASHBOARD_TABLES["event-ospf"]),
+     lambda s: (), "idx_ospf_changes_ts", EVENT_TABLE_SCANS + [r"MATERIALIZE"], 100, 1),
+    ("table.event_bgp deep bound", DEEP_EVENT_PAGE[0],
+     lambda s: (s["deep_start"],), "idx_bgp_changes_ts", EVENT_TABLE_SCANS + [r"TEMP B-TREE"], 200, 1),
+    ("table.event_bgp deep before", DEEP_EVENT_PAGE[1],
+     lambda s: (s["deep_ts"],), "idx_bgp_changes_ts", EVENT_TABLE_SCANS + [r"TEMP B-TREE"], 400, 1),
+    ("table.event_bgp deep page", DEEP_EVENT_PAGE[3],
+     lambda s: (s["deep_ts"], 50, 0), "idx_bgp_changes_ts", EVENT_TABLE_SCANS + [r"TEMP B-TREE FOR ORDER BY"], 50, 1),
+    # /table/bgp: status rows by uptime (uptime_seconds, utils/uptime_codec.py), peers reset in the last 12 hours
+    ("table.bgp page", datatables.page_sql(monitor.DASHBOARD_TABLES["bgp"], datatables.parse_request({}))[0],
+     lambda s: (50, 0), "idx_bgp_status_uptime", [r"^SCAN bgp_peer_status$"], 20, 1),
+    ("status.bgp_recent_reset", "SELECT COUNT(*) FROM bgp_peer_status WHERE uptime_seconds < ?",
+     lambda s: (uptime_codec.RECENT_RESET_SECONDS,), "idx_bgp_status_uptime", [r"^SCAN bgp_peer_status"], 10, 1),
+    # flap_detector.sync: the first sync seeds the last day from idx_bgp_changes_ts, later ones read new ids only
+    ("flap_detector.seed_bgp", flap_detector.SEED_FLAPS_SQL.format(**flap_detector.PROTOCOLS["bgp"], flap=flap_detector.FLAP_SQL["bgp"]),
+     lambda s: (s["since_ts"] - 12 * 3600, s["max_bgp_id"]), "idx_bgp_changes_ts",
+     EVENT_TABLE_SCANS + [r"INTEGER PRIMARY KEY \(rowid<\?\)"], 40, 1),
+    ("flap_detector.new_bgp", flap_detector.NEW_FLAPS_SQL.format(**flap_detector.PROTOCOLS["bgp"], flap=flap_detector.FLAP_SQL["bgp"]),
+     lambda s: (s["max_bgp_id"] - 1000, s["max_bgp_id"]), None, EVENT_TABLE_SCANS, 10, 1),
+    # /stream: a poll reads the events after the cursor ids and the peer_health rows refreshed since its second
+    ("stream.bgp_events", monitor.STREAM_EVENTS_SQL["bgp"],
+     lambda s: (s["max_bgp_id"] - 100, 500), "idx_bgp_status_host_nbr",
+     EVENT_TABLE_SCANS + [r"^SCAN bgp_peer_status", r"TEMP B-TREE"], 10, 1),
+    ("stream.health", monitor.STREAM_HEALTH_SQL,
+     lambda s: (s["since_ts"] + 12 * 3600 + 1,), "idx_peer_health_refreshed", HEALTH_SCANS, 10, 1),
+    ("table.problem_bgp count", f"SELECT COUNT(*) FROM ({monitor.PROBLEM_BGP_SQL})",
+     lambda s: (), "idx_peer_health_problem", HEALTH_SCANS, 20, 1),
+    ("table.problem_ospf count", f"SELECT COUNT(*) FROM ({monitor.PROBLEM_OSPF_SQL})",
+     lambda s: (), "idx_peer_health_problem", HEALTH_SCANS, 20, 1),
+]
+
+
+def peer_ip(kind, host, peer):
+    return f"10.{1 if kind == 'bgp' else 2}.{host}.{peer + 1}"
+
+
+def build_database(db_path, rows, seed=1):
+    """Create the schema with setup_database and load `rows` synthetic state changes (half BGP, half OSPF)."""
+    conn = analysis_sqlite.setup_database(db_path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    rnd = random.Random(seed)
+    now = int(time.time())
+    start = now - HISTORY_DAYS * 86400
+
+    bgp_status, ospf_status = [], []
+    for h in range(HOSTS):
+        hostname, host_ip = f"core-sw{h:03d}", f"192.168.{h // 250}.{h % 250 + 1}"
+        for p in range(PEERS_PER_HOST):
+            bgp_uptime, ospf_uptime = rnd.choice(UPTIMES), rnd.choice(UPTIMES)
+            bgp_status.append((hostname, host_ip, f"vpn{p % 5}", host_ip, "65000", peer_ip("bgp", h, p), "", "65001",
+                               bgp_uptime, rnd.choice(BGP_STATES), "", "", "", uptime_codec.to_seconds(bgp_uptime)))
+            ospf_status.append((hostname, host_ip, "1", host_ip, "", "0.0.0.0", f"Vlan{p}", "", peer_ip("ospf", h, p),
+                                rnd.choice(OSPF_STATES), "", ospf_uptime, "", "", "", "", "", "", "", "", "",
+                                uptime_codec.to_seconds(ospf_uptime)))
+    conn.executemany(f"INSERT OR REPLACE INTO bgp_peer_status VALUES ({','.join('?' * 14)})", bgp_status)
+    conn.executemany(f"INSERT OR REPLACE INTO ospf_peer_status VALUES ({','.join('?' * 22)})", ospf_status)
+
+    def events(kind, count):
+        states = BGP_STATES if kind == "bgp" else OSPF_STATES
+        for _ in range(count):
+            h, p = HOT_PEER if rnd.random() < HOT_PEER_SHARE else (rnd.randrange(HOSTS), rnd.randrange(PEERS_PER_HOST))
+            ts = rnd.randint(start, now)
+            stamp = datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+            log_file = datetime.fromtimestamp(ts).strftime("%Y%m%d-%H%M") + f"-core-sw{h:03d}.log"
+            from_state, to_state = rnd.sample(states, 2)
+            if kind == "bgp":
+                yield (f"core-sw{h:03d}", f"vpn{p % 5}", peer_ip("bgp", h, p), from_state, to_state, stamp, log_file, ts)
+            else:
+                yield (f"core-sw{h:03d}", "1", peer_ip("ospf", h, p), f"Vlan{p}", from_state, to_state, stamp, log_file, ts)
+
+    for kind, sql in (("bgp", analysis_sqlite.HPE_BGP_EVENT_SQL), ("ospf", analysis_sqlite.HPE_OSPF_EVENT_SQL)):
+        conn.executemany(sql, events(kind, rows // 2 if kind == "bgp" else rows - rows // 2))
+        conn.commit()
+    # rows went in directly, not through ingestion: build peer_health as for an existing database
+    peer_health.rebuild(conn, now)
+    conn.commit()
+    return conn
+
+
+def plan_lines(conn, sql, params):
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def run_checks(conn, budget_scale):
+    now = int(time.time())
+    sample = {"since_ts": now - 12 * 3600, "hostname": f"core-sw{HOT_PEER[0]:03d}",
+              "bgp_ip": peer_ip("bgp", *HOT_PEER), "ospf_ip": peer_ip("ospf", *HOT_PEER)}
+    # the 100th oldest event of the hot peer: the cursor of one of the last pages
+    sample["bgp_deep_cursor"] = conn.execute(
+        "SELECT ts, id FROM bgp_state_changes WHERE hostname = ? AND neighbor_ip = ? ORDER BY ts, id LIMIT 1 OFFSET 100",
+        (sample["hostname"], sample["bgp_ip"])).fetchone() or (0, 0)
+    sample["max_bgp_id"] = conn.execute("SELECT MAX(id) FROM bgp_state_changes").fetchone()[0] or 0
+    sample["deep_start"] = conn.execute("SELECT COUNT(*) FROM bgp_state_changes").fetchone()[0] * 4 // 5
+    sample["deep_ts"] = (conn.execute(DEEP_EVENT_PAGE[0], (sample["deep_start"],)).fetchone() or (0,))[0]
+    failures = 0
+    for name, sql, params, index, forbidden, budget_ms, repeat in QUERIES:
+        args = params(sample)
+        plan = plan_lines(conn, sql, args)
+        problems = []
+        if index and not any(re.search(rf"USING (COVERING )?INDEX {index}\b", line) for line in plan):
+            problems.append(f"expected index {index}")
+        for pattern in forbidden:
+            problems += [f"plan step '{line}'" for line in plan if re.search(pattern, line)]
+
+        gc.collect()  # a collection of the synthetic build's objects would land in whichever query runs next
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            result = conn.execute(sql, args).fetchall()
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        budget = budget_ms * budget_scale
+        if elapsed_ms > budget:
+            problems.append(f"{elapsed_ms:.1f} ms over budget {budget:.0f} ms")
+
+        failures += bool(problems)
+        print(f"{'FAIL' if problems else 'ok  '} {name:<30} {elapsed_ms:9.1f} ms / {budget:7.0f} ms  rows={len(result)}")
+        for line in plan:
+            print(f"       plan: {line}")
+        for problem in problems:
+            print(f"       !! {problem}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN QUERY PLAN and wall-clock checks for the monitor dashboard queries.")
+    parser.add_argument("--rows", type=int, default=5_000_000, help="synthetic state change rows (default: 5000000)")
+    parser.add_argument("--db", help="database path to build or reuse (default: temporary file, removed afterwards)")
+    parser.add_argument("--retention", action="store_true",
+                        help="run the event retention job first, so the queries see raw rows plus hourly/daily rollups")
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="multiply every wall-clock budget (slow machines, smaller --rows)")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="bench_monitor_"), "network_core.db")
+    try:
+        if os.path.exists(db_path):
+            conn = analysis_sqlite.setup_database(db_path)
+            print(f"Reusing {db_path}")
+        else:
+            t0 = time.perf_counter()
+            conn = build_database(db_path, args.rows)
+            print(f"Built {db_path} with {args.rows} rows in {time.perf_counter() - t0:.1f}s")
+        if args.retention:
+            conn.commit()
+            t0 = time.perf_counter()
+            summary = event_retention.run_event_retention(db_path)
+            print(f"Event retention in {time.perf_counter() - t0:.1f}s: {summary}")
+        conn.row_factory = sqlite3.Row
+        failures = run_checks(conn, args.budget_scale)
+        conn.close()
+    finally:
+        from utils.db_connection import close_all
+        close_all()
+        if not args.db and os.path.exists(db_path):
+            os.remove(db_path)
+            os.rmdir(os.path.dirname(db_path))
+    print(f"{len(QUERIES) - failures}/{len(QUERIES)} queries within plan and budget")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""
+Parser throughput benchmark: parse_routing_info, log_check, log_summary and process_log_file.
+
+Generates a fixed corpus with utils/log_generator.py (same seed and sizes -> same bytes), runs each
+stage over every capture, and reports lines/s, peers/s (BGP + OSPF peers the stage produced) and
+peak traced memory. Timings are the best of --rounds; memory comes from one extra tracemalloc round.
+Results are compared with a stored baseline (bench_parser_baseline.json next to this file):
+a stage regresses when its lines/s drops, or its peak memory grows, by more than --tolerance.
+The baseline is machine specific; re-save it (--save-baseline) on the machine that runs the check.
+
+Usage:
+    python utils/bench_parser.py                                   # compare with the stored baseline
+    python utils/bench_parser.py --save-baseline                   # record a new baseline
+    python utils/bench_parser.py --count 40 --log-lines 5000 --no-baseline
+    python utils/bench_parser.py --stages parse_routing_info log_check
+Module logs go to bench_parser.log in the temp directory.
+Exit code is 1 if any stage regressed.
+"""
+import os, re, sys, json, time, shutil, logging, argparse, tempfile, tracemalloc
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import mainconfig as mainconfig
+# 202601 Module loggers (mainconfig.setup_module_logger) write to a temp file, not the app's logs/alert_center.log.
+# Set before the imports below create them; spawned parser processes run this top level too.
+mainconfig.ALERT_LOG_PATH = os.path.join(tempfile.gettempdir(), "bench_parser.log")
+import routers.monitor as monitor
+import utils.analysis_sqlite as analysis_sqlite
+import utils.fastapi_mymodule as fastapi_mymodule
+import utils.log_generator as log_generator
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_parser_baseline.json")
+STAGES = ["parse_routing_info", "log_check", "process_log_file", "log_summary"]
+
+
+def routing_peer_count(routing_info):
+    bgp = sum(len(instance.get("Peer", [])) for instance in routing_info.get("BGP", []))
+    ospf = sum(len(process.get("neighbors", [])) for process in routing_info.get("OSPF", []))
+    return bgp + ospf
+
+
+class Corpus:
+    """Generated captures plus the per-file inputs the stages need, prepared outside the timed loops."""
+
+    def __init__(self, work_dir, count, seed, bgp_peers, ospf_peers, log_lines):
+        self.params = dict(count=count, seed=seed, bgp_peers=bgp_peers, ospf_peers=ospf_peers, log_lines=log_lines)
+        self.log_dir = os.path.join(work_dir, "core_logs")
+        self.db_path = os.path.join(work_dir, "network_core.db")
+        self.paths = log_generator.write_captures(self.log_dir, count, seed, bgp_peers, ospf_peers, log_lines)
+        self.lines = {}
+        self.vendors = {}
+        self.summary_inputs = {}  # path -> (filtered log entries, hostname, ip), what core_check hands log_summary
+        for path in self.paths:
+            stream = analysis_sqlite.LogLineStream(path)
+            self.vendors[path] = analysis_sqlite.detect_vendor(stream)
+            collector = fastapi_mymodule.LogCheckCollector(path)
+            for line in stream:
+                collector.feed(line)
+            self.lines[path] = collector.lines_seen
+            entries = collector.log_entries + ([collector.current_entry] if collector.current_entry else [])
+            entries = [e for e in entries if re.search(mainconfig.LOG_REGEX, e)]
+            self.summary_inputs[path] = ("\n".join(entries), collector.hostname, collector.ip)
+        self.total_lines = sum(self.lines.values())
+        self.total_bytes = sum(os.path.getsize(p) for p in self.paths)
+
+
+def stage_parse_routing_info(corpus):
+    peers = 0
+    for path in corpus.paths:
+        routing_info = analysis_sqlite.parse_routing_info(path, analysis_sqlite.LogLineStream(path), corpus.vendors[path])
+        peers += routing_peer_count(routing_info)
+    return corpus.total_lines, peers
+
+
+def stage_log_check(corpus):
+    peers = 0
+    for path in corpus.paths:
+        result = fastapi_mymodule.log_check(path, logger=logging.getLogger("bench_parser"))
+        peers += len(result["ipv4_peers"]) + len(result["vpnv4_peers"]) + len(result["ospf_peers"])
+    return corpus.total_lines, peers
+
+
+def stage_process_log_file(corpus):
+    # Fresh database each round so every file is really parsed and written (no content-hash skips)
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(corpus.db_path + suffix):
+            os.remove(corpus.db_path + suffix)
+    conn = analysis_sqlite.setup_database(corpus.db_path)
+    try:
+        for path in corpus.paths:
+            if not analysis_sqlite.process_log_file(conn, path, None, corpus.log_dir):
+                raise RuntimeError(f"process_log_file failed for {path}")
+        peers = sum(conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                    for table in ("bgp_peer_status", "ospf_peer_status"))
+    finally:
+        conn.close()
+    return corpus.total_lines, peers
+
+
+def stage_log_summary(corpus):
+    # log_summary looks up live peer status through routers.monitor; point it at the database
+    # process_log_file just built so the lookups hit real rows
+    lines = 0
+    for path in corpus.paths:
+        entries, hostname, ip = corpus.summary_inputs[path]
+        if entries:
+            fastapi_mymodule.log_summary(entries, hostname, ip)
+            lines += entries.count("\n") + 1
+    return lines, None
+
+
+STAGE_FUNCTIONS = {
+    "parse_routing_info": stage_parse_routing_info,
+    "log_check": stage_log_check,
+    "process_log_file": stage_process_log_file,
+    "log_summary": stage_log_summary,
+}
+
+
+def run_stage(name, corpus, rounds):
+    fn = STAGE_FUNCTIONS[name]
+    best = None
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        lines, peers = fn(corpus)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    try:
+        fn(corpus)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "seconds": round(best, 4),
+        "lines": lines,
+        "peers": peers,
+        "lines_per_s": round(lines / best, 1) if best else None,
+        "peers_per_s": round(peers / best, 1) if best and peers is not None else None,
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Regression messages for stages that lost more than `tolerance` of lines/s or grew peak memory by more."""
+    problems = {}
+    for name, result in results.items():
+        base = baseline.get("stages", {}).get(name)
+        if not base:
+            continue
+        messages = []
+        if base.get("lines_per_s") and result["lines_per_s"] < base["lines_per_s"] * (1 - tolerance):
+            messages.append(f"lines/s {result['lines_per_s']:.0f} < baseline {base['lines_per_s']:.0f}")
+        if base.get("peak_kb") and result["peak_kb"] > base["peak_kb"] * (1 + tolerance):
+            messages.append(f"peak {result['peak_kb']:.0f} KB > baseline {base['peak_kb']:.0f} KB")
+        if messages:
+            problems[name] = messages
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput and memory benchmark for the session log parsers.")
+    parser.add_argument("--count", type=int, default=24, help="captures in the corpus (default: 24)")
+    parser.add_argument("--seed", type=int, default=1, help="generator seed (default: 1)")
+    parser.add_argument("--bgp-peers", type=int, default=40, help="BGP peers per device (default: 40)")
+    parser.add_argument("--ospf-peers", type=int, default=20, help="OSPF neighbors per process (default: 20)")
+    parser.add_argument("--log-lines", type=int, default=1000, help="log buffer entries per capture (default: 1000)")
+    parser.add_argument("--rounds", type=int, default=3, help="timed rounds per stage, best is kept (default: 3)")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES, help="stages to run (default: all)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help=f"baseline file (default: {BASELINE_PATH})")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression (default: 0.25)")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--no-baseline", action="store_true", help="report only, no comparison")
+    args = parser.parse_args()
+
+    # The parsers log per line at INFO/DEBUG; keep that out of the measurement
+    logging.disable(logging.WARNING)
+    stages = [s for s in STAGES if s in args.stages]
+    if "log_summary" in stages and "process_log_file" not in stages:
+        stages.insert(stages.index("log_summary"), "process_log_file")
+
+    work_dir = tempfile.mkdtemp(prefix="bench_parser_")
+    try:
+        corpus = Corpus(work_dir, args.count, args.seed, args.bgp_peers, args.ospf_peers, args.log_lines)
+        print(f"Corpus: {len(corpus.paths)} captures, {corpus.total_lines} lines, {corpus.total_bytes / 1048576:.1f} MB "
+              f"({', '.join(f'{k}={v}' for k, v in corpus.params.items())})")
+        monitor.DB_PATH = corpus.db_path
+
+        results = {}
+        for name in stages:
+            results[name] = run_stage(name, corpus, args.rounds)
+    finally:
+        from utils.db_connection import close_all
+        close_all()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    baseline = None
+    if not args.no_baseline and not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("corpus") != corpus.params:
+            print(f"Baseline corpus {baseline.get('corpus')} differs from this run; not comparing.")
+            baseline = None
+    problems = compare(results, baseline, args.tolerance) if baseline else {}
+
+    print(f"{'stage':<20} {'seconds':>9} {'lines/s':>11} {'peers/s':>10} {'peak KB':>10}  baseline lines/s")
+    for name, r in results.items():
+        base = (baseline or {}).get("stages", {}).get(name, {})
+        peers_per_s = f"{r['peers_per_s']:>10.0f}" if r["peers_per_s"] is not None else f"{'-':>10}"
+        print(f"{'FAIL ' if name in problems else ''}{name:<20} {r['seconds']:>9.3f} {r['lines_per_s']:>11.0f} {peers_per_s} "
+              f"{r['peak_kb']:>10.0f}  {base.get('lines_per_s', '-')}")
+        for message in problems.get(name, []):
+            print(f"       !! {message}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"corpus": corpus.params, "python": sys.version.split()[0], "saved": time.strftime("%Y-%m-%d %H:%M:%S"),
+                       "stages": results}, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
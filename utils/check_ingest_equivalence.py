@@ -0,0 +1,305 @@
+"""
+Ingest equivalence check: the same log_generator corpus must give the same database however it is ingested.
+
+Generates one corpus with utils/log_generator.py, ingests a copy of it with analysis_sqlite.main serially
+(the reference) and then in every other way listed in SCENARIOS, and compares the table contents row for row:
+  parallel            workers > 1 (parsed in a process pool, written in filename order)
+  archived            every log compressed first (utils/log_archive.py, small gzip members), serial and parallel
+  tailed              each log ingested in two runs, the second one from the stored byte offset
+  tailed archived     as tailed, but the grown log is archived before the second run (offset read through the
+                      gzip member index)
+  duplicate           one log copied under a second name: skipped on its content hash, recorded in processed_files
+  shrunk              every log ingested, cut by SHRINK_LINES lines and ingested again (re-parsed in full); compared
+                      with a fresh ingest of the cut logs instead of the serial run. Status rows are upserted
+                      snapshots, never retracted, so only the events, hashes and processed_files rows are compared.
+Columns written with the wall clock (content_hashes.first_seen, peer_health.flaps_ts) are left out. Tailed runs
+insert events in a different order, so event ids and the content hashes of the partial files are left out too
+(shrunk runs: the event ids).
+Finally the reference database's peer histories (routers/monitor.get_peer_history) are read back in small keyset
+pages and compared with the unpaged history.
+
+Usage:
+    python utils/check_ingest_equivalence.py
+    python utils/check_ingest_equivalence.py --count 24 --log-lines 2000 --workers 4
+    python utils/check_ingest_equivalence.py --keep              # leave the corpus and databases for inspection
+Module logs go to check_ingest_equivalence.log in the temp directory.
+Exit code is 1 if any scenario differs from the serial run.
+"""
+import os, sys, shutil, sqlite3, logging, argparse, tempfile
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import mainconfig as mainconfig
+# 202601 Module loggers (mainconfig.setup_module_logger) write to a temp file, not the app's logs/alert_center.log.
+# Set before the imports below create them; spawned parser processes run this top level too.
+mainconfig.ALERT_LOG_PATH = os.path.join(tempfile.gettempdir(), "check_ingest_equivalence.log")
+import routers.monitor as monitor
+import utils.analysis_sqlite as analysis_sqlite
+import utils.log_archive as log_archive
+import utils.log_generator as log_generator
+from utils.db_connection import close_all
+
+# Written with the time of the run, not derived from the logs
+VOLATILE_COLUMNS = {"content_hashes": {"first_seen"}, "peer_health": {"flaps_ts"}}
+EVENT_ID_SKIP = dict(skip_columns={"bgp_state_changes": {"id"}, "ospf_state_changes": {"id"}})
+TAILED_SKIP = dict(EVENT_ID_SKIP, skip_tables={"content_hashes"})
+DUPLICATE_SUFFIX = ("_bench_sa.txt", "_copy_sa.txt")  # same capture time, sorts after the original
+SHRINK_LINES = 5
+SHRUNK_SKIP = dict(EVENT_ID_SKIP, skip_tables={"bgp_peer_status", "ospf_peer_status", "peer_health"})
+
+
+def snapshot(db_path, skip_columns=None, skip_tables=()):
+    """table -> (columns, sorted rows) of every table, volatile and skipped columns left out."""
+    conn = sqlite3.connect(db_path)
+    try:
+        tables = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name")]
+        result = {}
+        for table in tables:
+            if table in skip_tables:
+                continue
+            skipped = VOLATILE_COLUMNS.get(table, set()) | (skip_columns or {}).get(table, set())
+            columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})") if row[1] not in skipped]
+            rows = conn.execute(f"SELECT {', '.join(columns)} FROM {table}").fetchall()
+            result[table] = (columns, sorted(rows, key=repr))
+        return result
+    finally:
+        conn.close()
+
+
+def compare(reference, other):
+    """Messages for every table whose rows differ between two snapshots of the same shape."""
+    problems = []
+    for table, (columns, rows) in reference.items():
+        if table not in other:
+            problems.append(f"{table}: missing")
+            continue
+        other_rows = other[table][1]
+        if rows == other_rows:
+            continue
+        row_set, other_set = set(rows), set(other_rows)
+        missing = [row for row in rows if row not in other_set]
+        extra = [row for row in other_rows if row not in row_set]
+        problems.append(f"{table}: {len(rows)} rows vs {len(other_rows)}, {len(missing)} missing, {len(extra)} extra "
+                        f"({', '.join(columns)})")
+        for label, sample in (("-", missing[:2]), ("+", extra[:2])):
+            problems.extend(f"  {label} {row}" for row in sample)
+    return problems
+
+
+class Run:
+    """One ingestion of a fresh copy of the corpus into its own database."""
+
+    def __init__(self, work_dir, source_dir, name):
+        self.work_dir, self.source_dir = work_dir, source_dir
+        self.log_dir = os.path.join(work_dir, name, "core_logs")
+        self.db_path = os.path.join(work_dir, name, "network_core.db")
+        shutil.copytree(source_dir, self.log_dir)  # copy2: same mtimes, so processed_files rows compare too
+        self.paths = sorted(os.path.join(self.log_dir, name) for name in os.listdir(self.log_dir))
+
+    def ingest(self, workers=1):
+        mainconfig.CORE_LOGS_DIR = self.log_dir
+        if not analysis_sqlite.main(workers=workers, db_path=self.db_path):
+            raise RuntimeError(f"analysis_sqlite.main found nothing to ingest in {self.log_dir}")
+
+    def archive(self, member_bytes):
+        for path in self.paths:
+            log_archive.compress_log(path, member_bytes=member_bytes)
+
+    def truncate(self):
+        """Cut every log at the line end nearest half its size; returns the removed tails to append later."""
+        tails = {}
+        for path in self.paths:
+            with open(path, "rb") as f:
+                data = f.read()
+            cut = data.rfind(b"\n", 0, len(data) // 2) + 1
+            st = os.stat(path)
+            with open(path, "wb") as f:
+                f.write(data[:cut])
+            tails[path] = (data[cut:], st)
+        return tails
+
+    def append(self, tails):
+        """Append the tails removed by truncate() and restore the original mtimes."""
+        for path, (tail, st) in tails.items():
+            with open(path, "ab") as f:
+                f.write(tail)
+            os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    def shrink(self, lines):
+        """Drop the last `lines` lines of every log (a re-collected, shorter capture), keeping the mtime."""
+        for path in self.paths:
+            st = os.stat(path)
+            with open(path, "rb") as f:
+                data = f.read()
+            with open(path, "wb") as f:
+                f.write(b"".join(data.splitlines(keepends=True)[:-lines]))
+            os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+
+def scenario_parallel(run, args):
+    run.ingest(args.workers)
+    return snapshot(run.db_path), []
+
+
+def scenario_archived(run, args):
+    run.archive(args.member_bytes)
+    run.ingest()
+    return snapshot(run.db_path), []
+
+
+def scenario_archived_parallel(run, args):
+    run.archive(args.member_bytes)
+    run.ingest(args.workers)
+    return snapshot(run.db_path), []
+
+
+def scenario_tailed(run, args):
+    tails = run.truncate()
+    run.ingest()
+    run.append(tails)
+    run.ingest()
+    return snapshot(run.db_path, **TAILED_SKIP), []
+
+
+def scenario_tailed_archived(run, args):
+    tails = run.truncate()
+    run.ingest()
+    run.append(tails)
+    run.archive(args.member_bytes)
+    run.ingest()
+    return snapshot(run.db_path, **TAILED_SKIP), []
+
+
+def scenario_duplicate(run, args):
+    original = run.paths[0]
+    copy = original.replace(*DUPLICATE_SUFFIX)
+    shutil.copy2(original, copy)
+    run.ingest()
+    problems = []
+    conn = sqlite3.connect(run.db_path)
+    try:
+        row = conn.execute("SELECT size, offset FROM processed_files WHERE filename = ?",
+                           (os.path.basename(copy),)).fetchone()
+        conn.execute("DELETE FROM processed_files WHERE filename = ?", (os.path.basename(copy),))
+        conn.commit()
+    finally:
+        conn.close()
+    if row is None or row[0] != row[1]:
+        problems.append(f"processed_files: {os.path.basename(copy)} not recorded as fully read ({row})")
+    return snapshot(run.db_path), problems
+
+
+def scenario_shrunk(run, args):
+    run.ingest()
+    run.shrink(SHRINK_LINES)
+    run.ingest()
+    fresh = Run(run.work_dir, run.source_dir, "shrunk_fresh")
+    fresh.shrink(SHRINK_LINES)
+    fresh.ingest()
+    return None, compare(snapshot(fresh.db_path, **SHRUNK_SKIP), snapshot(run.db_path, **SHRUNK_SKIP))
+
+
+SCENARIOS = [
+    ("parallel", scenario_parallel, None),
+    ("archived", scenario_archived, None),
+    ("archived parallel", scenario_archived_parallel, None),
+    ("tailed", scenario_tailed, TAILED_SKIP),
+    ("tailed archived", scenario_tailed_archived, TAILED_SKIP),
+    ("duplicate", scenario_duplicate, None),
+    ("shrunk", scenario_shrunk, None),  # has its own reference
+]
+
+
+def check_history_pages(db_path, page_rows):
+    """Every peer's history read page by page (next cursor = (ts, seq) of the last row) equals one unpaged read."""
+    problems = []
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        peers = 0
+        for protocol, tables in monitor.PEER_HISTORY_TABLES.items():
+            neighbor = tables["neighbor_column"]
+            for hostname, ip in conn.execute(f"SELECT DISTINCT hostname, {neighbor} FROM {tables['table']}").fetchall():
+                peers += 1
+                full = [tuple(row) for row in monitor.get_peer_history(conn, hostname, protocol, ip)]
+                paged, cursor = [], None
+                while True:
+                    page = monitor.get_peer_history(conn, hostname, protocol, ip, cursor=cursor, limit=page_rows)
+                    paged.extend(tuple(row) for row in page)
+                    if len(page) < page_rows or len(paged) > len(full):
+                        break
+                    cursor = (page[-1]["ts"], page[-1]["seq"])
+                if paged != full:
+                    problems.append(f"{protocol} {hostname} {ip}: {len(paged)} paged rows vs {len(full)} unpaged")
+        if not peers:
+            problems.append("no peer history to page through")
+    finally:
+        conn.close()
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that every ingestion path gives the database a serial run does.")
+    parser.add_argument("--count", type=int, default=12, help="captures in the corpus (default: 12)")
+    parser.add_argument("--seed", type=int, default=1, help="generator seed (default: 1)")
+    parser.add_argument("--bgp-peers", type=int, default=6, help="BGP peers per device (default: 6)")
+    parser.add_argument("--ospf-peers", type=int, default=5, help="OSPF neighbors per process (default: 5)")
+    parser.add_argument("--log-lines", type=int, default=400, help="log buffer entries per capture (default: 400)")
+    parser.add_argument("--workers", type=int, default=3, help="parser processes of the parallel runs (default: 3)")
+    parser.add_argument("--member-bytes", type=int, default=4096,
+                        help="gzip member size of the archived runs, small so offsets cross members (default: 4096)")
+    parser.add_argument("--page-rows", type=int, default=7, help="history page size (default: 7)")
+    parser.add_argument("--keep", action="store_true", help="keep the work directory")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    work_dir = tempfile.mkdtemp(prefix="check_ingest_")
+    failures = 0
+    try:
+        source_dir = os.path.join(work_dir, "corpus")
+        paths = log_generator.write_captures(source_dir, args.count, args.seed, args.bgp_peers, args.ospf_peers,
+                                             args.log_lines)
+        print(f"Corpus: {len(paths)} captures, {sum(os.path.getsize(p) for p in paths) / 1048576:.1f} MB in {work_dir}")
+
+        reference = Run(work_dir, source_dir, "serial")
+        reference.ingest()
+        expected = {None: snapshot(reference.db_path)}
+        counts = ", ".join(f"{table}={len(rows)}" for table, (_, rows) in expected[None].items())
+        print(f"ok   {'serial':<20} {counts}")
+
+        for name, fn, skip in SCENARIOS:
+            key = repr(skip)
+            if key not in expected:
+                expected[key] = snapshot(reference.db_path, **(skip or {}))
+            try:
+                result, problems = fn(Run(work_dir, source_dir, name.replace(" ", "_")), args)
+                if result is not None:
+                    problems = problems + compare(expected[key], result)
+            except Exception as e:
+                problems = [f"{type(e).__name__}: {e}"]
+            failures += bool(problems)
+            print(f"{'FAIL' if problems else 'ok  '} {name:<20}")
+            for message in problems:
+                print(f"       !! {message}")
+
+        problems = check_history_pages(reference.db_path, args.page_rows)
+        failures += bool(problems)
+        print(f"{'FAIL' if problems else 'ok  '} {'history pages':<20} {args.page_rows} rows per page")
+        for message in problems[:10]:
+            print(f"       !! {message}")
+    finally:
+        close_all()
+        if args.keep:
+            print(f"Work directory kept: {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"{failures} scenario(s) differ from the serial run" if failures else "All ingestion paths match the serial run")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
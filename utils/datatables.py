@@ -0,0 +1,187 @@
+# datatables.py
+# 202601 Server-side processing for jquery.dataTables (static/js/jquery.dataTables-1.13.6.min.js):
+# paging, ordering, global search and per-column search run in SQLite, the browser gets only the rows it shows.
+#   request:  draw, start, length, search[value],
+#             columns[i][data|searchable|orderable], columns[i][search][value], order[i][column|dir]
+#   response: {"draw", "recordsTotal", "recordsFiltered", "data": [row dicts]}
+# A table is described by a spec dict (see routers/monitor.py DASHBOARD_TABLES):
+#   source      SELECT whose result columns are the DataTables "data" names
+#   columns     names the client may search / order on; anything else it sends is ignored
+#   order_by    optional {column: SQL expression} used instead of the column when ordering
+#   order       default [(column, "asc"|"desc"), ...] when the client sends none
+#   key         unique columns appended to every ORDER BY so consecutive pages never overlap or skip rows
+#   table       optional base table of source with one row per source row (source only joins columns onto it):
+#               the unfiltered count runs on it instead of on source
+#   seek        optional {column: expression on table} for orderings an index of table walks: deep pages of the
+#               unfiltered table start at a keyset bound found on that index, not at an OFFSET over source
+
+import re
+import mainconfig as mainconfig
+
+logger = mainconfig.setup_module_logger(__name__)
+
+MAX_PAGE_LENGTH = 1000  # length=-1 ("All") and larger requests are capped to this many rows
+SEEK_MIN_START = 1000   # pages starting this deep use the spec's seek (OFFSET over source joins every skipped row)
+
+LIKE_SQL = "LIKE ? ESCAPE '\\'"   # case-insensitive substring match, like the old client-side filterTable
+_PARAM_REGEX = re.compile(r"^(columns|order)\[(\d+)\]\[(\w+)\](?:\[(\w+)\])?$")
+
+
+def _int(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def parse_request(query_params):
+    """DataTables server-side parameters from a query string mapping (e.g. starlette QueryParams)."""
+    columns, order = {}, {}
+    for name, value in query_params.items():
+        match = _PARAM_REGEX.match(name)
+        if not match:
+            continue
+        group, index, field, sub = match.groups()
+        target = (columns if group == "columns" else order).setdefault(int(index), {})
+        target[f"{field}_{sub}" if sub else field] = value
+    length = _int(query_params.get("length"), 10)
+    return {
+        "draw": _int(query_params.get("draw"), 0),
+        "start": max(0, _int(query_params.get("start"), 0)),
+        "length": MAX_PAGE_LENGTH if length < 0 else min(length, MAX_PAGE_LENGTH),
+        "search": (query_params.get("search[value]") or "").strip(),
+        "columns": [columns[i] for i in sorted(columns)],
+        "order": [order[i] for i in sorted(order)],
+    }
+
+
+def _quote(name):
+    return f'"{name}"'
+
+
+def _like(value):
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _where(spec, request):
+    clauses, args = [], []
+    allowed = set(spec["columns"])
+    column_names = [c.get("data") for c in request["columns"]]
+    if request["search"]:
+        searchable = [c["data"] for c in request["columns"]
+                      if c.get("data") in allowed and c.get("searchable", "true") == "true"] or spec["columns"]
+        clauses.append("(" + " OR ".join(f"{_quote(name)} {LIKE_SQL}" for name in searchable) + ")")
+        args.extend(_like(request["search"]) for _ in searchable)
+    for name, column in zip(column_names, request["columns"]):
+        value = (column.get("search_value") or "").strip()
+        if value and name in allowed:
+            clauses.append(f"{_quote(name)} {LIKE_SQL}")
+            args.append(_like(value))
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", args
+
+
+def _order_terms(spec, request):
+    """[(column, "ASC"|"DESC"), ...] the client asked for, or the spec's default order."""
+    terms = []
+    for item in request["order"]:
+        index = _int(item.get("column"), -1)
+        if not 0 <= index < len(request["columns"]):
+            continue
+        name = request["columns"][index].get("data")
+        if name not in spec["columns"] or request["columns"][index].get("orderable", "true") != "true":
+            continue
+        terms.append((name, "DESC" if item.get("dir") == "desc" else "ASC"))
+    return terms or [(name, direction.upper()) for name, direction in spec.get("order", [])]
+
+
+def _order_by(spec, request):
+    expressions = spec.get("order_by", {})
+    terms = _order_terms(spec, request)
+    sql = [f"{expressions.get(name, _quote(name))} {direction}" for name, direction in terms]
+    sql.extend(f"{_quote(name)} ASC" for name in spec.get("key", []) if name not in dict(terms))
+    return (" ORDER BY " + ", ".join(sql)) if sql else ""
+
+
+def count_sql(spec):
+    """Unfiltered row count query of a table spec: on spec["table"] when it has one, else over source."""
+    return f"SELECT COUNT(*) FROM {spec['table'] if 'table' in spec else '(' + spec['source'] + ')'}"
+
+
+def count_rows(conn, spec):
+    """Unfiltered row count of a table spec (the tab badges on the dashboard, recordsTotal)."""
+    return conn.execute(count_sql(spec)).fetchone()[0]
+
+
+def page_sql(spec, request):
+    """(page query, filter-only query, args) for a parsed request; the page query takes LIMIT / OFFSET last."""
+    source = f"SELECT * FROM ({spec['source']})"
+    where, args = _where(spec, request)
+    return (f"{source}{where}{_order_by(spec, request)} LIMIT ? OFFSET ?",
+            f"SELECT COUNT(*) FROM ({source}{where})" if where else None, args)
+
+
+def seek_sql(spec, request):
+    """
+    202601 Keyset form of a deep unfiltered page, or None when the request cannot use it (search, or the first
+    ORDER BY column not in spec["seek"]). Returns (bound query, before query, page query, nulls_after):
+      bound   (start) -> the first order value of the page, found on the index of spec["table"] alone
+      before  (value) -> rows ordered ahead of that value, so the page only skips rows sharing it
+      page    (value, length, offset) -> the page from source, ranged on the first order column
+    NULLs sort first ascending and last descending; a NULL bound is queried with "IS NULL" by the caller, and a
+    descending page that runs into the NULL rows (nulls_after, page short) has to fall back to OFFSET.
+    """
+    if request["start"] < SEEK_MIN_START or "seek" not in spec or _where(spec, request)[0]:
+        return None
+    name, direction = _order_terms(spec, request)[0]
+    expression = spec["seek"].get(name)
+    if expression is None:
+        return None
+    table, descending = spec["table"], direction == "DESC"
+    bound = f"SELECT {expression} FROM {table} ORDER BY {expression} {direction} LIMIT 1 OFFSET ?"
+    before = (f"SELECT COUNT(*) FROM {table} WHERE {expression} > ?" if descending else
+              f"SELECT COUNT(*) FROM {table} WHERE {expression} < ? OR {expression} IS NULL")
+    nulls = f"SELECT 1 FROM {table} WHERE {expression} IS NULL LIMIT 1" if descending else "SELECT NULL WHERE 0"
+    ordered = spec.get("order_by", {}).get(name, _quote(name))
+    page = (f"SELECT * FROM ({spec['source']}) WHERE {ordered} {'<=' if descending else '>='} ?"
+            f"{_order_by(spec, request)} LIMIT ? OFFSET ?")
+    return bound, before, nulls, page
+
+
+def _seek_page(conn, spec, request):
+    """Rows of a deep page through seek_sql, or None to run the OFFSET page query instead."""
+    queries = seek_sql(spec, request)
+    if queries is None:
+        return None
+    bound_query, before_query, nulls_query, page_query = queries
+    bound = conn.execute(bound_query, (request["start"],)).fetchone()
+    if bound is None:
+        return []
+    if bound[0] is None:
+        # the page starts in the NULL rows, which the range below cannot select
+        return None
+    before = conn.execute(before_query, (bound[0],)).fetchone()[0]
+    rows = conn.execute(page_query, (bound[0], request["length"], request["start"] - before)).fetchall()
+    if len(rows) < request["length"] and conn.execute(nulls_query).fetchone():
+        # a short page that may continue into the NULL rows
+        return None
+    return rows
+
+
+def server_side(conn, spec, query_params, prepare_row=None):
+    """
+    One DataTables server-side response for spec. conn needs row_factory=sqlite3.Row.
+    prepare_row(dict) may add display fields (e.g. DT_RowClass) to each returned row.
+    """
+    request = parse_request(query_params)
+    page, count, args = page_sql(spec, request)
+    total = count_rows(conn, spec)
+    filtered = conn.execute(count, args).fetchone()[0] if count else total
+    rows = _seek_page(conn, spec, request)
+    if rows is None:
+        rows = conn.execute(page, args + [request["length"], request["start"]]).fetchall()
+    data = [dict(row) for row in rows]
+    if prepare_row:
+        for row in data:
+            prepare_row(row)
+    return {"draw": request["draw"], "recordsTotal": total, "recordsFiltered": filtered, "data": data}
@@ -0,0 +1,149 @@
+# db_connection.py
+# 202601 Shared SQLite connection layer for network_core.db, orion_data.db and task_status.db.
+#  - WAL journal: dashboard readers and the ingestion writer no longer block each other
+#  - tuned pragmas (synchronous / cache_size / mmap_size / busy_timeout) from mainconfig
+#  - per-thread pooled read connections (query_only), reused across requests on the same thread
+#  - one serialized writer connection per database, guarded by a lock
+#  - generation(): a token that changes on every commit, for caches of query results (utils/response_cache.py)
+
+import os, sqlite3, threading, uuid
+from contextlib import contextmanager
+import mainconfig as mainconfig
+
+logger = mainconfig.setup_module_logger(__name__)
+
+
+def connect(db_path, readonly=False, check_same_thread=True):
+    """Open a tuned connection: WAL journal plus the mainconfig SQLITE_* pragmas."""
+    conn = sqlite3.connect(db_path, timeout=mainconfig.SQLITE_BUSY_TIMEOUT_MS / 1000,
+                           check_same_thread=check_same_thread)
+    conn.execute(f"PRAGMA busy_timeout = {int(mainconfig.SQLITE_BUSY_TIMEOUT_MS)}")
+    if not readonly:
+        # journal_mode is stored in the database file; setting it needs a write lock, so writers do it
+        conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute(f"PRAGMA synchronous = {mainconfig.SQLITE_SYNCHRONOUS}")
+    conn.execute(f"PRAGMA cache_size = -{int(mainconfig.SQLITE_CACHE_KB)}")
+    conn.execute(f"PRAGMA mmap_size = {int(mainconfig.SQLITE_MMAP_BYTES)}")
+    if readonly:
+        conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+def _is_open(conn):
+    try:
+        conn.total_changes
+        return True
+    except sqlite3.ProgrammingError:
+        return False
+
+
+class SQLiteDatabase:
+    """One database file: pooled per-thread readers and a single lock-guarded writer."""
+
+    def __init__(self, db_path):
+        self.db_path = str(db_path)
+        self._local = threading.local()
+        self._write_lock = threading.RLock()
+        self._write_conn = None
+        self._readers = []  # every reader handed out, so close() can reach other threads' connections
+        self._readers_lock = threading.Lock()
+        self._version_lock = threading.Lock()
+        self._version_conn = None
+        self._version_token = None
+
+    def reader(self, row_factory=None):
+        """
+        The calling thread's read connection (query_only), opened on first use and kept for reuse.
+        Callers may close() it; a closed connection is replaced on the next call.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None or not _is_open(conn):
+            if not os.path.exists(self.db_path):
+                # Readers never create the file; setup code opens a writer first
+                raise sqlite3.OperationalError(f"Database file not found: {self.db_path}")
+            conn = connect(self.db_path, readonly=True)
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers = [c for c in self._readers if _is_open(c)] + [conn]
+        conn.row_factory = row_factory
+        return conn
+
+    @contextmanager
+    def writer(self, row_factory=None):
+        """
+        Serialized write access: yields the shared write connection while holding the database lock.
+        Commits on success and rolls back on error. Re-entrant within the same thread.
+        """
+        with self._write_lock:
+            if self._write_conn is None or not _is_open(self._write_conn):
+                self._write_conn = connect(self.db_path, check_same_thread=False)
+            conn = self._write_conn
+            conn.row_factory = row_factory
+            try:
+                yield conn
+                if conn.in_transaction:
+                    conn.commit()
+            except Exception:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+
+    def generation(self):
+        """
+        Token that changes whenever any connection, in this process or another, commits to the database:
+        PRAGMA data_version of a connection kept for this alone (a connection's own commits do not change it,
+        so this one never writes). None while the file does not exist.
+        """
+        with self._version_lock:
+            if self._version_conn is None or not _is_open(self._version_conn):
+                if not os.path.exists(self.db_path):
+                    return None
+                self._version_conn = connect(self.db_path, readonly=True, check_same_thread=False)
+                # data_version restarts on a new connection; the token keeps old values from matching again
+                self._version_token = uuid.uuid4().hex[:12]
+            version = self._version_conn.execute("PRAGMA data_version").fetchone()[0]
+            return f"{self._version_token}.{version}"
+
+    @property
+    def write_lock(self):
+        """Lock for code that writes through its own connection (e.g. OrionDatabaseManager)."""
+        return self._write_lock
+
+    def close(self):
+        with self._write_lock:
+            if self._write_conn is not None:
+                self._write_conn.close()
+                self._write_conn = None
+        with self._version_lock:
+            if self._version_conn is not None:
+                self._version_conn.close()
+                self._version_conn = None
+        with self._readers_lock:
+            for conn in self._readers:
+                try:
+                    conn.close()
+                except sqlite3.ProgrammingError:
+                    pass  # owned by another thread; it is dropped with that thread
+            self._readers = []
+        self._local = threading.local()
+
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(db_path):
+    """Process-wide SQLiteDatabase for db_path (one writer and one reader pool per file)."""
+    key = os.path.abspath(str(db_path))
+    with _databases_lock:
+        db = _databases.get(key)
+        if db is None:
+            db = _databases[key] = SQLiteDatabase(key)
+        return db
+
+
+def close_all():
+    """Close every pooled connection, e.g. on application shutdown."""
+    with _databases_lock:
+        for db in _databases.values():
+            db.close()
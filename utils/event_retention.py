@@ -0,0 +1,249 @@
+# event_retention.py
+# 202601 Retention for bgp_state_changes / ospf_state_changes, which otherwise grow without bound.
+#  - raw events older than EVENT_RAW_RETENTION_DAYS are rolled into one row per peer and hour
+#    (bgp_state_rollup / ospf_state_rollup, period 'hourly') and deleted
+#  - hourly rows older than EVENT_HOURLY_RETENTION_DAYS are merged into one row per peer and day ('daily')
+#  - daily rows older than EVENT_DAILY_RETENTION_DAYS are deleted (0 keeps them)
+#  - freed pages go back to the OS with PRAGMA incremental_vacuum
+# Each rollup row keeps the flap count, first/last transition and the time spent up / down in the bucket.
+# The dashboard reads both tiers through the bgp_state_history / ospf_state_history views (analysis_sqlite.py).
+# Runs daily on the main.py scheduler; every day of events is rolled and deleted in its own transaction,
+# so readers never see an event twice or not at all, and ingestion only waits for one day's worth.
+
+import os, time, sqlite3
+from datetime import datetime, timedelta
+from itertools import groupby
+import mainconfig as mainconfig
+import utils.analysis_sqlite as analysis_sqlite
+import utils.peer_health as peer_health
+from utils.db_connection import get_database
+
+logger = mainconfig.setup_module_logger(__name__)
+
+HOUR = 3600
+DAY = 86400
+
+# protocol -> raw table, rollup table, peer key columns
+PROTOCOLS = {
+    "bgp": {"table": "bgp_state_changes", "rollup": "bgp_state_rollup",
+            "keys": ("hostname", "vpn_instance", "neighbor_ip")},
+    "ospf": {"table": "ospf_state_changes", "rollup": "ospf_state_rollup",
+             "keys": ("hostname", "process", "neighbor_address", "interface")},
+}
+
+ROLLUP_VALUE_COLUMNS = ("transitions", "flaps", "first_ts", "last_ts", "first_from_state", "last_to_state",
+                        "up_seconds", "down_seconds")
+
+
+def is_up(protocol, state):
+    """Established (BGP) / Full (OSPF); analysis_sqlite.BGP_FLAP_SQL / OSPF_FLAP_SQL use the same test."""
+    state = (state or "").upper()
+    return state == "ESTABLISHED" if protocol == "bgp" else state.startswith("FULL")
+
+
+def bucket_bounds(ts, period):
+    """(start, end) epoch of the hourly / daily (local midnight) bucket holding ts."""
+    if period == "hourly":
+        start = ts - ts % HOUR
+        return start, start + HOUR
+    day = datetime.fromtimestamp(ts).replace(hour=0, minute=0, second=0, microsecond=0)
+    return int(day.timestamp()), int((day + timedelta(days=1)).timestamp())
+
+
+def aggregate(protocol, segments, start, end):
+    """
+    Fold time-ordered segments of one peer into one rollup row for the bucket [start, end).
+    A segment is (seg_start, seg_end, first_ts, last_ts, from_state, to_state, transitions, flaps, up_s, down_s):
+    a raw event spans no time (seg_start == seg_end == ts), an hourly row its whole hour.
+    Time between segments is spent in the state the previous one left the peer in; before the first,
+    in its from_state. Time in an unknown state (no from_state) counts as neither up nor down.
+    """
+    seconds = {True: 0, False: 0}
+
+    def spend(state, duration):
+        if state is not None and duration > 0:
+            seconds[is_up(protocol, state)] += duration
+
+    t, state = start, segments[0][4]
+    transitions = flaps = 0
+    for seg_start, seg_end, _, _, _, to_state, seg_transitions, seg_flaps, up_s, down_s in segments:
+        spend(state, seg_start - t)
+        seconds[True] += up_s
+        seconds[False] += down_s
+        transitions += seg_transitions
+        flaps += seg_flaps
+        t, state = max(t, seg_end), to_state
+    spend(state, end - t)
+    return {
+        "transitions": transitions,
+        "flaps": flaps,
+        "first_ts": min(segment[2] for segment in segments),
+        "last_ts": max(segment[3] for segment in segments),
+        "first_from_state": segments[0][4],
+        "last_to_state": segments[-1][5],
+        "up_seconds": seconds[True],
+        "down_seconds": seconds[False],
+    }
+
+
+def _write_rollups(cursor, spec, period, start, end, rollups):
+    """
+    Write rollups {(key, bucket_ts): row} for buckets in [start, end). A row already stored for the same
+    peer and bucket (events that arrived after their bucket was rolled up) is merged with the new one.
+    """
+    keys = spec["keys"]
+    width = len(keys) + 1
+    existing = {}
+    for stored in cursor.execute(
+            f"SELECT rowid, {', '.join(keys)}, bucket_ts, {', '.join(ROLLUP_VALUE_COLUMNS)} FROM {spec['rollup']} "
+            f"WHERE period = ? AND bucket_ts >= ? AND bucket_ts < ?", (period, start, end)):
+        existing[(tuple(stored[1:width]), stored[width])] = (stored[0], dict(zip(ROLLUP_VALUE_COLUMNS, stored[width + 1:])))
+    inserts, updates = [], []
+    for (key, bucket_ts), row in rollups.items():
+        if (key, bucket_ts) not in existing:
+            inserts.append((period, bucket_ts, *key, *(row[column] for column in ROLLUP_VALUE_COLUMNS)))
+            continue
+        rowid, old = existing[(key, bucket_ts)]
+        # Both rows already account for the whole bucket, so the stored up/down time is kept as is
+        merged = dict(old, transitions=old["transitions"] + row["transitions"], flaps=old["flaps"] + row["flaps"])
+        if row["first_ts"] < old["first_ts"]:
+            merged.update(first_ts=row["first_ts"], first_from_state=row["first_from_state"])
+        if row["last_ts"] >= old["last_ts"]:
+            merged.update(last_ts=row["last_ts"], last_to_state=row["last_to_state"])
+        updates.append((*(merged[column] for column in ROLLUP_VALUE_COLUMNS), rowid))
+    columns = ("period", "bucket_ts") + keys + ROLLUP_VALUE_COLUMNS
+    cursor.executemany(f"INSERT INTO {spec['rollup']} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", inserts)
+    cursor.executemany(f"UPDATE {spec['rollup']} SET {', '.join(f'{column} = ?' for column in ROLLUP_VALUE_COLUMNS)} WHERE rowid = ?",
+                       updates)
+
+
+def _fold(protocol, spec, rows, period):
+    """rows: (key..., segment...) ordered by key then time. Returns {(key, bucket_ts): rollup row}."""
+    width = len(spec["keys"])
+    rollups = {}
+    for key, peer_rows in groupby(rows, key=lambda row: row[:width]):
+        for (start, end), bucket_rows in groupby(peer_rows, key=lambda row: bucket_bounds(row[width], period)):
+            segments = [row[width:] for row in bucket_rows]
+            rollups[(key, start)] = aggregate(protocol, segments, start, end)
+    return rollups
+
+
+def _day_chunks(conn, sql_next, cutoff):
+    """Local day ranges [start, end) below cutoff that hold rows, found with sql_next(start) -> first ts >= start."""
+    start = conn.execute(sql_next, (0,)).fetchone()[0]
+    while start is not None and start < cutoff:
+        day_start, day_end = bucket_bounds(start, "daily")
+        yield day_start, min(day_end, cutoff)
+        start = conn.execute(sql_next, (day_end,)).fetchone()[0]
+
+
+def _flap_sql(protocol):
+    return analysis_sqlite.BGP_FLAP_SQL if protocol == "bgp" else analysis_sqlite.OSPF_FLAP_SQL
+
+
+def rollup_raw_events(db, protocol, cutoff):
+    """Roll raw events with ts < cutoff (aligned to an hour) into hourly rows and delete them. Returns (events, rows)."""
+    spec = PROTOCOLS[protocol]
+    keys = ", ".join(spec["keys"])
+    events = written = 0
+    with db.writer() as conn:
+        chunks = list(_day_chunks(conn, f"SELECT MIN(ts) FROM {spec['table']} WHERE ts >= ?", cutoff))
+    for start, end in chunks:
+        with db.writer() as conn:
+            cursor = conn.cursor()
+            rows = cursor.execute(
+                f"SELECT {keys}, ts, ts, ts, ts, from_state, to_state, 1, {_flap_sql(protocol)}, 0, 0 "
+                f"FROM {spec['table']} WHERE ts >= ? AND ts < ? ORDER BY {keys}, ts, id", (start, end)).fetchall()
+            rollups = _fold(protocol, spec, rows, "hourly")
+            _write_rollups(cursor, spec, "hourly", start, end, rollups)
+            written += len(rollups)
+            cursor.execute(f"DELETE FROM {spec['table']} WHERE ts >= ? AND ts < ?", (start, end))
+            events += cursor.rowcount
+    return events, written
+
+
+def rollup_hourly_rows(db, protocol, cutoff):
+    """Merge hourly rows with bucket_ts < cutoff (a local midnight) into daily rows. Returns (hourly, daily) rows."""
+    spec = PROTOCOLS[protocol]
+    keys = ", ".join(spec["keys"])
+    merged = written = 0
+    with db.writer() as conn:
+        chunks = list(_day_chunks(conn, f"SELECT MIN(bucket_ts) FROM {spec['rollup']} WHERE period = 'hourly' AND bucket_ts >= ?", cutoff))
+    for start, end in chunks:
+        with db.writer() as conn:
+            cursor = conn.cursor()
+            rows = cursor.execute(
+                f"SELECT {keys}, bucket_ts, bucket_ts + {HOUR}, first_ts, last_ts, first_from_state, last_to_state, "
+                f"transitions, flaps, up_seconds, down_seconds "
+                f"FROM {spec['rollup']} WHERE period = 'hourly' AND bucket_ts >= ? AND bucket_ts < ? ORDER BY {keys}, bucket_ts",
+                (start, end)).fetchall()
+            rollups = _fold(protocol, spec, rows, "daily")
+            _write_rollups(cursor, spec, "daily", start, end, rollups)
+            written += len(rollups)
+            cursor.execute(f"DELETE FROM {spec['rollup']} WHERE period = 'hourly' AND bucket_ts >= ? AND bucket_ts < ?", (start, end))
+            merged += cursor.rowcount
+    return merged, written
+
+
+def prune_daily_rows(db, protocol, cutoff):
+    spec = PROTOCOLS[protocol]
+    with db.writer() as conn:
+        return conn.execute(f"DELETE FROM {spec['rollup']} WHERE period = 'daily' AND bucket_ts < ?", (cutoff,)).rowcount
+
+
+def incremental_vacuum(db, pages=0):
+    """Return free pages to the OS (all if pages is 0). Databases created before auto_vacuum was set need one VACUUM."""
+    with db.writer() as conn:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            if not mainconfig.EVENT_VACUUM_CONVERT:
+                return 0
+            logger.info("Converting the database to auto_vacuum=INCREMENTAL (one-time full VACUUM)...")
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+            return 0
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        # frees one page per step and sqlite3's execute() steps once; executescript runs it to completion
+        conn.executescript(f"PRAGMA incremental_vacuum({int(pages)})" if pages else "PRAGMA incremental_vacuum")
+        return free - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+
+def run_event_retention(db_path=None, now=None):
+    """
+    Scheduled job (main.py): rollups, pruning and incremental vacuum for both protocols.
+    Returns a summary dict, or None if the database does not exist yet or the run failed.
+    """
+    db_path = db_path or mainconfig.DB_PATH
+    if not os.path.exists(db_path):
+        logger.warning(f"Database {db_path} not found; event retention skipped.")
+        return None
+    now = int(now or time.time())
+    # peer_health's recent changes and flap windows (up to 24 hours) come from raw rows, so keep at least a day;
+    # hourly rows must outlive raw events, or a late raw event could roll into a day already merged to 'daily'
+    raw_days = max(1, mainconfig.EVENT_RAW_RETENTION_DAYS)
+    hourly_days = max(raw_days + 1, mainconfig.EVENT_HOURLY_RETENTION_DAYS)
+    raw_cutoff = bucket_bounds(now - raw_days * DAY, "hourly")[0]
+    hourly_cutoff = bucket_bounds(now - hourly_days * DAY, "daily")[0]
+    daily_cutoff = bucket_bounds(now - mainconfig.EVENT_DAILY_RETENTION_DAYS * DAY, "daily")[0]
+
+    db = get_database(db_path)
+    summary = {}
+    t0 = time.perf_counter()
+    try:
+        with db.writer() as conn:
+            analysis_sqlite.setup_database(db_path, conn)
+        for protocol in PROTOCOLS:
+            events, hourly = rollup_raw_events(db, protocol, raw_cutoff)
+            merged, daily = rollup_hourly_rows(db, protocol, hourly_cutoff)
+            pruned = prune_daily_rows(db, protocol, daily_cutoff) if mainconfig.EVENT_DAILY_RETENTION_DAYS > 0 else 0
+            summary[protocol] = {"events_rolled": events, "hourly_rows": hourly, "hourly_merged": merged,
+                                 "daily_rows": daily, "daily_pruned": pruned}
+        # latest events may now be rollup rows (their timestamp / log file change); recompute every peer
+        with db.writer() as conn:
+            summary["peer_health"] = peer_health.rebuild(conn, now)
+        summary["pages_freed"] = incremental_vacuum(db, mainconfig.EVENT_VACUUM_PAGES)
+    except sqlite3.Error as e:
+        logger.error(f"Event retention failed: {e}", exc_info=True)
+        return None
+    summary["elapsed_s"] = round(time.perf_counter() - t0, 2)
+    logger.info(f"Event retention complete: {summary}")
+    return summary
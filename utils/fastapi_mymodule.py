@@ -21,6 +21,7 @@ if ROOT_DIR not in sys.path:
 
 import routers.monitor as monitor
 import mainconfig as mainconfig
+import utils.log_archive as log_archive
 logger = mainconfig.setup_module_logger(__name__)
 log_dir = mainconfig.CORE_LOGS_DIR    
 curr_dir= os.path.dirname(__file__)
@@ -49,16 +50,16 @@ def read_file(file_path):
         str: The content of the file.
         None: If the file does not exist or is empty.
     """
-    if not os.path.exists(file_path):
+    if not log_archive.log_exists(file_path):
         print(f"Error: File '{file_path}' does not exist.")
         return None
 
-    if os.path.getsize(file_path) == 0:
+    if log_archive.stat_log(file_path).st_size == 0:
         print(f"Error: File '{file_path}' is empty.")
         return None
 
     try:
-        with open(file_path, 'r') as file:
+        with log_archive.open_log(file_path, 'r') as file:
             content = file.read()
             return content
     except Exception as e:
@@ -204,7 +205,7 @@ def compare_peers(file1_path, file2_path):
     """
     try:
         # Open and read contents of both files
-        with open(file1_path, 'r') as file1, open(file2_path, 'r') as file2:
+        with log_archive.open_log(file1_path, 'r') as file1, log_archive.open_log(file2_path, 'r') as file2:
             content1 = file1.readlines()
             content2 = file2.readlines()
 
@@ -306,7 +307,8 @@ def send_command(device_setting,cmds,output, logger=None):
     
     return output
 
-def core_check(log_dir, fname, ip, nodeid, logger=None):
+def core_check(log_dir, fname, ip, nodeid, logger=None, result_log=None):
+    """HTML peer summary for one session log. result_log: a log_check / LogCheckCollector.result() dict already built for this file."""
     html_output = []
     fname = os.path.split(fname)[1]
     icon_tag = ""
@@ -324,16 +326,17 @@ def core_check(log_dir, fname, ip, nodeid, logger=None):
         html_output.append(' '.join(str(a) for a in args))
 
     # Check log file existence
-    if not os.path.exists(log_file_path):
+    if not log_archive.log_exists(log_file_path):
         logger.error(f"No file exists: {ip}, File: {log_file_path}")
         return "<p>Error: Log file does not exist.</p>"
-    elif os.path.getsize(log_file_path) == 0:
+    elif log_archive.stat_log(log_file_path).st_size == 0:
         return "<p>Error: Log file is empty.</p>"
     # else:
     #     logger.info(f"Starting core_check for IP: {ip}, File: {log_file_path}")
 
-    # Process log file
-    result_log = log_check(log_file_path, logger=None, label="Current Log file: ")
+    # Process log file, unless the caller already collected it during ingestion
+    if result_log is None:
+        result_log = log_check(log_file_path, logger=None, label="Current Log file: ")
     if result_log:
         # print(f"Log check result: {result_log}")
         try:
@@ -431,24 +434,273 @@ def core_check(log_dir, fname, ip, nodeid, logger=None):
 
     return "\n".join(html_output)
 
+# 202601 log_check's line loop as a collector fed one line at a time, so the ingestion pass
+# (analysis_sqlite.parse_log_file) can drive it and a fresh session log is read only once
+LOG_CHECK_IP_RE = re.compile(mainconfig.IP_PATTERN)
+LOG_CHECK_HOSTNAME_RE = re.compile(mainconfig.HOSTNAME_REGEX)
+LOG_CHECK_SEQ_RE = re.compile(r"^\d+:")
+LOG_CHECK_OSPF_PEER_RE = re.compile(r'(?:\d{1,3}\.){3}\d{1,3}\s+(?:\d{1,3}\.){3}\d{1,3}')
+
+class LogCheckCollector:
+    """
+    State machine behind log_check: feed() each line of a session log, then result()
+    returns the log_check dict and saves <ip>_log_analysis.json next to the log.
+    """
+
+    def __init__(self, log_file_path, logger=None, label="Log file"):
+        self.log_file_path = str(log_file_path)
+        self.logger = logger or mainconfig.setup_module_logger(__name__)
+        self.label = label
+        fname = os.path.split(self.log_file_path)[1]
+        ip_match = LOG_CHECK_IP_RE.search(fname)
+        self.ip = ip_match[0] if ip_match else "unknown"
+        self.output_json_path = os.path.join(os.path.dirname(self.log_file_path), f"{self.ip}_log_analysis.json")
+        self.lines_seen = 0
+        self.done = False           # an 'exit' line ends the capture
+        self.current_section = None
+        self.current_os = None
+        self.hostname = None
+        self.hostname_prompt = None
+        self.log_entries = []
+        self.current_entry = None
+        self.ipv4_peers = []
+        self.vpnv4_peers = []
+        self.ospf_peers = []
+        self.ospf_block = []
+        self.temp_bgp_block = None
+        self.temp_block = None
+
+    def _save_bgp_block(self):
+        if self.temp_bgp_block:
+            block_str = "\n".join(self.temp_bgp_block)
+            if self.current_section == "ipv4": self.ipv4_peers.append(block_str)
+            if self.current_section == "vpnv4": self.vpnv4_peers.append(block_str)
+
+    def _ospf_neighbor_line(self, stripped):
+        if "Neighbor" in stripped and "interface" in stripped:
+            if self.temp_block:
+                self.ospf_block.append("\n".join(self.temp_block))
+            self.temp_block = [stripped]
+        elif self.temp_block is not None:
+            self.temp_block.append(stripped)
+
+    def feed(self, line):
+        self.lines_seen += 1
+        if self.done:
+            return
+        stripped = line.strip()
+
+        # Extract hostname
+        if self.hostname is None:
+            hostname_match = LOG_CHECK_HOSTNAME_RE.match(stripped)
+            if hostname_match:
+                self.hostname = hostname_match.group(2)  # Extract the hostname
+                self.hostname_prompt = hostname_match[0]
+                if self.hostname_prompt + 'display' in stripped:
+                    self.current_os = 'hpe'
+                elif self.hostname_prompt + 'show' in stripped:
+                    self.current_os = 'cisco_ios'
+            else:
+                return  # Skip lines without a hostname
+        hostname_prompt = self.hostname_prompt
+
+        # Start the loop from the line where the content is matched
+        if 'exit' in stripped:
+            self.current_section = 'exit'
+            self.done = True
+            return
+        if hostname_prompt + 'display log' in stripped:
+            self.current_section = 'log'
+            self.current_os = 'hpe'
+        if hostname_prompt + 'show log ' in stripped:
+            self.current_section = 'log'
+            self.current_os = 'cisco_ios'
+            return
+
+        if hostname_prompt + 'show logging ' in stripped:
+            self.current_section = 'log'
+            self.current_os = 'arista_eos'
+            return
+
+        if self.current_section == 'log':
+            if self.current_os == 'hpe':
+                if line.startswith("%"):
+                    if self.current_entry:
+                        self.log_entries.append(self.current_entry)
+                    self.current_entry = line.rstrip()
+                elif line.startswith(" "):
+                    if self.current_entry is not None:
+                        self.current_entry += "\n" + line.rstrip()
+            else:  # Cisco / Arista
+                if LOG_CHECK_SEQ_RE.match(stripped) or "%" in line:  # seq: or %
+                    if self.current_entry:
+                        self.log_entries.append(self.current_entry)
+                    self.current_entry = line.rstrip()
+                elif line.startswith(" "):
+                    if self.current_entry is not None:
+                        self.current_entry += "\n" + line.rstrip()
+
+        # Check for hpe status
+        if self.current_os == 'hpe':
+            if hostname_prompt+"display bgp peer ipv4" == stripped:
+                self.current_section = "ipv4"
+                return
+            elif hostname_prompt+"display bgp peer ipv4 vpn-instance-all" == stripped:
+                self.current_section = "vpnv4"
+                return
+            elif hostname_prompt+"display ospf peer" in stripped:
+                self.current_section = "ospf"
+                return
+            if LOG_CHECK_IP_RE.search(stripped):
+                fields = stripped.split()
+                if self.current_section == "ipv4" and len(fields) >= 8:
+                    self.ipv4_peers.append(stripped)
+                if self.current_section == "vpnv4" and len(fields) >= 8:
+                    self.vpnv4_peers.append(stripped)
+                if self.current_section == "ospf" :
+                    if LOG_CHECK_OSPF_PEER_RE.search(stripped):
+                        self.ospf_peers.append(stripped)
+
+        # Check for cisco_ios status
+        if self.current_os == 'cisco_ios':
+            if "For address family:" in stripped:
+                # Before switching families, save any block currently in progress
+                self._save_bgp_block()
+                self.temp_bgp_block = [] # Reset for new family
+
+                if "IPv4 Unicast" in stripped:
+                    self.current_section = "ipv4"
+                elif "VPNv4 Unicast" in stripped:
+                    self.current_section = "vpnv4"
+                return
+
+            # Logic to catch the BGP Neighbor block
+            if "BGP neighbor is" in stripped:
+                # Save the previous neighbor's block before starting a new one
+                self._save_bgp_block()
+                self.temp_bgp_block = [stripped]
+            elif self.temp_bgp_block:
+                # Append the Description, Version, and State lines
+                self.temp_bgp_block.append(stripped)
+
+            elif "show ip ospf" in stripped:
+                self.current_section = "ospf"
+                return
+
+            if self.current_section == "ospf" :
+                self._ospf_neighbor_line(stripped)
+
+        # Check for arista_eos status
+        if self.current_os == 'arista_eos':
+            if "BGP summary information for VRF default" == stripped:
+                self.current_section = "ipv4"
+                return
+            elif "BGP neighbor" in stripped:
+                self.current_section = "vpnv4"
+                return
+            elif "show ip ospf" in stripped:
+                self.current_section = "ospf"
+                return
+
+            if self.current_section == "ipv4" and "BGP state" in stripped:
+                self.ipv4_peers.append(stripped)
+
+            if self.current_section == "vpnv4" and "BGP state" in stripped:
+                self.vpnv4_peers.append(stripped)
+
+            if self.current_section == "ospf" :
+                self._ospf_neighbor_line(stripped)
+
+    def result(self):
+        """Finish the capture: summarise peers and log entries, save the JSON report, return the log_check dict."""
+        logger = self.logger
+        current_os, hostname = self.current_os, self.hostname
+        ipv4_peers, vpnv4_peers, ospf_peers = self.ipv4_peers, self.vpnv4_peers, self.ospf_peers
+        print_match = []
+        log_content = ""
+        summary_content = ""
+
+        # the last log entry
+        log_entries = list(self.log_entries)
+        if self.current_entry:
+            log_entries.append(self.current_entry)
+
+        if self.temp_bgp_block:
+            block_str = "\n".join(self.temp_bgp_block)
+            if self.current_section == "ipv4": ipv4_peers = ipv4_peers + [block_str]
+            if self.current_section == "vpnv4": vpnv4_peers = vpnv4_peers + [block_str]
+        if current_os == 'cisco_ios':
+            ipv4_peers =  bgp_summary(current_os, ipv4_peers)
+            vpnv4_peers = bgp_summary(current_os, vpnv4_peers)
+
+        # FIX: Catch the final OSPF neighbor block
+        ospf_block = list(self.ospf_block)
+        if self.temp_block:
+            ospf_block.append("\n".join(self.temp_block))
+
+        if ospf_block:
+            ospf_peers = ospf_summary(ospf_block)
+
+        # Now filter by your log_regex
+        filtered_entries = [entry for entry in log_entries if re.search(mainconfig.LOG_REGEX, entry)]
+        if filtered_entries:
+            log_content = "<br>".join(filtered_entries)
+            print_match.append(
+                "<tr><td><p style=\"background-color:Orange;\">{}</p></td></tr>".format(log_content)
+            )
+            summary_content = log_summary("\n".join(filtered_entries), hostname, self.ip)
+
+        count_ipv4, count_vpnv4, count_ospf = peer_counts(current_os, ipv4_peers, vpnv4_peers, ospf_peers)
+
+        # Save the log analysis to a JSON file
+        try:
+            with open(self.output_json_path, "w") as json_file:
+                json.dump({
+                    "hostname"      : hostname,
+                    "current_os"    : current_os,
+                    "print_match"   : print_match,
+                    "ipv4_peers"    : ipv4_peers,
+                    "vpnv4_peers"   : vpnv4_peers,
+                    "ospf_peers"    : ospf_peers,
+                }, json_file, indent=4)
+            if logger:
+                logger.info(f"Log analysis saved to {self.output_json_path}")
+        except Exception as e:
+            if logger:
+                logger.error(f"Failed to save log analysis JSON: {e}")
+
+        return {
+            "label"         : self.label,
+            "current_os"    : current_os,
+            "ip"            : self.ip,
+            "hostname"      : hostname,
+            "log_content"   : log_content,
+            "summary_content": summary_content,
+            "print_match"   : print_match,
+            "ipv4_peers"    : ipv4_peers,
+            "count_ipv4"    : count_ipv4,
+            "vpnv4_peers"   : vpnv4_peers,
+            "count_vpnv4"   : count_vpnv4,
+            "ospf_peers"    : ospf_peers,
+            "count_ospf"    : count_ospf,
+        }
+
+def peer_counts(current_os, ipv4_peers, vpnv4_peers, ospf_peers):
+    """Established / Full peer counts for the log_check summary."""
+    count_ipv4 = count_vpnv4 = count_ospf = 0
+    if current_os == 'arista_eos' or current_os == 'cisco_ios':
+        count_ipv4 = sum(1 for line in ipv4_peers if not "Idle" in line)
+        count_vpnv4 = sum(1 for line in vpnv4_peers if not "Idle" in line)
+        count_ospf = sum(1 for line in ospf_peers if "FULL" in line)
+    elif current_os == 'hpe':
+        count_ipv4 = sum(1 for line in ipv4_peers if "Established" in line)
+        count_vpnv4 = sum(1 for line in vpnv4_peers if "Established" in line)
+        count_ospf = sum(1 for line in ospf_peers if "Full" in line)
+    return count_ipv4, count_vpnv4, count_ospf
+
 def log_check(log_file_path, logger=None, label="Log file"):
-    log_dir = os.path.dirname(log_file_path)
     fname = os.path.split(log_file_path)[1]  # Get filename from the file path
-    print_match = []
-    current_section = None
-    current_os = None
-    hostname = None
-    log_content = ""
-    ipv4_peers = []
-    vpnv4_peers = []
-    ospf_peers = []  
-    count_ipv4 = 0         # <-- Add this
-    count_vpnv4 = 0        # <-- Add this
-    count_ospf = 0         # <-- Add this
-    log_regex = mainconfig.LOG_REGEX
-    hostname_regex = mainconfig.HOSTNAME_REGEX
-    ip_pattern = mainconfig.IP_PATTERN
-    ip_match = re.search(ip_pattern, fname)
+    ip_match = re.search(mainconfig.IP_PATTERN, fname)
     ip = ip_match[0] if ip_match else "unknown"
 
     if logger is None:
@@ -462,245 +714,44 @@ def log_check(log_file_path, logger=None, label="Log file"):
     logger.info(f"starting log_check for IP: {ip} File: {log_file_path}")
 
     # Check log file existence
-    if not os.path.exists(log_file_path):   
+    if not log_archive.log_exists(log_file_path):   
         logger.error(f"Error: Log file '{log_file_path}' does not exist.")
         return None
     else:
         logger.info(f"starting log_check for IP: {ip}, File: {log_file_path}")
-     
-    output_json_path = os.path.join(log_dir, f"{ip}_log_analysis.json")
-    if os.path.basename(os.path.dirname(log_file_path)) != "arch" or not os.path.exists(output_json_path):     # for normal log file, save for report every time; or the first time for archived log file
-        with open(log_file_path, 'r') as file:
-            log_entries = []
-            ospf_block = []
-            current_entry = None            
 
+    collector = LogCheckCollector(log_file_path, logger=logger, label=label)
+    output_json_path = collector.output_json_path
+    if os.path.basename(os.path.dirname(log_file_path)) != "arch" or not os.path.exists(output_json_path):     # for normal log file, save for report every time; or the first time for archived log file
+        with log_archive.open_log(log_file_path, 'r') as file:
             for line in file:
-                stripped = line.strip()
-
-                # Extract hostname
-                if hostname is None:
-                    hostname_match = re.match(hostname_regex, stripped)
-                    if hostname_match:
-                        hostname = hostname_match.group(2)  # Extract the hostname
-                        hostname_prompt = hostname_match[0]
-                        if hostname_prompt + 'display' in stripped:
-                            current_os = 'hpe'
-                        elif hostname_prompt + 'show' in stripped:
-                            current_os = 'cisco_ios'
-                    else:
-                        continue  # Skip lines without a hostname
-
-                # Start the loop from the line where the content is matched
-                if 'exit' in stripped:
-                    current_section = 'exit'
-                    break   # exit the loop
-                if hostname_prompt + 'display log' in stripped:
-                    current_section = 'log'
-                    current_os = 'hpe'
-                if hostname_prompt + 'show log ' in stripped:
-                    current_section = 'log'
-                    current_os = 'cisco_ios'
-                    continue
-
-                if hostname_prompt + 'show logging ' in stripped:
-                    current_section = 'log'
-                    current_os = 'arista_eos'
-                    continue
-
-                if current_section == 'log':
-                    if current_os == 'hpe':
-                        if line.startswith("%"):
-                            if current_entry:
-                                log_entries.append(current_entry)
-                            current_entry = line.rstrip()
-                        elif line.startswith(" "):
-                            if current_entry is not None:
-                                current_entry += "\n" + line.rstrip()
-                    else:  # Cisco / Arista
-                        if re.match(r"^\d+:", line.strip()) or "%" in line:  # seq: or %
-                            if current_entry:
-                                log_entries.append(current_entry)
-                            current_entry = line.rstrip()
-                        elif line.startswith(" "):
-                            if current_entry is not None:
-                                current_entry += "\n" + line.rstrip()
-
-                # Check for hpe status
-                if current_os == 'hpe':  
-                    if hostname_prompt+"display bgp peer ipv4" == stripped:
-                        current_section = "ipv4"
-                        continue
-                    elif hostname_prompt+"display bgp peer ipv4 vpn-instance-all" == stripped:
-                        current_section = "vpnv4"
-                        continue
-                    elif hostname_prompt+"display ospf peer" in stripped:
-                        current_section = "ospf"
-                        continue                           
-                    if re.search(ip_pattern, stripped):
-                        fields = stripped.split()
-                        if current_section == "ipv4" and len(fields) >= 8:
-                            ipv4_peers.append(stripped)
-                        if current_section == "vpnv4" and len(fields) >= 8:
-                            vpnv4_peers.append(stripped)
-                        if current_section == "ospf" :
-                            ospf_pattern = r'(?:\d{1,3}\.){3}\d{1,3}\s+(?:\d{1,3}\.){3}\d{1,3}'
-                            if re.search(ospf_pattern, stripped):
-                                ospf_peers.append(stripped)
-                
-                # Check for cisco_ios status
-                if current_os == 'cisco_ios':
-                    if "For address family:" in stripped:
-                        # Before switching families, save any block currently in progress
-                        if 'temp_bgp_block' in locals() and temp_bgp_block:
-                            if current_section == "ipv4": ipv4_peers.append("\n".join(temp_bgp_block))
-                            if current_section == "vpnv4": vpnv4_peers.append("\n".join(temp_bgp_block))
-                        temp_bgp_block = [] # Reset for new family
-                        
-                        if "IPv4 Unicast" in stripped:
-                            current_section = "ipv4"
-                        elif "VPNv4 Unicast" in stripped:
-                            current_section = "vpnv4"
-                        continue
-
-                    # Logic to catch the BGP Neighbor block
-                    if "BGP neighbor is" in stripped:
-                        if 'temp_bgp_block' in locals() and temp_bgp_block:
-                            # Save the previous neighbor's block before starting a new one
-                            block_str = "\n".join(temp_bgp_block)
-                            if current_section == "ipv4": ipv4_peers.append(block_str)
-                            if current_section == "vpnv4": vpnv4_peers.append(block_str)
-                        temp_bgp_block = [stripped]
-                    elif 'temp_bgp_block' in locals() and temp_bgp_block:
-                        # Append the Description, Version, and State lines
-                        temp_bgp_block.append(stripped)
-
-                    elif "show ip ospf" in stripped:
-                        current_section = "ospf"
-                        continue
-
-                    if current_section == "ospf" :
-                        if "Neighbor" in stripped and "interface" in stripped:
-                            if 'temp_block' in locals() and temp_block:
-                                ospf_block.append("\n".join(temp_block))
-                            temp_block = [stripped]
-                        elif 'temp_block' in locals():
-                            temp_block.append(stripped)
-                                            
-                # Check for arista_eos status
-                if current_os == 'arista_eos':
-                    if "BGP summary information for VRF default" == stripped:
-                        current_section = "ipv4"
-                        continue
-                    elif "BGP neighbor" in stripped:
-                        current_section = "vpnv4"
-                        continue
-                    elif "show ip ospf" in stripped:
-                        current_section = "ospf"
-                        continue
-
-                    if current_section == "ipv4" and "BGP state" in stripped:
-                        ipv4_peers.append(stripped)
-
-                    if current_section == "vpnv4" and "BGP state" in stripped:
-                        vpnv4_peers.append(stripped)
-
-                    if current_section == "ospf" :
-                        if "Neighbor" in stripped and "interface" in stripped:
-                            if 'temp_block' in locals() and temp_block:
-                                ospf_block.append("\n".join(temp_block))
-                            temp_block = [stripped]
-                        elif 'temp_block' in locals():
-                            temp_block.append(stripped)
-
-            # the last log entry
-            if current_entry:
-                log_entries.append(current_entry)
-
-            if 'temp_bgp_block' in locals() and temp_bgp_block:
-                block_str = "\n".join(temp_bgp_block)
-                if current_section == "ipv4": ipv4_peers.append(block_str)
-                if current_section == "vpnv4": vpnv4_peers.append(block_str)      
-            if current_os == 'cisco_ios':
-                ipv4_peers =  bgp_summary(current_os, ipv4_peers)
-                vpnv4_peers = bgp_summary(current_os, vpnv4_peers)
-
-
-            # FIX: Catch the final OSPF neighbor block
-            if 'temp_block' in locals() and temp_block:
-                ospf_block.append("\n".join(temp_block))
-
-            if ospf_block:
-                ospf_peers = ospf_summary(ospf_block)
-                
-
-        # Now filter by your log_regex
-        filtered_entries = [entry for entry in log_entries if re.search(log_regex, entry)]
-        if filtered_entries:
-            log_content = "<br>".join(filtered_entries)
-            print_match.append(
-                "<tr><td><p style=\"background-color:Orange;\">{}</p></td></tr>".format(log_content)
-            )        
+                collector.feed(line)
+                if collector.done:
+                    break
+        return collector.result()
 
-            # summary_content = log_summary("\n".join(filtered_entries))
-            summary_content = log_summary("\n".join(filtered_entries), hostname, ip)
+    # for archived log file, read the json file while it exists
+    logger.info(f"Found archived json file for IP: {ip}  : {output_json_path}")
+    with open(output_json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
 
-        if current_os == 'arista_eos' or current_os == 'cisco_ios':
-            count_ipv4 = sum(1 for line in ipv4_peers if not "Idle" in line)
-            count_vpnv4 = sum(1 for line in vpnv4_peers if not "Idle" in line)
-            count_ospf = sum(1 for line in ospf_peers if "FULL" in line)
-        elif current_os == 'hpe':
-            count_ipv4 = sum(1 for line in ipv4_peers if "Established" in line)
-            count_vpnv4 = sum(1 for line in vpnv4_peers if "Established" in line)
-            count_ospf = sum(1 for line in ospf_peers if "Full" in line)
+    # Access fields with defaults
+    current_os = data.get("current_os", "unknown")
+    ipv4_peers = data.get("ipv4_peers", [])
+    vpnv4_peers = data.get("vpnv4_peers", [])
+    ospf_peers = data.get("ospf_peers", [])
 
-        # Save the log analysis to a JSON file
-        try:
-            with open(output_json_path, "w") as json_file:
-                json.dump({
-                    "hostname"      : hostname, 
-                    "current_os"    : current_os,
-                    "print_match"   : print_match,
-                    "ipv4_peers"    : ipv4_peers,
-                    "vpnv4_peers"   : vpnv4_peers,
-                    "ospf_peers"    : ospf_peers,
-                }, json_file, indent=4)
-            if logger:
-                logger.info(f"Log analysis saved to {output_json_path}")
-        except Exception as e:
-            if logger:
-                logger.error(f"Failed to save log analysis JSON: {e}")
-    else:       # for archived log file, read the json file while it exists
-        logger.info(f"Found archived json file for IP: {ip}  : {output_json_path}")
-        with open(output_json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        # Access fields with defaults
-        current_os = data.get("current_os", "unknown")
-        ipv4_peers = data.get("ipv4_peers", [])
-        vpnv4_peers = data.get("vpnv4_peers", [])
-        ospf_peers = data.get("ospf_peers", [])
-
-        # Count based on conditions (modify if needed)
-        if current_os == 'arista_eos' or current_os == 'cisco_ios':
-            count_ipv4 = sum(1 for line in ipv4_peers if not "Idle" in line)
-            count_vpnv4 = sum(1 for line in vpnv4_peers if not "Idle" in line)
-            count_ospf = sum(1 for line in ospf_peers if "FULL" in line)
-        elif current_os == 'hpe':
-            count_ipv4 = sum(1 for line in ipv4_peers if "Established" in line)
-            count_vpnv4 = sum(1 for line in vpnv4_peers if "Established" in line)
-            count_ospf = sum(1 for line in ospf_peers if "Full" in line)
-        
-    # print(ipv4_peers, vpnv4_peers, ospf_peers)
+    # Count based on conditions (modify if needed)
+    count_ipv4, count_vpnv4, count_ospf = peer_counts(current_os, ipv4_peers, vpnv4_peers, ospf_peers)
 
     return {
         "label"         : label,
         "current_os"    : current_os,
         "ip"            : ip,
-        "hostname"      : hostname,
-        "log_content"   : log_content,
-        "summary_content": summary_content if 'summary_content' in locals() else "",
-        "print_match"   : print_match,
+        "hostname"      : None,
+        "log_content"   : "",
+        "summary_content": "",
+        "print_match"   : [],
         "ipv4_peers"    : ipv4_peers,
         "count_ipv4"    : count_ipv4,
         "vpnv4_peers"   : vpnv4_peers,
@@ -1102,7 +1153,7 @@ def parse_routing_info(temp_file_path, json_file):
     #hostname_regex = r"<(.*?)>"
     hostname_regex = r"(<|)(.*?)(>|#)"
     
-    if not os.path.isfile(temp_file_path):
+    if not log_archive.log_exists(temp_file_path):
         print("No files exist:", temp_file_path)
         return
 
@@ -1118,7 +1169,7 @@ def parse_routing_info(temp_file_path, json_file):
 
     #print("Converting to routing JSON file...", json_file)
     
-    with open(temp_file_path, 'r') as temp_file:
+    with log_archive.open_log(temp_file_path, 'r') as temp_file:
         lines = temp_file.readlines()
 
     current_hostname = None  # Initialize current hostname
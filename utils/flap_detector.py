@@ -0,0 +1,209 @@
+# flap_detector.py
+# 202601 Streaming flap detector: sliding-window flap counts and a route flap dampening style penalty per
+# BGP / OSPF peer, kept in memory and fed with the state changes ingestion commits.
+#  - the feed is the event tables in id order (sync): every committed row is read once, so rows of a file that was
+#    rolled back or skipped by INSERT OR IGNORE never count; the first sync seeds the longest window (idx_*_changes_ts)
+#  - a flap is a transition out of Established / Full (analysis_sqlite.BGP_FLAP_SQL / OSPF_FLAP_SQL, as peer_health)
+#  - per peer, the flap times bucketed by FLAP_BUCKET_SECONDS and one running count per window
+#    (mainconfig.FLAP_DETECTOR_WINDOWS): a flap, in order or late, adds to its bucket and to the count of every
+#    window it falls in, O(windows); a window drops whole buckets as it slides, so counts are exact to a bucket
+#    (a flap leaves a window up to FLAP_BUCKET_SECONDS late). The penalty is one decaying number (+FLAP_PENALTY
+#    per flap, halved every FLAP_HALF_LIFE_SECONDS, capped at FLAP_MAX_PENALTY)
+#  - a peer is flapping from FLAP_SUPPRESS_PENALTY until its penalty decays below FLAP_REUSE_PENALTY
+#  - synced after each ingest run (utils/ingest_jobs.py) and before each /api/monitor/flaps answer
+# Times are event times (ts). A flap at a second already counted for the peer is a re-ingested row and is skipped.
+
+import os, time, sqlite3, threading
+import mainconfig as mainconfig
+from utils.db_connection import get_database
+from utils.analysis_sqlite import BGP_FLAP_SQL, OSPF_FLAP_SQL
+from utils.peer_health import PROTOCOLS
+
+logger = mainconfig.setup_module_logger(__name__)
+
+FLAP_SQL = {"bgp": BGP_FLAP_SQL, "ospf": OSPF_FLAP_SQL}
+_MAX_ID_SQL = "SELECT MAX(id) FROM {table}"
+NEW_FLAPS_SQL = ("SELECT hostname, {instance}, {neighbor}, timestamp, ts FROM {table} "
+                  "WHERE id > ? AND id <= ? AND ts IS NOT NULL AND {flap} ORDER BY id")
+# +id: the range on ts (idx_*_changes_ts) drives the seed, not the rowid range up to the last id
+SEED_FLAPS_SQL = ("SELECT hostname, {instance}, {neighbor}, timestamp, ts FROM {table} "
+                   "WHERE ts >= ? AND +id <= ? AND {flap}")
+
+
+class _Peer:
+    __slots__ = ("buckets", "counts", "firsts", "penalty", "penalty_ts", "flapping", "last_flap", "last_flap_ts")
+
+    def __init__(self, firsts):
+        self.buckets = {}       # bucket -> set of flap times, buckets of the longest window
+        self.counts = [0] * len(firsts)  # flaps per window
+        self.firsts = list(firsts)       # per window, its oldest bucket
+        self.penalty = 0.0      # as of penalty_ts
+        self.penalty_ts = 0
+        self.flapping = False
+        self.last_flap = None
+        self.last_flap_ts = None
+
+
+class FlapDetector:
+    """Per-peer flap windows and penalty; observe() one flap at a time, sync() from the database."""
+
+    def __init__(self, windows=None, bucket_seconds=None, penalty=None, half_life=None, suppress=None, reuse=None, max_penalty=None):
+        windows = windows or mainconfig.FLAP_DETECTOR_WINDOWS
+        self.windows = sorted(windows.items(), key=lambda item: item[1])  # [(name, seconds)], longest last
+        self.bucket_seconds = bucket_seconds or mainconfig.FLAP_BUCKET_SECONDS
+        self.flap_penalty = penalty or mainconfig.FLAP_PENALTY
+        self.half_life = half_life or mainconfig.FLAP_HALF_LIFE_SECONDS
+        self.suppress = suppress or mainconfig.FLAP_SUPPRESS_PENALTY
+        self.reuse = reuse or mainconfig.FLAP_REUSE_PENALTY
+        self.max_penalty = max_penalty or mainconfig.FLAP_MAX_PENALTY
+        self._peers = {}        # (protocol, hostname, instance, neighbor) -> _Peer
+        self._last_ids = {}     # protocol -> last event id read
+        self._db_path = None
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()  # one sync at a time (ingest thread, request handlers)
+
+    def _decay(self, seconds):
+        return 0.5 ** (max(0, seconds) / self.half_life)
+
+    def _firsts(self, now):
+        """Oldest bucket of each window at now."""
+        return [int(now - seconds) // self.bucket_seconds for _, seconds in self.windows]
+
+    def _expire(self, peer, now):
+        # a window steps over the buckets it leaves (the longest drops them), or re-counts the buckets it keeps
+        # when it slid past more buckets than the peer holds: at most min(buckets passed, buckets held) per call
+        firsts = self._firsts(now)
+        for i, first in enumerate(firsts):
+            if first <= peer.firsts[i]:
+                continue
+            longest = i == len(firsts) - 1
+            if first - peer.firsts[i] <= len(peer.buckets):
+                for b in range(peer.firsts[i], first):
+                    peer.counts[i] -= len(peer.buckets.pop(b, ()) if longest else peer.buckets.get(b, ()))
+            else:
+                if longest:
+                    peer.buckets = {b: flaps for b, flaps in peer.buckets.items() if b >= first}
+                peer.counts[i] = sum(len(flaps) for b, flaps in peer.buckets.items() if b >= first)
+            peer.firsts[i] = first
+
+    def observe(self, protocol, hostname, instance, neighbor, ts, stamp=None, now=None):
+        """Count one flap of a peer at epoch ts. Returns False for a flap already counted."""
+        now = now or time.time()
+        bucket = int(ts) // self.bucket_seconds
+        if bucket < int(now - self.windows[-1][1]) // self.bucket_seconds:
+            return False
+        key = (protocol, hostname, instance, neighbor)
+        with self._lock:
+            peer = self._peers.get(key)
+            if peer is None:
+                peer = self._peers[key] = _Peer(self._firsts(now))
+            elif ts in peer.buckets.get(bucket, ()):
+                return False
+            self._expire(peer, now)
+            # late events (another file of the same host) land in an older bucket the same way
+            peer.buckets.setdefault(bucket, set()).add(ts)
+            for i, first in enumerate(peer.firsts):
+                if bucket >= first:
+                    peer.counts[i] += 1
+            if ts >= peer.penalty_ts:
+                decayed = peer.penalty * self._decay(ts - peer.penalty_ts)
+                if peer.flapping and decayed < self.reuse:
+                    peer.flapping = False
+                peer.penalty, peer.penalty_ts = min(decayed + self.flap_penalty, self.max_penalty), ts
+            else:
+                peer.penalty = min(peer.penalty + self.flap_penalty * self._decay(peer.penalty_ts - ts), self.max_penalty)
+            if peer.penalty >= self.suppress:
+                peer.flapping = True
+            if peer.last_flap_ts is None or ts >= peer.last_flap_ts:
+                peer.last_flap, peer.last_flap_ts = stamp, ts
+            return True
+
+    def sync(self, conn, db_path=None, now=None):
+        """Observe the flaps committed since the last sync (the last day's on the first). Returns flaps counted."""
+        now = now or time.time()
+        with self._sync_lock:
+            if db_path != self._db_path:
+                self.reset()
+                self._db_path = db_path
+            return self._sync(conn, now)
+
+    def _sync(self, conn, now):
+        counted = 0
+        for protocol, spec in PROTOCOLS.items():
+            sql = dict(spec, flap=FLAP_SQL[protocol])
+            max_id = conn.execute(_MAX_ID_SQL.format(**sql)).fetchone()[0] or 0
+            last_id = self._last_ids.get(protocol)
+            if last_id is not None and max_id < last_id:
+                # events were deleted and the ids reused (database recreated): start over for this protocol
+                self._forget(protocol)
+                last_id = None
+            if last_id is None:
+                rows = conn.execute(SEED_FLAPS_SQL.format(**sql), (int(now) - self.windows[-1][1], max_id))
+            else:
+                rows = conn.execute(NEW_FLAPS_SQL.format(**sql), (last_id, max_id))
+            for hostname, instance, neighbor, stamp, ts in rows:
+                counted += self.observe(protocol, hostname, instance, neighbor, ts, stamp, now)
+            self._last_ids[protocol] = max_id
+        if counted:
+            logger.debug(f"Flap detector: {counted} new flaps, {len(self._peers)} peers tracked")
+        return counted
+
+    def _forget(self, protocol):
+        with self._lock:
+            self._peers = {key: peer for key, peer in self._peers.items() if key[0] != protocol}
+            self._last_ids.pop(protocol, None)
+
+    def reset(self):
+        with self._lock:
+            self._peers.clear()
+            self._last_ids.clear()
+
+    def snapshot(self, protocol=None, flapping_only=False, limit=None, now=None):
+        """Peers with flaps in any window or a penalty left, most penalized first; drops peers that went quiet."""
+        now = now or time.time()
+        peers = []
+        with self._lock:
+            for key, peer in list(self._peers.items()):
+                self._expire(peer, now)
+                penalty = peer.penalty * self._decay(now - peer.penalty_ts)
+                if peer.flapping and penalty < self.reuse:
+                    peer.flapping = False
+                if penalty < 1 and not peer.buckets:
+                    del self._peers[key]
+                    continue
+                if (protocol and key[0] != protocol) or (flapping_only and not peer.flapping):
+                    continue
+                peers.append({
+                    "protocol": key[0], "hostname": key[1], "instance": key[2], "neighbor": key[3],
+                    "flaps": {name: count for (name, _), count in zip(self.windows, peer.counts)},
+                    "flaps_per_hour": {name: round(count * 3600 / seconds, 2)
+                                       for (name, seconds), count in zip(self.windows, peer.counts)},
+                    "penalty": round(penalty), "flapping": peer.flapping,
+                    "last_flap": peer.last_flap, "last_flap_ts": peer.last_flap_ts,
+                })
+            tracked = len(self._peers)
+        peers.sort(key=lambda row: (-row["penalty"], -(row["last_flap_ts"] or 0)))
+        return {
+            "generated_ts": int(now),
+            "windows": dict(self.windows),
+            "dampening": {"penalty": self.flap_penalty, "half_life_seconds": self.half_life,
+                          "suppress": self.suppress, "reuse": self.reuse, "max": self.max_penalty},
+            "tracked_peers": tracked,
+            "flapping_peers": sum(row["flapping"] for row in peers),
+            "peers": peers[:limit] if limit else peers,
+        }
+
+
+detector = FlapDetector()
+
+
+def sync_database(db_path=None):
+    """Feed the shared detector with the flaps committed to db_path since its last sync. Returns flaps counted."""
+    db_path = db_path or mainconfig.DB_PATH
+    if not os.path.exists(db_path):
+        return 0
+    try:
+        return detector.sync(get_database(db_path).reader(), db_path)
+    except sqlite3.Error as e:
+        logger.error(f"Flap detector sync failed: {e}")
+        return 0
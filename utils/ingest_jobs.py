@@ -0,0 +1,157 @@
+# ingest_jobs.py
+# 202601 In-process runner for the log ingestion (analysis_sqlite.main), replacing the
+# "python analysis_sqlite.py" subprocess the /api/monitor/flush button used to start.
+#  - single flight: while a run is in progress, another flush joins it instead of starting a second one
+#  - file runs (utils/log_watcher.py) ingest only the files that changed; requests that arrive while
+#    a run is busy are merged into one follow-up run started as soon as it finishes
+#  - the run happens on one dedicated worker thread, never on the event loop
+#  - it writes through the process's shared writer (get_database(DB_PATH).writer()), one step at a time, so
+#    peer_health / retention / device writers of the app queue behind a step instead of failing on SQLITE_BUSY
+#  - progress and timing are kept in memory for the /api/monitor/flush/status endpoint
+
+import threading, time, traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import mainconfig as mainconfig
+import utils.analysis_sqlite as analysis_sqlite
+import utils.flap_detector as flap_detector
+
+logger = mainconfig.setup_module_logger(__name__)
+
+
+class IngestJobRunner:
+    """Runs analysis_sqlite.main (directory mode) at most once at a time and tracks its progress."""
+
+    ALL_FILES = None  # files=ALL_FILES: full directory scan
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest")
+        self._job = None       # status dict of the running (or last finished) job
+        self._future = None
+        self._started = None   # time.monotonic() when the running job started
+        self._followup = False # a follow-up run is queued behind the running job
+        self._followup_files = set()  # its files; None once any request needs a full scan
+        self._followup_trigger = None
+        self._next_id = 1
+
+    def start(self, trigger="flush", files=ALL_FILES):
+        """
+        Start an ingestion run over the whole log directory, or over `files` only.
+        While a run is busy, a full-scan request joins a running full scan; anything else
+        (changed files, or a full scan behind a file run) is merged into one follow-up run.
+        Returns (status dict snapshot, joined) where joined is True if no new run was started.
+        """
+        files = None if files is None else sorted(str(f) for f in files)
+        with self._lock:
+            if self._job is not None and self._job["state"] in ("queued", "running"):
+                if not (files is None and self._job["files"] is None):
+                    self._queue_followup(trigger, files)
+                self._job["joined"] += 1
+                logger.info(f"Ingest job {self._job['job_id']} already {self._job['state']}; {trigger} request joined it")
+                return self._snapshot(), True
+            self._submit(trigger, files)
+            return self._snapshot(), False
+
+    def _queue_followup(self, trigger, files):
+        # caller holds self._lock
+        if files is None or self._followup_files is None:
+            self._followup_files = None
+        else:
+            self._followup_files.update(files)
+        self._followup = True
+        self._followup_trigger = trigger
+
+    def _submit(self, trigger, files):
+        # caller holds self._lock
+        job_id = self._next_id
+        self._next_id += 1
+        self._job = {
+            "job_id": job_id,
+            "trigger": trigger,
+            "files": files,
+            "state": "queued",
+            "joined": 0,
+            "requested_at": datetime.now().isoformat(timespec="seconds"),
+            "started_at": None,
+            "finished_at": None,
+            "elapsed_s": None,
+            "files_total": None,
+            "files_done": 0,
+            "current_file": None,
+            "message": "Database sync queued.",
+            "error": None,
+        }
+        self._future = self._executor.submit(self._run, self._job)
+
+    def _snapshot(self):
+        # caller holds self._lock
+        job = dict(self._job)
+        if job["state"] == "running":
+            job["elapsed_s"] = round(time.monotonic() - self._started, 2)
+        if job["files"] is not None:
+            job["files"] = len(job["files"])  # count only; a watcher batch can be long
+        job["followup_queued"] = self._followup
+        return job
+
+    def status(self):
+        """Snapshot of the running or last job; elapsed_s is live while it runs."""
+        with self._lock:
+            if self._job is None:
+                return {"state": "idle", "message": "No database sync has run since startup."}
+            return self._snapshot()
+
+    def wait(self, timeout=None):
+        """Block until the current job and any follow-up finish; returns the final status."""
+        future = None
+        while self._future is not future:
+            future = self._future
+            future.result(timeout=timeout)
+        return self.status()
+
+    def _update(self, job, **fields):
+        with self._lock:
+            job.update(fields)
+
+    def _progress(self, job, done, total, filename):
+        self._update(job, files_done=done, files_total=total, current_file=filename,
+                     message=f"Processed {done}/{total} log files.")
+
+    def _run(self, job):
+        t0 = self._started = time.monotonic()
+        self._update(job, state="running", started_at=datetime.now().isoformat(timespec="seconds"),
+                     message="Database sync running.")
+        logger.info(f"Ingest job {job['job_id']} started ({job['trigger']})")
+        try:
+            updated = analysis_sqlite.main(progress=lambda done, total, filename: self._progress(job, done, total, filename),
+                                           log_file_paths=job["files"])
+            if updated:
+                flap_detector.sync_database()
+                state, message = "success", f"Analysis completed: {job['files_done']}/{job['files_total']} log files processed."
+            elif job["files_total"] == 0:
+                state, message = "up_to_date", "Analysis is already up to date."
+            elif job["files_total"] is None:
+                state, message = "failed", "Analysis did not start, check the logs."
+            else:
+                state, message = "failed", "No log file could be processed, check the logs."
+            error = None
+        except Exception as e:
+            state, message, error = "failed", f"Analysis failed: {type(e).__name__} - {e}", traceback.format_exc()
+            logger.error(f"Ingest job {job['job_id']} failed: {e}", exc_info=True)
+        elapsed = round(time.monotonic() - t0, 2)
+        with self._lock:
+            job.update(state=state, message=message, error=error, current_file=None, elapsed_s=elapsed,
+                       finished_at=datetime.now().isoformat(timespec="seconds"))
+            logger.info(f"Ingest job {job['job_id']} {state} in {elapsed}s: {message}")
+            if self._followup:
+                # Start the merged follow-up under the same lock, so pollers never see an idle gap
+                files = None if self._followup_files is None else sorted(self._followup_files)
+                trigger = self._followup_trigger
+                self._followup, self._followup_files, self._followup_trigger = False, set(), None
+                self._submit(trigger, files)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+ingest_runner = IngestJobRunner()
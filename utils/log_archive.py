@@ -0,0 +1,246 @@
+# log_archive.py
+# 202601 Compressed storage for old session logs in logs/core_logs (and its arch/ folder).
+#  - logs older than LOG_ARCHIVE_AFTER_DAYS are rewritten as <name>.gz and the plain file removed
+#  - the .gz is a series of independent gzip members of ~LOG_ARCHIVE_MEMBER_BYTES each, cut at line ends,
+#    so it still opens with zcat / 7-Zip, and a sidecar <name>.gz.gzi (JSON) lists where each member starts:
+#    reading from an uncompressed byte offset decompresses one member at most before the wanted data
+#  - readers keep using the plain path: open_log / stat_log / log_exists fall back to the archive when
+#    the plain file is gone, and stat_log reports the original size and mtime, so processed_files rows
+#    (utils/analysis_sqlite.py) still match and archived logs are never re-ingested
+# zstd would compress better, but is not in the standard library; gzip needs no extra dependency.
+
+import os, re, io, gzip, json, time, zlib, bisect
+from collections import namedtuple
+from functools import lru_cache
+import mainconfig as mainconfig
+
+logger = mainconfig.setup_module_logger(__name__)
+
+ARCHIVE_SUFFIX = ".gz"
+INDEX_SUFFIX = ".gzi"   # sidecar: <name>.gz.gzi
+INDEX_VERSION = 1
+
+LogStat = namedtuple("LogStat", "st_size st_mtime")
+
+
+def archive_path(path):
+    return str(path) + ARCHIVE_SUFFIX
+
+
+def logical_path(path):
+    """The plain log path for an archive path (or the path itself)."""
+    path = str(path)
+    return path[:-len(ARCHIVE_SUFFIX)] if path.endswith(ARCHIVE_SUFFIX) else path
+
+
+def is_log_name(name, regex=None):
+    """True for session log names (mainconfig.LOG_FILE_REGEX), plain or archived."""
+    regex = regex or re.compile(mainconfig.LOG_FILE_REGEX)
+    return bool(regex.match(logical_path(name)))
+
+
+def resolve(path):
+    """(existing file, archived) for a plain log path; the plain file wins. (None, False) if neither exists."""
+    path = str(path)
+    if os.path.isfile(path):
+        return path, False
+    if not path.endswith(ARCHIVE_SUFFIX) and os.path.isfile(path + ARCHIVE_SUFFIX):
+        return path + ARCHIVE_SUFFIX, True
+    return None, False
+
+
+def log_exists(path):
+    return resolve(path)[0] is not None
+
+
+def _scan_members(gz_path, chunk_size=1024 * 1024):
+    """Member table of a gzip file without a sidecar (written elsewhere, or sidecar lost): one full decompress."""
+    members = []
+    u_offset = c_offset = 0
+    decompressor = zlib.decompressobj(wbits=31)
+    members.append([0, 0])
+    with open(gz_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            while chunk:
+                u_offset += len(decompressor.decompress(chunk))
+                if not decompressor.eof:
+                    c_offset += len(chunk)
+                    break
+                used = len(chunk) - len(decompressor.unused_data)
+                c_offset += used
+                chunk = decompressor.unused_data
+                decompressor = zlib.decompressobj(wbits=31)
+                members.append([u_offset, c_offset])
+    # the last entry opened after the final member, it holds no data
+    members.pop()
+    return members, u_offset
+
+
+@lru_cache(maxsize=256)
+def _load_index(gz_path, gz_mtime_ns, gz_size):
+    # keyed on the archive's mtime/size, so a rewritten archive is read again
+    try:
+        with open(gz_path + INDEX_SUFFIX, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("version") == INDEX_VERSION and index.get("compressed_size") == gz_size:
+            return index
+        logger.warning(f"Stale index for {gz_path}; rebuilding it in memory")
+    except (OSError, ValueError):
+        logger.warning(f"No usable index for {gz_path}; rebuilding it in memory")
+    members, size = _scan_members(gz_path)
+    return {"version": INDEX_VERSION, "size": size, "mtime": gz_mtime_ns / 1e9,
+            "compressed_size": gz_size, "members": members}
+
+
+def load_index(gz_path):
+    st = os.stat(gz_path)
+    return _load_index(str(gz_path), st.st_mtime_ns, st.st_size)
+
+
+def stat_log(path):
+    """os.stat of the plain log, or its original size / mtime once archived. Raises FileNotFoundError."""
+    actual, archived = resolve(path)
+    if actual is None:
+        raise FileNotFoundError(f"Log file not found: {path}")
+    if not archived:
+        return os.stat(actual)
+    index = load_index(actual)
+    return LogStat(index["size"], index["mtime"])
+
+
+def _open_archive(gz_path, offset):
+    index = load_index(gz_path)
+    members = index["members"]
+    i = max(0, bisect.bisect_right([u for u, _ in members], offset) - 1)
+    u_start, c_start = members[i] if members else (0, 0)
+    f = open(gz_path, "rb")
+    try:
+        f.seek(c_start)
+        stream = gzip.GzipFile(fileobj=f, mode="rb")
+        stream.myfileobj = f  # GzipFile closes myfileobj with itself, as when it opens the file by name
+        skip = offset - u_start
+        while skip > 0:
+            data = stream.read(min(skip, 1024 * 1024))
+            if not data:
+                break
+            skip -= len(data)
+        return stream
+    except Exception:
+        f.close()
+        raise
+
+
+def open_log(path, mode="r", offset=0, encoding=None, errors=None):
+    """
+    open() for a session log that may have been archived: mode "r" (text) or "rb" (binary).
+    offset starts reading at that uncompressed byte offset (binary mode).
+    """
+    if mode not in ("r", "rb"):
+        raise ValueError(f"open_log mode must be 'r' or 'rb', not {mode!r}")
+    actual, archived = resolve(path)
+    if actual is None:
+        raise FileNotFoundError(f"Log file not found: {path}")
+    if not archived:
+        if mode == "r":
+            return open(actual, "r", encoding=encoding, errors=errors)
+        f = open(actual, "rb")
+        if offset:
+            f.seek(offset)
+        return f
+    stream = _open_archive(actual, offset if mode == "rb" else 0)
+    if mode == "rb":
+        return stream
+    return io.TextIOWrapper(stream, encoding=encoding, errors=errors)
+
+
+def compress_log(path, member_bytes=None, level=None):
+    """
+    Archive one plain log: write <path>.gz and its index, keep the original mtime, remove the plain file.
+    Returns (plain bytes, archive bytes). The plain file is only removed once both are complete.
+    """
+    path = str(path)
+    member_bytes = member_bytes or mainconfig.LOG_ARCHIVE_MEMBER_BYTES
+    level = mainconfig.LOG_ARCHIVE_LEVEL if level is None else level
+    st = os.stat(path)
+    gz_path = archive_path(path)
+    members = []
+    u_offset = c_offset = 0
+    with open(path, "rb") as src, open(gz_path + ".tmp", "wb") as dst:
+        pending = []
+        pending_size = 0
+        for line in src:
+            pending.append(line)
+            pending_size += len(line)
+            if pending_size >= member_bytes:
+                member = gzip.compress(b"".join(pending), compresslevel=level, mtime=0)
+                members.append([u_offset, c_offset])
+                dst.write(member)
+                u_offset, c_offset = u_offset + pending_size, c_offset + len(member)
+                pending, pending_size = [], 0
+        if pending or not members:
+            member = gzip.compress(b"".join(pending), compresslevel=level, mtime=0)
+            members.append([u_offset, c_offset])
+            dst.write(member)
+            u_offset, c_offset = u_offset + pending_size, c_offset + len(member)
+        dst.flush()
+        os.fsync(dst.fileno())
+    if u_offset != st.st_size or os.stat(path).st_mtime != st.st_mtime:
+        os.remove(gz_path + ".tmp")
+        raise OSError(f"{path} changed while it was being archived")
+    index = {"version": INDEX_VERSION, "size": st.st_size, "mtime": st.st_mtime,
+             "compressed_size": c_offset, "members": members}
+    with open(gz_path + INDEX_SUFFIX + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    # index first: an archive without its index is still readable (rebuilt in memory), never the reverse
+    os.replace(gz_path + INDEX_SUFFIX + ".tmp", gz_path + INDEX_SUFFIX)
+    os.replace(gz_path + ".tmp", gz_path)
+    os.utime(gz_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.remove(path)
+    return st.st_size, c_offset
+
+
+def archive_old_logs(directories=None, older_than_days=None, now=None):
+    """
+    Scheduled job (main.py): archive session logs not modified for older_than_days.
+    Returns a summary dict.
+    """
+    directories = directories or mainconfig.LOG_ARCHIVE_DIRS
+    older_than_days = mainconfig.LOG_ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    cutoff = (now or time.time()) - older_than_days * 86400
+    regex = re.compile(mainconfig.LOG_FILE_REGEX)
+    summary = {"files": 0, "plain_bytes": 0, "archive_bytes": 0, "errors": 0}
+    for directory in directories:
+        if not os.path.isdir(directory):
+            continue
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if not regex.match(name) or not os.path.isfile(path):
+                continue
+            try:
+                if os.path.getmtime(path) >= cutoff:
+                    continue
+                plain_bytes, archive_bytes = compress_log(path)
+            except OSError as e:
+                # e.g. still open by a reader on Windows; retried on the next run
+                logger.warning(f"Could not archive {path}: {e}")
+                summary["errors"] += 1
+                continue
+            summary["files"] += 1
+            summary["plain_bytes"] += plain_bytes
+            summary["archive_bytes"] += archive_bytes
+    if summary["files"]:
+        logger.info(f"Archived {summary['files']} logs: {summary['plain_bytes'] / 1048576:.1f} MB -> "
+                    f"{summary['archive_bytes'] / 1048576:.1f} MB")
+    return summary
+
+
+def list_logs(directory):
+    """Names in directory with archived logs shown under their plain name; index sidecars left out."""
+    names = set()
+    for name in os.listdir(directory):
+        if name.endswith(ARCHIVE_SUFFIX + INDEX_SUFFIX) or name.endswith(".tmp"):
+            continue
+        if name.endswith(ARCHIVE_SUFFIX) and is_log_name(name):
+            name = logical_path(name)
+        names.add(name)
+    return sorted(names)
@@ -0,0 +1,276 @@
+"""
+Deterministic synthetic session logs for HPE Comware, Cisco IOS-XE and Arista EOS core switches.
+
+Each capture replays the commands the device check sends (mainconfig.CMD_HPE / CMD_CISCO / CMD_ARISTA)
+in the layout netmiko writes to session_log: the prompt echoed with each command, then its output.
+Peer counts and log volume are configurable, and the same seed always gives byte-identical files,
+so parser benchmarks (utils/bench_parser.py) and before/after comparisons run on a fixed corpus.
+
+Usage:
+    python utils/log_generator.py /tmp/corpus                            # 12 captures, default sizes
+    python utils/log_generator.py /tmp/corpus --count 40 --bgp-peers 60 --ospf-peers 40 --log-lines 5000
+    python utils/log_generator.py /tmp/corpus --vendors hpe --seed 7
+"""
+import os, sys, random, argparse
+from datetime import datetime, timedelta
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import mainconfig as mainconfig
+
+MONTHS = "Jan Feb Mar Apr May Jun Jul Aug Sep Oct Nov Dec".split()
+START_TIME = datetime(2025, 7, 10, 8, 0, 0)
+
+# vendor, hostname, management ip: the capture file name carries the ip, like network.py's session logs
+DEVICES = [
+    ("hpe", "ENG22-CC-Core", "10.8.8.15"),
+    ("hpe", "ENG22-CW-Core", "10.8.8.16"),
+    ("cisco", "NS-LGH-C9600-Core1", "10.26.101.127"),
+    ("arista", "VH-VGH-Core1", "10.26.101.7"),
+    ("hpe", "KDC-DMZ-HUT8-5945", "10.8.9.21"),
+    ("cisco", "NS-LGH-C9600-Core2", "10.26.101.128"),
+]
+
+HPE_BGP_STATES = ["ESTABLISHED", "IDLE", "ACTIVE", "CONNECT", "OPENSENT", "OPENCONFIRM"]
+HPE_OSPF_STATES = ["Full", "Down", "Init", "ExStart", "2-Way", "Loading"]
+VPN_INSTANCES = ["BCCSS", "VCHA-TC2", "PHSA"]
+
+
+def random_ip(rnd, first_octet=10):
+    return f"{first_octet}.{rnd.randint(0, 255)}.{rnd.randint(0, 255)}.{rnd.randint(1, 254)}"
+
+
+def hpe_time(dt):
+    return f"{MONTHS[dt.month - 1]} {dt.day:>2} {dt:%H:%M:%S}:{dt.microsecond // 1000:03d} {dt.year}"
+
+
+def syslog_time(dt):
+    return f"{MONTHS[dt.month - 1]} {dt.day:>2} {dt:%H:%M:%S}"
+
+
+def hpe_capture(rnd, hostname, bgp_peers=6, ospf_peers=5, log_lines=200, start=START_TIME):
+    """Comware capture: banner, log buffer, BGP IPv4 / VPN peer tables, OSPF brief and verbose peers."""
+    prompt = f"<{hostname}>"
+    cmd_log, cmd_bgp, cmd_bgp_vpn, cmd_ospf, cmd_ospf_verbose = mainconfig.CMD_HPE
+    peers = [random_ip(rnd) for _ in range(bgp_peers)]
+    vpn_peers = [random_ip(rnd) for _ in range(max(1, bgp_peers // 2))]
+    neighbors = [random_ip(rnd) for _ in range(ospf_peers)]
+    router_id = random_ip(rnd)
+
+    out = ["******************************************************************************",
+           "* Copyright (c) 2010-2021 Hewlett Packard Enterprise Development LP         *",
+           "* Without the owner's prior written consent,                                 *",
+           "* no decompiling or reverse-engineering shall be allowed.                    *",
+           "******************************************************************************",
+           "", prompt, prompt + cmd_log]
+    dt = start
+    for _ in range(log_lines):
+        dt += timedelta(seconds=rnd.randint(1, 900), microseconds=rnd.randint(0, 999) * 1000)
+        kind = rnd.random()
+        if kind < 0.35:
+            vpn = "" if rnd.random() < 0.5 else f" BGP.{rnd.choice(VPN_INSTANCES)}:"
+            old, new = rnd.sample(HPE_BGP_STATES, 2)
+            out.append(f"%{hpe_time(dt)} {hostname} BGP/5/BGP_STATE_CHANGED:{vpn} {rnd.choice(peers + vpn_peers)}"
+                       f"  state has changed from {old} to {new} for hold timer expiration caused by peer device.")
+        elif kind < 0.65:
+            old, new = rnd.sample(HPE_OSPF_STATES, 2)
+            out.append(f"%{hpe_time(dt)} {hostname} OSPF/5/OSPF_NBR_CHG: OSPF {rnd.choice([1, 7, 904])} Neighbor "
+                       f"{rnd.choice(neighbors)}(Vlan-interface{rnd.randint(1, 999)}) changed from {old} to {new}.")
+        elif kind < 0.8:
+            out.append(f"%{hpe_time(dt)} {hostname} OSPF/5/OSPF_NBR_CHG_REASON: OSPF {rnd.choice([1, 7, 904])} Area 0.0.0.0 "
+                       f"Router {router_id}(Vlan904) CPU usage: {rnd.randint(1, 60)}%, VPN name: {rnd.choice(['PHSA-Internet', 'VRF-A'])}, "
+                       f"IfMTU: 1500, Neighbor address: {rnd.choice(neighbors)}, NbrID:{random_ip(rnd)} changed from Full to EXSTART "
+                       f"because a SeqNumberMismatch event was triggered.")
+        elif kind < 0.9:
+            out.append(f"%{hpe_time(dt)} {hostname} OSPF/6/OSPF_LAST_NBR_DOWN: OSPF {rnd.choice([1, 7])} Last neighbor down event: "
+                       f"Router ID: {random_ip(rnd)} Local address: {random_ip(rnd)} Remote address: {rnd.choice(neighbors)} "
+                       f"Reason: Dead Interval timer expired.")
+        else:
+            out.append(f"%{hpe_time(dt)} {hostname} SHELL/5/SHELL_LOGIN: {rnd.choice(['admin', 'netops'])} logged in from {random_ip(rnd)}.")
+            out.append("  continuation line for the log entry")
+
+    out += [prompt + cmd_bgp, "", f" BGP local router ID: {router_id}", " Local AS number: 65001",
+            f" Total number of peers: {bgp_peers}                  Peers in established state: {max(0, bgp_peers - 1)}", "",
+            "  * - Dynamically created peer",
+            "  Peer                    AS  MsgRcvd  MsgSent OutQ PrefRcv Up/Down  State", ""]
+    for i, peer in enumerate(peers):
+        uptime = rnd.choice(["0536h53m", "01:23:45", "12h05m", "00:10:11", "1234h01m"])
+        out.append(f"  {peer:<20} 65001 {rnd.randint(1, 99999):>8} {rnd.randint(1, 99999):>8}    0 {rnd.randint(0, 99):>7} "
+                   f"{uptime} {'Established' if i else 'Idle'}")
+        if i and i % 40 == 0:
+            out.append("  ---- More ----")
+
+    out += [prompt + cmd_bgp_vpn, "", f" BGP local router ID: {router_id}", " Local AS number: 65001", ""]
+    for vpn in VPN_INSTANCES[:2]:
+        out += [f" VPN instance: {vpn}",
+                f" Total number of peers: {len(vpn_peers)}  Peers in established state: {len(vpn_peers)}", "",
+                "  Peer                    AS  MsgRcvd  MsgSent OutQ PrefRcv Up/Down  State", ""]
+        for peer in vpn_peers:
+            out.append(f"  {peer:<20} 4255000501 {rnd.randint(1, 9999):>8} {rnd.randint(1, 9999):>8}    0 "
+                       f"{rnd.randint(0, 99):>7} 0012h33m Established")
+
+    processes = [1, 7]
+    out += [prompt + cmd_ospf]
+    for process in processes:
+        out += ["", f"          OSPF Process {process} with Router ID {router_id}", "               Neighbor Brief Information", "",
+                " Area: 0.0.0.0",
+                " Router ID       Address         Pri Dead-Time  State             Interface"]
+        for neighbor in neighbors:
+            out.append(f" {random_ip(rnd):<15} {neighbor:<15} 1   {rnd.randint(30, 40):<10} "
+                       f"{rnd.choice(['Full/DR', 'Full/BDR', 'Full/-', 'Init/-']):<17} Vlan{rnd.randint(1, 4000)}")
+
+    out += [prompt + cmd_ospf_verbose]
+    for process in processes:
+        out += [f"          OSPF Process {process} with Router ID {router_id}", "                  Neighbors"]
+        for neighbor in neighbors:
+            out += [f" Area 0.0.0.{process - 1} interface {random_ip(rnd)}(Vlan-interface{rnd.randint(1, 999)})'s neighbors",
+                    f" Router ID: {random_ip(rnd)}      Address: {neighbor}       GR State: Normal",
+                    f"   State: {rnd.choice(['Full', 'Full', 'Full', 'Init', '2-Way'])}  Mode: Nbr is Master  Priority: 1",
+                    f"   Neighbor is up for {rnd.randint(0, 999)}:{rnd.randint(0, 59):02d}:{rnd.randint(0, 59):02d}",
+                    f"   Neighbor state change count: {rnd.randint(1, 30)}"]
+            if rnd.random() < 0.5:
+                out += ["   Last Neighbor Down Event:",
+                        f"     Router ID: {random_ip(rnd)}",
+                        f"     Local Address: {random_ip(rnd)}",
+                        f"     Remote Address: {neighbor}",
+                        f"     Time: {hpe_time(dt)}",
+                        "     Reason: Dead Interval timer expired"]
+    out += [prompt, prompt + "quit"]
+    return out
+
+
+def _ios_log_lines(rnd, hostname, peers, neighbors, log_lines, start, seq_numbers):
+    out = []
+    dt = start
+    for seq in range(log_lines):
+        dt += timedelta(seconds=rnd.randint(1, 900))
+        prefix = f"{seq:06d}: " if seq_numbers else ""
+        kind = rnd.random()
+        if kind < 0.4:
+            action = rnd.choice(["dropped", "established"])
+            out.append(f"{syslog_time(dt)} {hostname} Ospf: %OSPF-4-OSPF_ADJACENCY: Instance {rnd.choice([1, 200])}: "
+                       f"NGB {rnd.choice(neighbors)}, interface {random_ip(rnd)} adjacency {action}: interface went down, state was: FULL")
+        elif kind < 0.7:
+            out.append(f"{prefix}{syslog_time(dt)} PST: %BGP-5-ADJCHANGE: neighbor {rnd.choice(peers)} {rnd.choice(['Up', 'Down'])}")
+        else:
+            old, new = rnd.sample(["LOADING", "FULL", "DOWN", "INIT", "EXSTART"], 2)
+            out.append(f"{prefix}{syslog_time(dt)} PST: %OSPF-5-ADJCHG: Process {rnd.choice([1, 200])}, Nbr {rnd.choice(neighbors)} "
+                       f"on Vlan{rnd.randint(1, 4000)} from {old} to {new}, Neighbor Down: Dead timer expired")
+    return out
+
+
+def _ios_bgp_neighbor(rnd, peer, vrf, arista):
+    if vrf:
+        head = f"BGP neighbor is {peer},  vrf {vrf},  remote AS 4255000501,  local AS 4255000101, external link"
+    else:
+        head = f"BGP neighbor is {peer},  remote AS 65500, internal link"
+    state = rnd.choice(["Established", "Established", "Established", "Idle"])
+    return [head,
+            f"  Description: to_{rnd.choice(['OldCore', 'DMZ', 'WAN'])}{rnd.randint(1, 9)}",
+            f"  BGP version 4, remote router ID {random_ip(rnd)}",
+            f"  BGP state {'is' if arista else '='} {state}, {'up' if state == 'Established' else 'down'} for "
+            f"{rnd.choice(['6w4d', '278d01h', '00:12:33', '2y11w'])}"]
+
+
+def cisco_capture(rnd, hostname, bgp_peers=6, ospf_peers=5, log_lines=200, start=START_TIME):
+    """IOS-XE capture: log buffer, BGP neighbors per address family, OSPF neighbor detail and events."""
+    prompt = f"{hostname}#"
+    cmd_log, cmd_bgp, cmd_ospf, cmd_events = mainconfig.CMD_CISCO
+    peers = [random_ip(rnd) for _ in range(bgp_peers)]
+    vpn_peers = [random_ip(rnd) for _ in range(max(1, bgp_peers // 2))]
+    neighbors = [random_ip(rnd) for _ in range(ospf_peers)]
+
+    out = [prompt, prompt + cmd_log]
+    out += _ios_log_lines(rnd, hostname, peers + vpn_peers, neighbors, log_lines, start, seq_numbers=True)
+    out += [prompt + cmd_bgp, "For address family: IPv4 Unicast"]
+    for peer in peers:
+        out += _ios_bgp_neighbor(rnd, peer, None, arista=False)
+    out += ["For address family: VPNv4 Unicast"]
+    for peer in vpn_peers:
+        out += _ios_bgp_neighbor(rnd, peer, rnd.choice(VPN_INSTANCES), arista=False)
+    out += [prompt + cmd_ospf]
+    for neighbor in neighbors:
+        out += [f" Neighbor {neighbor}, interface address {random_ip(rnd)}, interface-id {rnd.randint(10, 99)}",
+                f"    In the area 0 via interface Vlan{rnd.randint(1, 4000)}",
+                f"    Neighbor priority is 0, State is {rnd.choice(['FULL', 'FULL', 'FULL', 'INIT'])}, {rnd.randint(1, 9)} state changes",
+                f"    Neighbor is up for {rnd.randint(1, 50)}w{rnd.randint(0, 6)}d"]
+    out += [prompt + cmd_events]
+    dt = start
+    for seq in range(max(1, log_lines // 10), 0, -1):
+        dt += timedelta(seconds=rnd.randint(1, 300))
+        out.append(f"{seq:>5}  {syslog_time(dt)}.{rnd.randint(0, 999):03d}: Generic:  ospf_external_route_sync  0x0")
+    out += [prompt + "exit"]
+    return out
+
+
+def arista_capture(rnd, hostname, bgp_peers=6, ospf_peers=5, log_lines=200, start=START_TIME):
+    """EOS capture: logging buffer, BGP neighbors, OSPF neighbor detail."""
+    prompt = f"{hostname}#"
+    cmd_log, cmd_bgp, cmd_ospf = mainconfig.CMD_ARISTA
+    peers = [random_ip(rnd) for _ in range(bgp_peers)]
+    neighbors = [random_ip(rnd) for _ in range(ospf_peers)]
+
+    out = [prompt, prompt + cmd_log]
+    out += _ios_log_lines(rnd, hostname, peers, neighbors, log_lines, start, seq_numbers=False)
+    out += [prompt + cmd_bgp]
+    for i, peer in enumerate(peers):
+        out += _ios_bgp_neighbor(rnd, peer, None if i % 3 else rnd.choice(VPN_INSTANCES), arista=True)
+    out += [prompt + cmd_ospf]
+    for neighbor in neighbors:
+        out += [f"Neighbor {neighbor}, instance 200, VRF default, interface address {random_ip(rnd)}",
+                f"  In area 0.0.0.1 interface Ethernet4/{rnd.randint(1, 48)}",
+                f"  Neighbor priority is 1, State is {rnd.choice(['FULL', 'FULL', 'FULL', 'INIT'])}, {rnd.randint(1, 9)} state changes",
+                f"  Current state was established {rnd.randint(1, 300)}d{rnd.randint(0, 23):02d}h ago"]
+    out += [prompt + "exit"]
+    return out
+
+
+GENERATORS = {"hpe": hpe_capture, "cisco": cisco_capture, "arista": arista_capture}
+
+
+def capture_filename(taken_at, host_ip, username="bench_sa"):
+    """Same pattern as NetworkDeviceManager._run_single_check (<YYYYmmdd_HHMMSS>_<ip>_<user>.txt), with a
+    *_sa user so analysis_sqlite.main picks the file up in directory mode."""
+    return f"{taken_at:%Y%m%d_%H%M%S}_{host_ip}_{username}.txt"
+
+
+def write_captures(out_dir, count=12, seed=1, bgp_peers=6, ospf_peers=5, log_lines=200, vendors=None):
+    """Write `count` captures to out_dir, cycling through DEVICES (optionally only `vendors`). Returns the paths."""
+    rnd = random.Random(seed)
+    devices = [d for d in DEVICES if not vendors or d[0] in vendors]
+    if not devices:
+        raise ValueError(f"No generator device for vendors {vendors}; known: {sorted(GENERATORS)}")
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for i in range(count):
+        vendor, hostname, host_ip = devices[i % len(devices)]
+        taken_at = START_TIME + timedelta(hours=i)
+        lines = GENERATORS[vendor](rnd, hostname, bgp_peers=bgp_peers, ospf_peers=ospf_peers,
+                                   log_lines=log_lines, start=taken_at - timedelta(days=3))
+        path = os.path.join(out_dir, capture_filename(taken_at, host_ip))
+        with open(path, "w", newline="\n") as f:
+            f.write("\n".join(lines) + "\n")
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write deterministic synthetic HPE / Cisco / Arista session logs.")
+    parser.add_argument("out_dir", help="directory for the generated captures")
+    parser.add_argument("--count", type=int, default=12, help="number of capture files (default: 12)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed (default: 1)")
+    parser.add_argument("--bgp-peers", type=int, default=6, help="BGP peers per device (default: 6)")
+    parser.add_argument("--ospf-peers", type=int, default=5, help="OSPF neighbors per process (default: 5)")
+    parser.add_argument("--log-lines", type=int, default=200, help="log buffer entries per capture (default: 200)")
+    parser.add_argument("--vendors", nargs="+", choices=sorted(GENERATORS), help="only these vendors (default: all)")
+    args = parser.parse_args()
+
+    paths = write_captures(args.out_dir, args.count, args.seed, args.bgp_peers, args.ospf_peers, args.log_lines, args.vendors)
+    total = sum(os.path.getsize(p) for p in paths)
+    print(f"Wrote {len(paths)} captures ({total / 1024:.1f} KB) to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# log_watcher.py
+# 202601 Watch CORE_LOGS_DIR and ingest core logs as they land (copied in by other tools, archive restores, ...),
+# instead of waiting for the next Flush.
+#  - change events come from watchfiles (inotify on Linux, ReadDirectoryChangesW on Windows)
+#  - writes are debounced per file: a file is ingested once it has been quiet for LOG_WATCH_QUIET_SECONDS
+#  - only names matching mainconfig.LOG_FILE_REGEX are considered
+#  - ingestion goes through utils/ingest_jobs.py, so it never overlaps a Flush run: one writer at a time,
+#    parsing fanned out to at most INGEST_WORKERS processes, and a burst larger than LOG_WATCH_MAX_BATCH
+#    collapses into a single directory scan
+#  - session logs a device check in this process is still writing are skipped; the check ingests them itself
+
+import os, re, time, asyncio, threading
+from contextlib import contextmanager
+import mainconfig as mainconfig
+from utils.ingest_jobs import ingest_runner
+
+logger = mainconfig.setup_module_logger(__name__)
+
+_writing = set()   # session logs being written by NetworkDeviceManager threads
+_writing_lock = threading.Lock()
+
+
+@contextmanager
+def writing(path):
+    """Keep the watcher away from a log this process is writing and will ingest itself."""
+    key = os.path.abspath(str(path))
+    with _writing_lock:
+        _writing.add(key)
+    try:
+        yield
+    finally:
+        with _writing_lock:
+            _writing.discard(key)
+
+
+def _is_writing(path):
+    with _writing_lock:
+        return path in _writing
+
+
+class CoreLogWatcher:
+    """Debounced directory watcher feeding changed core logs to the ingest job runner."""
+
+    def __init__(self, directory=None, quiet_seconds=None, max_batch=None):
+        self.directory = str(directory or mainconfig.CORE_LOGS_DIR)
+        self.quiet_seconds = mainconfig.LOG_WATCH_QUIET_SECONDS if quiet_seconds is None else quiet_seconds
+        self.max_batch = max_batch or mainconfig.LOG_WATCH_MAX_BATCH
+        self._name_regex = re.compile(mainconfig.LOG_FILE_REGEX)
+        self._last_change = {}   # path -> time.monotonic() of its last write event
+        self._stop = None
+        self._tasks = []
+
+    def _wanted(self, change, path):
+        from watchfiles import Change
+        return change != Change.deleted and bool(self._name_regex.match(os.path.basename(path)))
+
+    async def _watch(self):
+        from watchfiles import awatch
+        try:
+            async for changes in awatch(self.directory, watch_filter=self._wanted, debounce=500,
+                                        recursive=False, stop_event=self._stop):
+                now = time.monotonic()
+                for _, path in changes:
+                    self._last_change[os.path.abspath(path)] = now
+        except Exception as e:
+            logger.error(f"Core log watcher stopped: {type(e).__name__} - {e}", exc_info=True)
+
+    async def _settle(self):
+        tick = max(0.1, min(0.5, self.quiet_seconds / 2))
+        while not self._stop.is_set():
+            await asyncio.sleep(tick)
+            cutoff = time.monotonic() - self.quiet_seconds
+            ready = [path for path, changed in self._last_change.items() if changed <= cutoff]
+            if not ready:
+                continue
+            for path in ready:
+                del self._last_change[path]
+            ready = [path for path in ready if not _is_writing(path)]
+            if not ready:
+                continue
+            if len(ready) > self.max_batch:
+                logger.info(f"{len(ready)} core logs changed at once; running a full directory scan")
+                ingest_runner.start(trigger="watcher")
+            else:
+                logger.info(f"Core logs ready for ingestion: {', '.join(os.path.basename(p) for p in ready)}")
+                ingest_runner.start(trigger="watcher", files=ready)
+
+    def start(self):
+        """Start watching on the running event loop; also ingests whatever landed while the app was down."""
+        try:
+            import watchfiles  # noqa: F401  (requirements.txt)
+        except ImportError:
+            logger.error("watchfiles is not installed; core log watcher disabled (pip install -r requirements.txt)")
+            return False
+        if not os.path.isdir(self.directory):
+            logger.error(f"Core log directory '{self.directory}' not found; core log watcher disabled")
+            return False
+        self._stop = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._watch(), name="core-log-watch"),
+                       asyncio.create_task(self._settle(), name="core-log-settle")]
+        ingest_runner.start(trigger="startup")
+        logger.info(f"Watching {self.directory} for new core logs")
+        return True
+
+    async def stop(self):
+        if self._stop is None:
+            return
+        self._stop.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+log_watcher = CoreLogWatcher()
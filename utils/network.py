@@ -11,8 +11,11 @@ from typing import List, Dict, Any
 # Assuming these are available from your project structure
 import mainconfig
 import utils.analysis_sqlite as analysis_sqlite
-from utils.fastapi_mymodule import core_check, send_command 
+from utils.fastapi_mymodule import core_check, send_command, LogCheckCollector
 from utils.task_db_manager import task_db_manager
+from utils.db_connection import get_database
+import utils.log_watcher as log_watcher
+import utils.log_archive as log_archive
 # from utils.analysis_sqlite import setup_database, process_log_file
 
 # --- Global Status Store ---
@@ -100,37 +103,41 @@ class NetworkDeviceManager:
             
         # --- PHASE 1: CONNECT AND CREATE LOG FILE ---
         command_success = False
-        try:
-            output_placeholder = None 
-            command_success = send_command(
-                device_setting, 
-                cmds, 
-                logger=logger, 
-                output=output_placeholder
-            ) 
-
-        # --- PHASE 1.3: LOG ANALYSIS to sqlite --- 20251220
-
-            if command_success:
-                try:
-                    self._analysis_sqlite(session_log_file)
-                except Exception as e:
-                    logger.error(f"anaylsis to sqlite fail: {session_log_file}")
-            else:
-                result["error"] = f"Command execution failed or utility returned False for {ip}."
-                return result 
+        result_log = None
+        # 202601 the core log watcher leaves this file alone while we write and ingest it
+        with log_watcher.writing(session_log_file):
+            try:
+                output_placeholder = None 
+                command_success = send_command(
+                    device_setting, 
+                    cmds, 
+                    logger=logger, 
+                    output=output_placeholder
+                ) 
+
+            # --- PHASE 1.3: LOG ANALYSIS to sqlite --- 20251220
+
+                if command_success:
+                    try:
+                        result_log = self._analysis_sqlite(session_log_file)
+                    except Exception as e:
+                        logger.error(f"anaylsis to sqlite fail: {session_log_file}")
+                else:
+                    result["error"] = f"Command execution failed or utility returned False for {ip}."
+                    return result 
                 
-        except (NetMikoAuthenticationException, SSHException, NetMikoTimeoutException) as e:
-            result["error"] = f"Connection error: {type(e).__name__} - {str(e)}" 
-            return result 
-        except Exception as e:
-            result["error"] = f"Unexpected error during command phase: {type(e).__name__} - {str(e)}" 
-            logger.error(f"Error for {ip} (Command Phase): {e}", exc_info=True) 
-            return result 
+            except (NetMikoAuthenticationException, SSHException, NetMikoTimeoutException) as e:
+                result["error"] = f"Connection error: {type(e).__name__} - {str(e)}" 
+                return result 
+            except Exception as e:
+                result["error"] = f"Unexpected error during command phase: {type(e).__name__} - {str(e)}" 
+                logger.error(f"Error for {ip} (Command Phase): {e}", exc_info=True) 
+                return result 
 
         # --- PHASE 2: LOG ANALYSIS ---
         try:
-            analysis_html = core_check(str(LOG_OUTPUT_DIR), session_log_file.name, ip, nodeid) 
+            # 202601 reuse the peer summary collected during the SQLite pass; core_check only re-reads the log without it
+            analysis_html = core_check(str(LOG_OUTPUT_DIR), session_log_file.name, ip, nodeid, result_log=result_log)
             
             # Update status only if analysis succeeds
             result.update({
@@ -219,17 +226,23 @@ class NetworkDeviceManager:
         self.executor.shutdown(wait=False)
 
     # 20251220 """Trigger SQLite update after log is written."""
+    # 202601 The same pass feeds a LogCheckCollector, so the log is parsed once for both the
+    # database and the core_check summary. Returns the log_check dict, or None if the file was
+    # not parsed here (duplicate content, parse failure); core_check then reads the log itself.
     def _analysis_sqlite(self, log_file_path):
+            collector = LogCheckCollector(log_file_path, logger=logger, label="Current Log file: ")
             try:
-                conn = analysis_sqlite.setup_database(mainconfig.DB_PATH) #
-                # process_log_file expects (connection, path, file_id, base_dir)
-                success = analysis_sqlite.process_log_file(conn, log_file_path, None, mainconfig.LOGS_DIR)
+                # 202601 Check threads share one serialized writer, held only while the parsed rows go in
+                success = analysis_sqlite.ingest_log_file(get_database(mainconfig.DB_PATH), log_file_path,
+                                                          mainconfig.LOGS_DIR, line_observers=[collector])
                 if success:
                     logger.info(f"Log {log_file_path} synced to SQLite database.")
-                conn.close()
+                    if collector.lines_seen:
+                        return collector.result()
             except Exception as e:
                 logger.error(f"Failed to _analysis_sqlite to database: {e}")
                 logger.error(traceback.format_exc())
+            return None
 
 # Utility for file listing (moved from mymodule to be accessible)
 def get_file_list_fastapi() -> List[Dict]:
@@ -238,6 +251,12 @@ def get_file_list_fastapi() -> List[Dict]:
     
     for p in mainconfig.LOGS_DIR.rglob("*"): 
         if p.is_file() and not p.name.startswith('.'):
+            if p.name.endswith(log_archive.ARCHIVE_SUFFIX + log_archive.INDEX_SUFFIX):
+                continue
+            created = p.stat().st_ctime
+            # 202601 archived session logs (utils/log_archive.py) are listed and served under their plain name
+            if log_archive.is_log_name(p.name):
+                p = Path(log_archive.logical_path(p))
             # The 'link_path' must match the URL path used by FastAPI's StaticFiles mount
             # Assuming you mount your mainconfig.LOGS_DIR at '/logs'
             link_path = f"/logs/{p.relative_to(mainconfig.BASE_DIR)}" 
@@ -245,7 +264,7 @@ def get_file_list_fastapi() -> List[Dict]:
             log_files.append({
                 "filename": p.name,
                 "link_path": link_path, 
-                "size": f"{(p.stat().st_size / 1024):.2f} KB",
-                "timestamp": datetime.fromtimestamp(p.stat().st_ctime).isoformat()
+                "size": f"{(log_archive.stat_log(p).st_size / 1024):.2f} KB",
+                "timestamp": datetime.fromtimestamp(created).isoformat()
             })
     return log_files
\ No newline at end of file
@@ -4,6 +4,7 @@ import logging
 import os, time
 from datetime import datetime
 import mainconfig as mainconfig
+from utils.db_connection import connect as db_connect, get_database
 
 logger = mainconfig.setup_module_logger(__name__)
 
@@ -16,9 +17,12 @@ class OrionDatabaseManager:
         self.logger = logging.getLogger('analysis.orion')
 
     def connect(self):
-        """Establish a connection to the SQLite database."""
+        """Establish a connection to the SQLite database (reused if already open)."""
+        if self.conn is not None:
+            return
         try:
-            self.conn = sqlite3.connect(self.db_path)
+            # 202601 Tuned WAL connection (utils/db_connection.py); callers used to reconnect on every call
+            self.conn = db_connect(self.db_path)
             self.cursor = self.conn.cursor()
         except sqlite3.Error as e:
             self.logger.error(f"Failed to connect to Orion DB: {e}")
@@ -375,6 +379,8 @@ class OrionDatabaseManager:
         """Close the database connection safely."""
         if self.conn:
             self.conn.close()
+            self.conn = None
+            self.cursor = None
 
 def sync_orion_data(rendered_data):
     if isinstance(rendered_data, str):
@@ -386,6 +392,11 @@ def sync_orion_data(rendered_data):
     # 1. Create the instance
     db_conn = OrionDatabaseManager(database_path)
 
+    # 202601 One Orion sync writes at a time (shared writer lock for orion_data.db)
+    with get_database(database_path).write_lock:
+        _sync_orion_tables(db_conn, rendered_data)
+
+def _sync_orion_tables(db_conn, rendered_data):
     # 2. Connect to the database
     try:
         db_conn.connect()
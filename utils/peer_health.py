@@ -0,0 +1,178 @@
+# peer_health.py
+# 202601 Materialized health of every BGP / OSPF peer (peer_health), so the monitor dashboard reads its problem
+# peers and recent changes from one indexed table instead of recomputing them on every request.
+#  - ingestion refreshes the peers each parsed file touched (analysis_sqlite.apply_parsed_log), inside the same
+#    transaction as the file's rows, so readers never see the two disagree
+#  - flaps_1h / 12h / 24h count flaps (transitions out of Established / Full) in the windows before flaps_ts;
+#    refresh_flap_windows (main.py scheduler) recounts peers that flapped in the last day, so the counts decay
+#  - event retention rebuilds the table after rolling events up; setup_database builds it for an existing database
+# problem is the old dashboard definition:
+#   BGP   a status row not Established
+#   OSPF  latest event (raw, else rollup) not Full and no status row Full
+# Recent changes are read as last_change_ts >= now - 12h, which needs no refresh.
+# setup_database recreates (and so rebuilds) the table when its columns change (ensure_table).
+
+import os, time, sqlite3
+import mainconfig as mainconfig
+from utils.db_connection import get_database
+
+logger = mainconfig.setup_module_logger(__name__)
+
+TABLE_COLUMNS = """protocol TEXT, hostname TEXT, instance TEXT, neighbor TEXT, interface TEXT,
+        state TEXT, uptime TEXT, uptime_seconds INTEGER, checked TEXT, status_log_file TEXT,
+        last_from_state TEXT, last_to_state TEXT, last_change TEXT, last_change_ts INTEGER, last_log_file TEXT,
+        flaps_1h INTEGER, flaps_12h INTEGER, flaps_24h INTEGER, flaps_ts INTEGER, problem INTEGER,
+        PRIMARY KEY (protocol, hostname, instance, neighbor)"""
+HEALTH_FIELDS = ("protocol", "hostname", "instance", "neighbor", "interface", "state", "uptime", "uptime_seconds",
+                 "checked", "status_log_file", "last_from_state", "last_to_state", "last_change", "last_change_ts",
+                 "last_log_file", "flaps_1h", "flaps_12h", "flaps_24h", "flaps_ts", "problem")
+
+FLAP_WINDOWS = (("flaps_1h", 3600), ("flaps_12h", 12 * 3600), ("flaps_24h", 24 * 3600))
+
+# protocol -> tables and the columns of the peer key (hostname, instance, neighbor)
+PROTOCOLS = {
+    "bgp": {"status": "bgp_peer_status", "table": "bgp_state_changes", "rollup": "bgp_state_rollup",
+            "history": "bgp_state_history", "instance": "vpn_instance", "neighbor": "neighbor_ip",
+            "uptime": "up_down_time", "interface": "NULL"},
+    "ospf": {"status": "ospf_peer_status", "table": "ospf_state_changes", "rollup": "ospf_state_rollup",
+             "history": "ospf_state_history", "instance": "process", "neighbor": "neighbor_address",
+             "uptime": "verbose_uptime", "interface": "interface"},
+}
+
+# instance may be NULL (an OSPF process the parser could not read), hence IS instead of =
+_PEER_WHERE = "hostname = ? AND {neighbor} = ? AND {instance} IS ?"
+_STATUS_SQL = ("SELECT state, {uptime}, last_updated_ts, source_log_file, {interface}, uptime_seconds FROM {status} "
+               "WHERE " + _PEER_WHERE + " ORDER BY rowid")
+# newest raw event first; ties in ts go to the later row, as the reverse index scans in monitor.py do
+_LATEST_RAW_SQL = ("SELECT from_state, to_state, timestamp, ts, log_file, {interface} FROM {table} "
+                   "WHERE " + _PEER_WHERE + " ORDER BY ts DESC, id DESC LIMIT 1")
+_LATEST_ROLLUP_SQL = ("SELECT first_from_state, last_to_state, strftime('%Y-%m-%d %H:%M:%S', last_ts, 'unixepoch', 'localtime'), "
+                      "last_ts, NULL, {interface} FROM {rollup} WHERE " + _PEER_WHERE + " ORDER BY last_ts DESC LIMIT 1")
+_FLAPS_SQL = ("SELECT " + ", ".join("SUM(flaps * (ts >= ?))" for _ in FLAP_WINDOWS) + " FROM {history} "
+              "WHERE " + _PEER_WHERE + " AND ts >= ?")
+_DELETE_SQL = "DELETE FROM peer_health WHERE protocol = ? AND hostname = ? AND instance IS ? AND neighbor = ?"
+_INSERT_SQL = f"INSERT INTO peer_health ({', '.join(HEALTH_FIELDS)}) VALUES ({', '.join('?' * len(HEALTH_FIELDS))})"
+
+
+def _sql(template, protocol):
+    return template.format(**PROTOCOLS[protocol])
+
+
+def is_up(protocol, state):
+    """Established (BGP, as written by the parser) / Full (OSPF, any case)."""
+    if protocol == "bgp":
+        return state == "Established"
+    return (state or "").upper().startswith("FULL")
+
+
+def compute_peer(conn, protocol, hostname, instance, neighbor, now):
+    """The peer_health row (dict) of one peer as of now, or None if it has neither a status row nor events."""
+    key = (hostname, neighbor, instance)
+    statuses = conn.execute(_sql(_STATUS_SQL, protocol), key).fetchall()
+    last = conn.execute(_sql(_LATEST_RAW_SQL, protocol), key).fetchone()
+    if last is None:
+        last = conn.execute(_sql(_LATEST_ROLLUP_SQL, protocol), key).fetchone()
+    if not statuses and last is None:
+        return None
+    windows = [now - seconds for _, seconds in FLAP_WINDOWS]
+    flaps = conn.execute(_sql(_FLAPS_SQL, protocol), windows + list(key) + [min(windows)]).fetchone()
+
+    down = [row for row in statuses if row[0] is not None and not is_up(protocol, row[0])]
+    if protocol == "bgp":
+        problem = bool(down)
+    else:
+        problem = (last is not None and last[1] is not None and not is_up(protocol, last[1])
+                   and not any(is_up(protocol, row[0]) for row in statuses))
+    status = (down or statuses or [(None,) * 6])[0]
+    row = {"protocol": protocol, "hostname": hostname, "instance": instance, "neighbor": neighbor,
+           "interface": (last[5] if last is not None else None) or status[4],
+           "state": status[0], "uptime": status[1], "uptime_seconds": status[5], "checked": status[2],
+           "status_log_file": status[3],
+           "last_from_state": None, "last_to_state": None, "last_change": None, "last_change_ts": None,
+           "last_log_file": None, "flaps_ts": now, "problem": int(problem)}
+    if last is not None:
+        row.update(last_from_state=last[0], last_to_state=last[1], last_change=last[2], last_change_ts=last[3],
+                   last_log_file=last[4])
+    for (name, _), count in zip(FLAP_WINDOWS, flaps):
+        row[name] = count or 0
+    return row
+
+
+def ensure_table(conn):
+    """Create peer_health. A table with other columns (an older version) is derived data: dropped and recreated."""
+    columns = tuple(row[1] for row in conn.execute("PRAGMA table_info(peer_health)"))
+    if columns and columns != HEALTH_FIELDS:
+        logger.info("peer_health columns changed, recreating the table")
+        conn.execute("DROP TABLE peer_health")
+    conn.execute(f"CREATE TABLE IF NOT EXISTS peer_health ({TABLE_COLUMNS})")
+
+
+def refresh_peers(conn, peers, now=None):
+    """
+    Recompute the peer_health rows of peers, an iterable of (protocol, hostname, instance, neighbor).
+    Does not commit: ingestion calls it inside the transaction that wrote the peers' rows. Returns rows written.
+    """
+    now = int(now or time.time())
+    written = 0
+    for protocol, hostname, instance, neighbor in peers:
+        row = compute_peer(conn, protocol, hostname, instance, neighbor, now)
+        conn.execute(_DELETE_SQL, (protocol, hostname, instance, neighbor))
+        if row is not None:
+            conn.execute(_INSERT_SQL, [row[name] for name in HEALTH_FIELDS])
+            written += 1
+    return written
+
+
+def host_peers(conn, hostname):
+    """Every peer of hostname that has a peer_health row (e.g. before its events are re-parsed)."""
+    return {tuple(row) for row in conn.execute(
+        "SELECT protocol, hostname, instance, neighbor FROM peer_health WHERE protocol IN ('bgp', 'ospf') AND hostname = ?",
+        (hostname,))}
+
+
+def all_peers(conn):
+    """Every peer with a status row, a raw event or a rollup row."""
+    peers = set()
+    for protocol, spec in PROTOCOLS.items():
+        for table in (spec["status"], spec["table"], spec["rollup"]):
+            peers.update((protocol,) + tuple(row) for row in conn.execute(
+                f"SELECT DISTINCT hostname, {spec['instance']}, {spec['neighbor']} FROM {table}"))
+    return peers
+
+
+def rebuild(conn, now=None):
+    """Recompute the whole table (existing databases, after event retention). Does not commit. Returns rows."""
+    t0 = time.perf_counter()
+    conn.execute("DELETE FROM peer_health")
+    written = refresh_peers(conn, sorted(all_peers(conn), key=lambda peer: tuple(str(v) for v in peer)), now)
+    logger.info(f"Rebuilt peer_health: {written} peers in {time.perf_counter() - t0:.2f}s")
+    return written
+
+
+def needs_rebuild(conn):
+    """An empty peer_health next to peers that exist: a database from before the table, or a lost table."""
+    if conn.execute("SELECT 1 FROM peer_health LIMIT 1").fetchone():
+        return False
+    return any(conn.execute(f"SELECT 1 FROM {spec['status']} LIMIT 1").fetchone() or
+               conn.execute(f"SELECT 1 FROM {spec['table']} LIMIT 1").fetchone()
+               for spec in PROTOCOLS.values())
+
+
+def refresh_flap_windows(db_path=None, now=None):
+    """
+    Scheduled job (main.py): recount the flap windows of peers that flapped in the last day, so counts of
+    peers that went quiet fall back to 0 without new events. Returns the number of peers refreshed.
+    """
+    db_path = db_path or mainconfig.DB_PATH
+    if not os.path.exists(db_path):
+        return 0
+    try:
+        with get_database(db_path).writer() as conn:
+            if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'peer_health'").fetchone():
+                return 0  # created by the next ingestion run (setup_database)
+            peers = [tuple(row) for row in conn.execute(
+                "SELECT protocol, hostname, instance, neighbor FROM peer_health WHERE flaps_24h > 0")]
+            return refresh_peers(conn, peers, now)
+    except sqlite3.Error as e:
+        logger.error(f"peer_health flap window refresh failed: {e}")
+        return 0
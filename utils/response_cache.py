@@ -0,0 +1,76 @@
+# response_cache.py
+# 202601 In-process cache for monitor responses, keyed on the database generation
+# (SQLiteDatabase.generation() in utils/db_connection.py, which changes on every commit by any connection).
+# The data only changes when ingestion / retention / the peer_health refresh commit, while several operators
+# auto-refresh the same pages: a repeat request gets the stored result, or 304 Not Modified when its
+# If-None-Match names the current generation, without running a query.
+#  - entries also expire after MONITOR_CACHE_TTL_SECONDS, for results that depend on the clock
+#    (the 12 hour "recent change" highlight)
+#  - at most MONITOR_CACHE_ENTRIES entries, least recently used dropped first
+
+import time, hashlib, threading
+from collections import OrderedDict
+import mainconfig as mainconfig
+
+logger = mainconfig.setup_module_logger(__name__)
+
+
+class ResponseCache:
+    """(key, generation) -> value, bounded and thread-safe."""
+
+    def __init__(self, max_entries=None, ttl_seconds=None):
+        self.max_entries = max_entries or mainconfig.MONITOR_CACHE_ENTRIES
+        self.ttl_seconds = mainconfig.MONITOR_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self._entries = OrderedDict()  # key -> (generation, stored monotonic time, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, generation):
+        """The value stored for key at this generation, or None (missing, other generation, or expired)."""
+        if generation is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != generation or time.monotonic() - entry[1] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key, generation, value):
+        if generation is None:
+            return value
+        with self._lock:
+            self._entries[key] = (generation, time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def etag(generation, key):
+    """Weak ETag for the response of key at generation, or None without a generation."""
+    if generation is None:
+        return None
+    return 'W/"' + hashlib.sha1(f"{generation}|{key}".encode()).hexdigest()[:20] + '"'
+
+
+def not_modified(request, tag):
+    """True when the request's If-None-Match already names tag (or is *)."""
+    if tag is None:
+        return False
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {value.strip() for value in header.split(",")}
+    return "*" in candidates or tag in candidates
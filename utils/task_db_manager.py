@@ -6,6 +6,7 @@ from datetime import datetime
 from typing import Dict, Any, List, Union
 from pathlib import Path
 import mainconfig # Assumed to contain BASE_DIR
+from utils.db_connection import get_database
 
 # Define the database file path
 DB_FILE = mainconfig.DATA_DIR / "task_status.db"
@@ -33,15 +34,17 @@ class TaskDBManager:
 
     def __init__(self, db_file: Path = DB_FILE):
         self.db_file = db_file
+        # 202601 Shared WAL database: pooled per-thread readers, one serialized writer
+        self._db = get_database(db_file)
         self._initialize_db()
 
     def _get_connection(self):
-        """Returns a connection object."""
-        return sqlite3.connect(self.db_file)
+        """Returns this thread's pooled read connection."""
+        return self._db.reader()
 
     def _initialize_db(self):
         """Creates the task_status table if it doesn't exist."""
-        with self._get_connection() as conn:
+        with self._db.writer() as conn:
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS task_status (
                     task_id TEXT PRIMARY KEY,
@@ -56,7 +59,6 @@ class TaskDBManager:
                     results_json TEXT  -- Store simplified results or status data as JSON
                 );
             """)
-            conn.commit()
 
     def save_task_status(self, data: Dict[str, Any]):
         """Merges new data with existing status and saves the complete record."""
@@ -67,6 +69,11 @@ class TaskDBManager:
             # Raise a specific error if task_id is not found
             raise KeyError("Cannot save task status: 'task_id' must be provided in the data dictionary.")
 
+        # 202601 Read-merge-write under the writer lock so concurrent check threads don't drop updates
+        with self._db.writer() as conn:
+            self._save_merged_status(conn, task_id, data)
+
+    def _save_merged_status(self, conn, task_id: str, data: Dict[str, Any]):
         # 1. Get existing data (or use defaults for a new task)
         existing_status = self.get_task_status(task_id)
         
@@ -100,20 +107,17 @@ class TaskDBManager:
 
         merged_data['results_json'] = results_json_to_save
         
-        # 4. Save the complete record to DB using INSERT OR REPLACE
-        with self._get_connection() as conn:
-            
-            # Values must be in the order: task_id, status, progress, ..., results_json
-            values = [task_id] + [merged_data.get(col, self.DEFAULT_STATUS.get(col)) for col in self.COLUMNS]
+        # 4. Save the complete record to DB using INSERT OR REPLACE (conn is the writer, committed by the caller)
+        # Values must be in the order: task_id, status, progress, ..., results_json
+        values = [task_id] + [merged_data.get(col, self.DEFAULT_STATUS.get(col)) for col in self.COLUMNS]
 
-            columns_sql = ', '.join(['task_id'] + self.COLUMNS)
-            placeholders_sql = ', '.join('?' * len(values))
-            
-            conn.execute(f"""
-                INSERT OR REPLACE INTO task_status ({columns_sql})
-                VALUES ({placeholders_sql})
-            """, values)
-            conn.commit()
+        columns_sql = ', '.join(['task_id'] + self.COLUMNS)
+        placeholders_sql = ', '.join('?' * len(values))
+        
+        conn.execute(f"""
+            INSERT OR REPLACE INTO task_status ({columns_sql})
+            VALUES ({placeholders_sql})
+        """, values)
 
     def get_task_status(self, task_id: str) -> Union[Dict[str, Any], None]:
         """Retrieves a single task status by ID."""
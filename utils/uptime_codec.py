@@ -0,0 +1,48 @@
+# uptime_codec.py
+# 202601 One parser for the peer uptime text the vendor parsers store (bgp_peer_status.up_down_time,
+# ospf_peer_status.verbose_uptime). Ingestion stores the result as uptime_seconds INTEGER next to the text,
+# so the monitor sorts and filters peers on an indexed integer instead of parsing strings on every render.
+#   Comware  536:53:45 (hours:minutes:seconds), 0536h53m, 12h05m, ****h (more than 9999 hours)
+#   IOS      27w5d, 1y2w, 5d12h, 01:23:45, never
+#   EOS      142d21h, 1d02h, 00:12:33
+# ****h and never sort after every real uptime, as the monitor's old parse_uptime ordered them.
+
+import re
+
+OVERFLOW_SECONDS = 10000 * 3600    # ****h: the hour counter is past 9999
+NEVER_SECONDS = 100000 * 3600      # never came up
+RECENT_RESET_SECONDS = 12 * 3600   # dashboard uptime warning
+
+_UNITS = (("y", 365 * 86400), ("w", 7 * 86400), ("d", 86400), ("h", 3600), ("m", 60), ("s", 1))
+_UNITS_REGEX = re.compile("^" + "".join(rf"(?:(\d+){unit})?" for unit, _ in _UNITS) + "$")
+_CLOCK_REGEX = re.compile(r"^(\d+):(\d{1,2})(?::(\d{1,2}))?$")
+
+
+def to_seconds(text):
+    """Seconds of an uptime string, or None when it is empty or not a known format."""
+    if text is None:
+        return None
+    text = str(text).strip().lower()
+    if not text or text == "n/a":
+        return None
+    if text.startswith("****"):
+        return OVERFLOW_SECONDS
+    if text == "never":
+        return NEVER_SECONDS
+    match = _CLOCK_REGEX.match(text)
+    if match:
+        first, second, third = match.groups()
+        if third is None:  # mm:ss
+            return int(first) * 60 + int(second)
+        return int(first) * 3600 + int(second) * 60 + int(third)
+    match = _UNITS_REGEX.match(text)
+    if match and any(match.groups()):
+        return sum(int(value) * seconds for value, (_, seconds) in zip(match.groups(), _UNITS) if value)
+    if text.isdigit():  # bare number: minutes
+        return int(text) * 60
+    return None
+
+
+def recently_reset(seconds):
+    """True for an uptime under RECENT_RESET_SECONDS (the peer came up in the last 12 hours)."""
+    return seconds is not None and seconds < RECENT_RESET_SECONDS
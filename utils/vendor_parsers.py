@@ -0,0 +1,549 @@
+# vendor_parsers.py
+# 202601 Table-driven peer table parser used by analysis_sqlite.parse_routing_info.
+# Each vendor declares its section markers and line rules once; they are compiled into a
+# dispatch table keyed by the line's leading token, so a line is only checked against the
+# few rules that can match it instead of the whole startswith / re.match chain.
+#
+#   Rule(handler, prefix="BGP state")               line.startswith(prefix), dispatched on its leading token
+#   Rule(handler, contains="State is")              substring anywhere; all such literals share one prefilter regex
+#   Rule(..., when=lambda st, line: REGEX.match(line))  extra condition; its value is passed to the handler as m
+#   Rule(..., stop=True)                            the line is done once this rule fires (no further sections)
+#
+# Rules of one section form an elif chain: the first rule whose condition holds fires.
+# Per line the engine runs the "*" rules (markers, always active) and then the active sections in SECTION_ORDER.
+
+import re
+import mainconfig as mainconfig
+
+logger = mainconfig.setup_module_logger(__name__)
+
+SECTION_ORDER = ("bgp", "ospf")
+HOSTNAME_REGEX = re.compile(r"(<|)(.*?)(>|#)")
+_LEAD_TOKEN = re.compile(r"[A-Za-z]+|[0-9]")
+
+
+def line_key(line):
+    """Dispatch key of a stripped line: its leading run of letters, or '#' if it starts with a digit."""
+    m = _LEAD_TOKEN.match(line)
+    if not m:
+        return ""
+    key = m.group()
+    return "#" if key.isdigit() else key
+
+
+class Rule:
+    __slots__ = ("handler", "prefix", "contains", "when", "key", "stop")
+
+    def __init__(self, handler, prefix=None, contains=None, when=None, key=None, stop=False):
+        if prefix is None and contains is None and key is None:
+            raise ValueError(f"Rule {handler.__name__} needs a prefix, contains literal or key")
+        if prefix is not None:
+            key = line_key(prefix)
+            if key != "#" and len(key) == len(prefix):
+                # "Neighbor" would also start "Neighbors ..." whose key differs; end the prefix with a space or ':'
+                raise ValueError(f"Rule prefix {prefix!r} must not end inside its leading word")
+        self.handler, self.prefix, self.contains, self.when = handler, prefix, contains, when
+        self.key, self.stop = key, stop
+
+    def fires(self, state, line):
+        """(True, m) if the rule's condition holds for line, else (False, None)."""
+        if self.prefix is not None and not line.startswith(self.prefix):
+            return False, None
+        if self.contains is not None and self.contains not in line:
+            return False, None
+        m = self.when(state, line) if self.when is not None else None
+        if self.when is not None and not m:
+            return False, None
+        return True, m
+
+
+class _SectionTable:
+    """Compiled rules of one section: key -> rules, plus the contains-only rules behind one prefilter regex."""
+
+    def __init__(self, rules):
+        by_key = {}
+        self.contains_rules = []  # (declaration order, rule)
+        for order, rule in enumerate(rules):
+            if rule.key is not None:
+                by_key.setdefault(rule.key, []).append((order, rule))
+            else:
+                self.contains_rules.append((order, rule))
+        self.by_key = {key: tuple(entries) for key, entries in by_key.items()}
+        literals = sorted({rule.contains for _, rule in self.contains_rules}, key=len, reverse=True)
+        self.contains_regex = re.compile("|".join(map(re.escape, literals))) if literals else None
+
+    def candidates(self, key, line):
+        """Rules that may fire for line, as (order, rule) in declaration order."""
+        entries = self.by_key.get(key, ())
+        if self.contains_regex is not None and self.contains_regex.search(line):
+            extra = tuple(entry for entry in self.contains_rules if entry[1].contains in line)
+            entries = tuple(sorted(entries + extra, key=lambda entry: entry[0]))
+        return entries
+
+
+class ParseState:
+    """Mutable state of one parse: routing_info, active sections and whatever the vendor's init_state adds."""
+
+    def __init__(self, routing_info, host_ip, file_path):
+        self.routing_info = routing_info
+        self.host_ip = host_ip
+        self.file_path = file_path
+        self.hostname = None
+        self.active = set()
+
+
+class VendorParser:
+    """
+    A vendor's markers ("*" section) and per-section rules, compiled once at registration.
+    init_state(state) sets the vendor's working variables, raw_line(state, raw) sees every
+    unstripped line first, finish(state) runs after the last line.
+    """
+
+    def __init__(self, name, sections, init_state=None, raw_line=None, finish=None):
+        self.name = name
+        self.tables = {section: _SectionTable(COMMON_RULES + rules if section == "*" else rules)
+                       for section, rules in sections.items()}
+        self.tables.setdefault("*", _SectionTable(list(COMMON_RULES)))
+        self.section_order = ("*",) + tuple(s for s in SECTION_ORDER if s in self.tables)
+        self.init_state = init_state
+        self.raw_line = raw_line
+        self.finish = finish
+
+    def parse(self, lines, routing_info, host_ip, file_path, scanner=None):
+        state = ParseState(routing_info, host_ip, file_path)
+        if self.init_state:
+            self.init_state(state)
+        tables, order, raw_hook = self.tables, self.section_order, self.raw_line
+        for raw in lines:
+            if scanner is not None:
+                scanner.feed(raw)
+            if raw_hook is not None:
+                raw_hook(state, raw)
+            line = raw.strip()
+            if not line or "---- More ----" in line:
+                continue
+
+            if state.hostname is None:
+                hostname_match = HOSTNAME_REGEX.match(line)
+                if hostname_match:
+                    state.hostname = hostname_match.group(2)
+                    routing_info["hostname"] = state.hostname
+                    routing_info["host_ip"] = host_ip
+                    logger.debug(f"Extracted hostname: {state.hostname}")
+
+            key = line_key(line)
+            for section in order:
+                if section != "*" and section not in state.active:
+                    continue
+                stop = False
+                for _, rule in tables[section].candidates(key, line):
+                    fired, m = rule.fires(state, line)
+                    if fired:
+                        rule.handler(state, line, m)
+                        stop = rule.stop
+                        break
+                if stop:
+                    break
+        if self.finish:
+            self.finish(state)
+        return routing_info
+
+
+VENDOR_PARSERS = {}
+
+def register_vendor(parser, *names):
+    """Register a VendorParser under its name (and any aliases)."""
+    for name in (parser.name,) + names:
+        VENDOR_PARSERS[name] = parser
+    return parser
+
+def get_vendor_parser(vendor):
+    """Parser for a detected vendor; unknown vendors only get the common rules (hostname, "not configured")."""
+    return VENDOR_PARSERS.get(vendor) or GENERIC_PARSER
+
+
+# ---- Common rules (every vendor) ----
+
+def _bgp_not_configured(st, line, m):
+    st.routing_info["BGP"] = "BGP is not configured."
+    st.active.discard("bgp")
+    logger.debug("BGP not configured")
+
+def _ospf_not_configured(st, line, m):
+    st.routing_info["OSPF"] = "OSPF is not configured."
+    st.active.discard("ospf")
+    logger.debug("OSPF not configured")
+
+COMMON_RULES = [
+    Rule(_bgp_not_configured, contains="BGP is not configured.", stop=True),
+    Rule(_ospf_not_configured, contains="OSPF is not configured.", stop=True),
+]
+
+GENERIC_PARSER = VendorParser(None, {})
+
+
+# ---- HPE Comware: display bgp peer / display ospf peer verbose ----
+
+HPE_BGP_PEER_ROW_REGEX = re.compile(r"\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}")
+HPE_OSPF_PROCESS_REGEX = re.compile(r"Process (\d+) with Router ID ([\d\.]+)")
+HPE_OSPF_AREA_REGEX = re.compile(r"Area\s+([\d\.]+)\s+interface\s+([\d\.]+)\(([\w\-\/]+)\)")
+HPE_OSPF_ROUTERID_REGEX = re.compile(r"Router ID:\s*([\d\.]+)\s+Address:\s*([\d\.]+)")
+HPE_OSPF_PAIRS_REGEX = re.compile(r"(\w+):\s+(.*?)(?=\s+\w+:|$)")
+HPE_OSPF_UPTIME_REGEX = re.compile(r"Neighbor is up for\s+([0-9:]+)")
+HPE_OSPF_STATE_COUNT_REGEX = re.compile(r"Neighbor state change count:\s+(\d+)")
+
+def _hpe_init(st):
+    st.router_id = None
+    st.local_as_number = None
+    st.vpn_instance = "Global"
+    st.ospf_process = "0"
+    st.process_id = None
+    st.current_neighbor = None
+    st.pending_down_events = []  # "Last Neighbor Down Event:" blocks still being read
+
+def _hpe_bgp_router_id(st, line, m):
+    st.router_id = line.split(":")[1].strip()
+    st.active.add("bgp")
+    logger.debug(f"BGP router ID: {st.router_id}")
+
+def _hpe_ospf_verbose(st, line, m):
+    st.active.discard("bgp")
+    st.active.add("ospf")
+
+def _hpe_local_as(st, line, m):
+    st.local_as_number = line.split(":")[1].strip()
+    logger.debug(f"BGP local AS: {st.local_as_number}")
+
+def _hpe_vpn_instance(st, line, m):
+    st.vpn_instance = line.split(":")[1].strip()
+    logger.debug(f"BGP VPN instance: {st.vpn_instance}")
+
+def _hpe_peer_totals(st, line, m):
+    peer_total, peer_est = map(int, re.findall(r"\d+", line))
+    st.routing_info["BGP"].append({
+        "VPN_instance": st.vpn_instance,
+        "local_router_id": st.router_id,
+        "local_as_number": st.local_as_number,
+        "Total number of peers": peer_total,
+        "Peers in established state": peer_est,
+        "Peer": []
+    })
+    logger.debug(f"BGP peer totals: {peer_total}, established: {peer_est}")
+
+def _hpe_peer_row(st, line, m):
+    parts = line.split()
+    if len(parts) == 8:
+        st.routing_info["BGP"][-1]["Peer"].append({
+            "neighbor_ip": parts[0],
+            "remote_as": parts[1],
+            "peer_uptime": parts[-2],
+            "peer_status": parts[-1]
+        })
+        logger.debug(f"BGP peer added: {parts[0]}")
+
+def _hpe_ospf_process(st, line, m):
+    st.process_id = m.group(1)
+    st.ospf_process = {
+        "process": st.process_id,
+        "process_routerid": m.group(2),
+        "neighbors": [],
+        "lastevents": {}  # Last down events keyed by remote address
+    }
+    st.routing_info["OSPF"].append(st.ospf_process)
+    logger.debug(f"OSPF Process {st.process_id}, Router ID: {m.group(2)}")
+
+def _hpe_ospf_area(st, line, m):
+    area_match = HPE_OSPF_AREA_REGEX.search(line)
+    st.current_neighbor = {
+        "Area": area_match.group(1),
+        "Interface": f"{area_match.group(2)}({area_match.group(3)})",
+        "neighbor_routerid": None,
+        "neighbor_address": None,
+        "uptime": None,
+        "state": None,
+        "mode": None,
+        "state_count": None
+    }
+    logger.debug(f"Verbose OSPF Area {area_match.group(1)}, Interface {st.current_neighbor['Interface']}")
+
+def _hpe_ospf_router_id(st, line, m):
+    routerid_match = HPE_OSPF_ROUTERID_REGEX.search(line)
+    neighbor_routerid, neighbor_address = routerid_match.group(1), routerid_match.group(2)
+    if st.current_neighbor is None:
+        st.current_neighbor = {"neighbor_routerid": neighbor_routerid, "neighbor_address": neighbor_address}
+    else:
+        st.current_neighbor["neighbor_routerid"] = neighbor_routerid
+        st.current_neighbor["neighbor_address"] = neighbor_address
+    # Append neighbor immediately after getting router ID
+    if st.ospf_process and st.current_neighbor:
+        st.ospf_process["neighbors"].append(st.current_neighbor.copy())
+    logger.debug(f"Verbose OSPF neighbor: {neighbor_routerid}, Address: {neighbor_address}")
+
+def _hpe_ospf_state(st, line, m):
+    data = {key.strip(): value.strip() for key, value in HPE_OSPF_PAIRS_REGEX.findall(line)}
+    st.current_neighbor["state"] = data.get("State")
+    st.current_neighbor["mode"] = data.get("Mode")
+
+def _hpe_append_current_neighbor(st):
+    # Ensure neighbor is added even if the router ID line did not append it
+    if st.ospf_process and st.current_neighbor and st.current_neighbor not in st.ospf_process["neighbors"]:
+        st.ospf_process["neighbors"].append(st.current_neighbor.copy())
+
+def _hpe_ospf_uptime(st, line, m):
+    uptime_match = HPE_OSPF_UPTIME_REGEX.search(line)
+    if uptime_match and st.current_neighbor:
+        st.current_neighbor["uptime"] = uptime_match.group(1)
+        _hpe_append_current_neighbor(st)
+
+def _hpe_ospf_state_count(st, line, m):
+    state_change_match = HPE_OSPF_STATE_COUNT_REGEX.search(line)
+    if state_change_match and st.current_neighbor:
+        st.current_neighbor["state_count"] = state_change_match.group(1)
+        _hpe_append_current_neighbor(st)
+
+def _hpe_last_down_start(st, line, m):
+    # The block is read by _hpe_raw_line (lines up to the next blank / "---- More ----" line)
+    st.pending_down_events.append({"event": {}, "process": st.ospf_process,
+                                   "process_id": st.process_id, "line": line})
+
+def _hpe_raw_line(st, raw):
+    if not st.pending_down_events:
+        return
+    next_line = raw.strip()
+    if "---- More ----" in next_line or not next_line:
+        _finish_last_down_events(st)
+    else:
+        logger.debug(f"Checking line for last down event: {next_line}")
+        fields = _last_down_event_fields(next_line)
+        for pending in st.pending_down_events:
+            pending["event"].update(fields)
+
+def _last_down_event_fields(next_line):
+    """Fields of one line inside a "Last Neighbor Down Event:" block; every line sets all five."""
+    # Use re.IGNORECASE and allow for flexible whitespace (\s+)
+    router_id_match = re.search(r"Router\s*ID:\s*([\d\.]+)", next_line, re.I)
+    local_match = re.search(r"Local\s*Address:\s*([\d\.]+)", next_line, re.I)
+    remote_match = re.search(r"(?:Remote|Neighbor)\s*Address:\s*([\d\.]+)", next_line, re.I)
+    time_match = re.search(r"Time:\s*(.*)", next_line, re.I)
+    reason_match = re.search(r"Reason:\s*(.*)", next_line, re.I)
+
+    # Capture the values safely
+    return {
+        "router_id": router_id_match.group(1) if router_id_match else None,
+        "last_local": local_match.group(1) if local_match else None,
+        "last_remote": remote_match.group(1) if remote_match else None,
+        "last_time": time_match.group(1).strip() if time_match else None,
+        "last_reason": reason_match.group(1).strip() if reason_match else None,
+    }
+
+def _finish_last_down_events(st):
+    """Store the completed "Last Neighbor Down Event:" blocks on their OSPF process and clear the list."""
+    for pending in st.pending_down_events:
+        last_down_event = pending["event"]
+        if last_down_event.get("last_remote"):
+            pending["process"]["lastevents"][last_down_event["last_remote"]] = last_down_event.copy()
+            logger.debug(f"Set last down event for remote {last_down_event['last_remote']} in process {pending['process_id']}: {last_down_event}")
+        else:
+            logger.info(f"No valid last_remote found for last down event in process {pending['process_id']} : {st.file_path} {pending['line']}")
+    st.pending_down_events.clear()
+
+HPE_PARSER = register_vendor(VendorParser("hpe", {
+    "*": [
+        Rule(_hpe_bgp_router_id, prefix="BGP local router ID:", stop=True),
+        Rule(_hpe_ospf_verbose, contains="display ospf peer verbose"),
+    ],
+    "bgp": [
+        Rule(_hpe_local_as, prefix="Local AS number:", stop=True),
+        Rule(_hpe_vpn_instance, prefix="VPN instance:"),
+        Rule(_hpe_peer_totals, prefix="Total number of peers:"),
+        Rule(_hpe_peer_row, key="#", when=lambda st, line: HPE_BGP_PEER_ROW_REGEX.match(line)),
+    ],
+    "ospf": [
+        Rule(_hpe_ospf_process, contains=" with Router ID ", when=lambda st, line: HPE_OSPF_PROCESS_REGEX.search(line)),
+        Rule(_hpe_ospf_area, prefix="Area ", when=lambda st, line: "interface" in line),
+        Rule(_hpe_ospf_router_id, prefix="Router ID:", when=lambda st, line: "Address:" in line),
+        Rule(_hpe_ospf_state, prefix="State:", when=lambda st, line: "Mode:" in line),
+        Rule(_hpe_ospf_uptime, prefix="Neighbor is up for"),
+        Rule(_hpe_ospf_state_count, prefix="Neighbor state change count:"),
+        Rule(_hpe_last_down_start, prefix="Last Neighbor Down Event:"),
+    ],
+}, init_state=_hpe_init, raw_line=_hpe_raw_line, finish=_finish_last_down_events))
+
+
+# ---- Cisco IOS / Arista EOS: show ip bgp neighbors / show ip ospf neighbor detail ----
+
+CISCO_BGP_IPV4_REGEX = re.compile(r"BGP neighbor is (\d+\.\d+\.\d+\.\d+), \s+remote AS (\d+), (\w+) link")
+# BGP neighbor is 10.73.119.241,  vrf VCHA-TC2,  remote AS 4255000501,  local AS 4255000101, external link
+CISCO_BGP_VPNV4_REGEX = re.compile(
+    r"BGP neighbor is "
+    r"(\d+\.\d+\.\d+\.\d+),"  # Group 1: Neighbor IP
+    r"\s+(?:vrf ([\w-]+),\s+)?"  # Group 2: Optional VRF name
+    r"remote AS (\d+),"  # Group 3: Remote AS
+    r"\s+(?:local AS (\d+),\s+)?"  # Group 4: Optional Local AS
+    r"(\w+) link"  # Group 5: Link type
+)
+CISCO_BGP_ROUTER_ID_REGEX = re.compile(r"remote router ID (\d+\.\d+\.\d+\.\d+)")
+CISCO_BGP_STATE_REGEX = re.compile(r"BGP state (?:is|=) (\w+), (up|down) for (.*)")
+CISCO_OSPF_NEIGHBOR_REGEX = re.compile(r"Neighbor (\d+\.\d+\.\d+\.\d+), interface address (\d+\.\d+\.\d+\.\d+)")
+CISCO_OSPF_AREA_REGEX = re.compile(r"In the area (\d+) via interface (\S+)")
+OSPF_STATE_IS_REGEX = re.compile(r"State is (\w+), (\d+) state changes")
+CISCO_OSPF_UPTIME_REGEX = re.compile(r"Neighbor is up for (\d+\w+\d*\w*)")
+ARISTA_OSPF_NEIGHBOR_REGEX = re.compile(r"Neighbor (\d+\.\d+\.\d+\.\d+), instance (\d+), VRF (\S+), interface address (\d+\.\d+\.\d+\.\d+)")
+ARISTA_OSPF_AREA_REGEX = re.compile(r"In area (\d+\.\d+\.\d+\.\d+) interface (\S+)")
+ARISTA_OSPF_UPTIME_REGEX = re.compile(r"Current state was established (.*?) ")
+
+def _cisco_init(st):
+    st.local_as = None
+    st.current_neighbor = None  # shared by the BGP and OSPF rules, as in the original parser
+    st.arista_process = None
+    st.arista_neighbor = None
+
+def _cisco_bgp_section(st, line, m):
+    st.active.add("bgp")
+    st.active.discard("ospf")
+
+def _cisco_ospf_section(st, line, m):
+    st.active.discard("bgp")
+    st.active.add("ospf")
+
+def _cisco_address_family(st, line, m):
+    # Not kept: any other line resets the address family, so a neighbor block never carries it
+    logger.debug(f"BGP address family: {m.group(1)}")
+
+def _cisco_bgp_neighbor_match(st, line):
+    ipv4_match, vpnv4_match = CISCO_BGP_IPV4_REGEX.match(line), CISCO_BGP_VPNV4_REGEX.match(line)
+    return (ipv4_match, vpnv4_match) if (ipv4_match or vpnv4_match) else None
+
+def _cisco_bgp_neighbor(st, line, m):
+    ipv4_match, vpnv4_match = m
+    if ipv4_match:
+        st.neighbor_ip, st.vpn_instance, st.remote_as = ipv4_match.group(1), "Global", ipv4_match.group(2)
+    if vpnv4_match:
+        st.neighbor_ip, st.vpn_instance = vpnv4_match.group(1), vpnv4_match.group(2)
+        st.remote_as, st.local_as = vpnv4_match.group(3), vpnv4_match.group(4)
+    st.routing_info["BGP"].append({
+        "address_family": None,
+        "VPN_instance": st.vpn_instance,
+        "local_as_number": st.local_as,
+        "Peer": []
+    })
+    logger.debug(f"BGP neighbor {st.neighbor_ip} in {st.vpn_instance}")
+
+def _cisco_bgp_version(st, line, m):
+    #   BGP version 4, remote router ID 10.26.101.1
+    st.remote_router_id = CISCO_BGP_ROUTER_ID_REGEX.search(line).group(1)
+
+def _cisco_bgp_state(st, line, m):
+    state_match = CISCO_BGP_STATE_REGEX.search(line)
+    st.current_neighbor = {
+        "neighbor_ip": st.neighbor_ip,
+        "remote_router_id": st.remote_router_id,
+        "remote_as": st.remote_as,
+        "peer_uptime": state_match.group(3),
+        "peer_status": state_match.group(1)
+    }
+    st.routing_info["BGP"][-1]["Peer"].append(st.current_neighbor)
+
+def _cisco_ospf_neighbor(st, line, m):
+    # cisco:    Neighbor 10.253.31.246, interface address 10.8.6.238
+    st.current_neighbor = {
+        "neighbor_address": m.group(1),
+        "Interface_address": m.group(2),
+        "Interface": None,
+        "Area": None,
+        "neighbor_routerid": None,
+        "uptime": None,
+        "state": None,
+        "state_count": None
+    }
+
+def _cisco_ospf_area(st, line, m):
+    #    In the area 0 via interface Vlan4042
+    area_match = CISCO_OSPF_AREA_REGEX.search(line)
+    if area_match:
+        st.current_neighbor["Area"] = area_match.group(1)
+        st.current_neighbor["Interface"] = f"{area_match.group(2)}"
+
+def _ospf_state_is(neighbor, line):
+    #    Neighbor priority is 0, State is FULL, 6 state changes
+    state_match = OSPF_STATE_IS_REGEX.search(line)
+    neighbor["state"] = state_match.group(1)
+    neighbor["state_count"] = state_match.group(2)
+
+def _cisco_ospf_state(st, line, m):
+    _ospf_state_is(st.current_neighbor, line)
+
+def _cisco_ospf_uptime(st, line, m):
+    #    Neighbor is up for 27w5d
+    st.current_neighbor["uptime"] = CISCO_OSPF_UPTIME_REGEX.search(line).group(1)
+    if st.current_neighbor.get("Area"):
+        ospf_process = {"process": 0, "process_routerid": None, "neighbors": [], "lastevents": {}}
+        st.routing_info["OSPF"].append(ospf_process)
+        ospf_process["neighbors"].append(st.current_neighbor)
+        st.current_neighbor = None
+
+def _arista_ospf_neighbor(st, line, m):
+    # arista:   Neighbor 10.26.101.73, instance 200, VRF default, interface address 10.26.254.162
+    st.arista_process = {"process": m.group(2), "process_routerid": None, "vrf": m.group(3), "neighbors": [], "lastevents": {}}
+    st.arista_neighbor = {
+        "neighbor_address": m.group(1),
+        "Interface_address": m.group(4),
+        "Interface": None,
+        "Area": None,
+        "neighbor_routerid": None,
+        "uptime": None,
+        "state": None,
+        "state_count": None
+    }
+
+def _arista_ospf_area(st, line, m):
+    #   In area 0.0.0.1 interface Ethernet4/8
+    area_match = ARISTA_OSPF_AREA_REGEX.search(line)
+    st.arista_neighbor["Area"] = area_match.group(1)
+    st.arista_neighbor["Interface"] = f"{area_match.group(2)}"
+
+def _arista_ospf_state(st, line, m):
+    _ospf_state_is(st.arista_neighbor, line)
+
+def _arista_ospf_uptime(st, line, m):
+    #   Current state was established 142d21h ago
+    st.arista_neighbor["uptime"] = ARISTA_OSPF_UPTIME_REGEX.search(line).group(1)
+    st.routing_info["OSPF"].append(st.arista_process)
+    st.arista_process["neighbors"].append(st.arista_neighbor)
+
+CISCO_MARKERS = [
+    Rule(_cisco_bgp_section, contains="show ip bgp all", stop=True),
+    Rule(_cisco_bgp_section, contains="show ip bgp neighbors", stop=True),
+    Rule(_cisco_ospf_section, contains="show ip ospf neighbor detail", stop=True),
+]
+
+def cisco_bgp_rules():
+    return [
+        Rule(_cisco_address_family, prefix="For address family: ", stop=True,
+             when=lambda st, line: re.match(r"For address family: (\w+ \w+)", line)),
+        Rule(_cisco_bgp_neighbor, prefix="BGP neighbor is ", stop=True, when=_cisco_bgp_neighbor_match),
+        Rule(_cisco_bgp_version, prefix="BGP version"),
+        Rule(_cisco_bgp_state, prefix="BGP state"),
+    ]
+
+CISCO_PARSER = register_vendor(VendorParser("cisco", {
+    "*": list(CISCO_MARKERS),
+    "bgp": cisco_bgp_rules(),
+    "ospf": [
+        Rule(_cisco_ospf_neighbor, prefix="Neighbor ", when=lambda st, line: CISCO_OSPF_NEIGHBOR_REGEX.match(line)),
+        Rule(_cisco_ospf_area, prefix="In the area", when=lambda st, line: st.current_neighbor),
+        Rule(_cisco_ospf_state, contains="State is", when=lambda st, line: st.current_neighbor),
+        Rule(_cisco_ospf_uptime, prefix="Neighbor is up"),
+    ],
+}, init_state=_cisco_init))
+
+ARISTA_PARSER = register_vendor(VendorParser("arista", {
+    "*": list(CISCO_MARKERS),
+    "bgp": cisco_bgp_rules(),
+    "ospf": [
+        Rule(_arista_ospf_neighbor, contains="interface address", when=lambda st, line: ARISTA_OSPF_NEIGHBOR_REGEX.search(line)),
+        Rule(_arista_ospf_area, prefix="In area", when=lambda st, line: st.arista_neighbor),
+        Rule(_arista_ospf_state, contains="State is", when=lambda st, line: st.arista_neighbor),
+        Rule(_arista_ospf_uptime, prefix="Current state"),
+    ],
+}, init_state=_cisco_init))